@@ -0,0 +1,85 @@
+# bench_input_parser.py
+# Compares the line-by-line operation parsing that parse_input used to do with the bulk
+# and streaming loaders on a generated scenario.
+#
+#   python benchmarks/bench_input_parser.py [num_operations] [--chunk-size ROWS]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from input_parser import load_scenario, iter_operation_chunks, operations_from_array, parse_input
+
+def write_scenario(path, num_operations, num_robots=4, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        f.write(f"{num_robots} {num_operations}\n")
+        for k in range(num_robots):
+            f.write(f"{1.5 * k:.1f} 0.0 0.0\n")
+        for _ in range(6):
+            f.write("-170.0 170.0 100.0 500.0\n")
+        f.write("0.25 0.5\n")
+        for _ in range(num_operations):
+            values = [rng.uniform(-2.0, 6.0), rng.uniform(0.2, 2.0), rng.uniform(0.2, 1.0),
+                      rng.uniform(-2.0, 6.0), rng.uniform(0.2, 2.0), rng.uniform(0.2, 1.0)]
+            f.write(" ".join(f"{v:.6f}" for v in values) + f" {rng.uniform(0.2, 3.0):.3f}\n")
+
+def legacy_parse_operations(path):
+    """The previous parser: every line stripped and kept, then one dict per operation."""
+    with open(path, 'r') as f:
+        content = f.read()
+    lines = [line.strip() for line in content.split('\n') if line.strip()]
+    K, N = map(int, lines[0].split())
+    index = 1 + K + 6 + 1
+    operations = []
+    for i in range(N):
+        op_data = list(map(float, lines[index].split()))
+        operations.append({
+            'id': i+1,
+            'pick_x': op_data[0], 'pick_y': op_data[1], 'pick_z': op_data[2],
+            'place_x': op_data[3], 'place_y': op_data[4], 'place_z': op_data[5],
+            't_i': op_data[6]
+        })
+        index += 1
+    return operations
+
+def stream_rows(path, chunk_size):
+    rows = 0
+    for _, chunk in iter_operation_chunks(path, chunk_size):
+        rows += len(chunk)
+    return rows
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s")
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scenario loaders.')
+    parser.add_argument('num_operations', nargs='?', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=65536)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scenario.txt')
+        write_scenario(path, args.num_operations)
+        print(f"{args.num_operations} operations, {os.path.getsize(path) / 2**20:.1f} MiB")
+
+        legacy, t_legacy = timed('legacy line-by-line dicts', legacy_parse_operations, path)
+        (_, array, *_), t_bulk = timed('load_scenario (N x 7 array)', load_scenario, path)
+        rows, t_stream = timed(f'iter_operation_chunks ({args.chunk_size})', stream_rows, path, args.chunk_size)
+        (_, operations, *_), t_parse = timed('parse_input (bulk + dicts)', parse_input, path)
+
+        assert operations == legacy, "parse_input differs from the legacy parser"
+        assert operations_from_array(array) == legacy and rows == len(legacy)
+        print(f"speedup: array {t_legacy / t_bulk:.1f}x, streaming {t_legacy / t_stream:.1f}x, "
+              f"dicts {t_legacy / t_parse:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+# bench_stages.py
+# Times the pipeline stages (parse_input, then every stage run_pipeline() times, then
+# write_output) on generated scenarios of growing size, records each stage's peak traced
+# memory, and compares the run with a stored baseline. sequence_operations is bounded by its
+# time budget per robot; resolve_conflicts grows with the number of conflicts (the dense
+# cells at density 2 provoke them) and dominates the large cells.
+#
+#   python benchmarks/bench_stages.py                                 # default scaling grid
+#   python benchmarks/bench_stages.py --operations 500 2000 8000 --robots 4
+#   python benchmarks/bench_stages.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/bench_stages.py --baseline benchmarks/baseline.json --threshold 0.25
+#
+# Timings are the best of --repeat runs without tracing; peak memory comes from one extra
+# run under tracemalloc. With --baseline the exit status is 1 if any stage got slower or
+# needs more memory than the baseline by more than --threshold (stages faster than
+# --min-time seconds are not compared, they are mostly noise).
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scenario_generator import write_scenario
+from input_parser import parse_input
+from scheduler import assign_operations, plan_paths
+from sequencer import sequence_all
+from move_times import MoveTimeMatrix
+from collision_checker import check_collisions, resolve_conflicts
+from output_generator import write_output
+from instrumentation import Recorder, use
+from kinematics import ik_cache, reachability_matrix
+
+STAGES = ('parse_input', 'move_times', 'reachability', 'assign_operations', 'sequence_operations',
+          'plan_paths', 'check_collisions', 'resolve_conflicts', 'write_output')
+BASELINE_VERSION = 2
+
+# (robots, operations, density): operation scaling at 4 robots, robot scaling at 1000
+# operations, and densely packed cells
+DEFAULT_CASES = [
+    (4, 250, 1.0), (4, 1000, 1.0), (4, 4000, 1.0),
+    (2, 1000, 1.0), (8, 1000, 1.0),
+    (4, 250, 2.0), (4, 1000, 2.0),
+]
+
+def case_name(robots, operations, density):
+    return f"{robots}r-{operations}ops-d{density:g}"
+
+def run_stages(input_path, output_path, collision_mode, measure):
+    """Runs the stages as run_pipeline() does (with sequencing), each inside measure(stage_name)."""
+    with measure('parse_input'):
+        robots, operations, tool_clearance, safe_dist, v_max, a_max = parse_input(input_path)
+    with measure('move_times'):
+        move_times = MoveTimeMatrix(robots, operations, v_max, a_max)
+    with measure('reachability'):
+        reachable = reachability_matrix(robots, move_times.picks, move_times.places)
+    with measure('assign_operations'):
+        assign_operations(robots, operations, v_max, a_max, strategy='balanced', move_times=move_times,
+                          reachable=reachable)
+    with measure('sequence_operations'):
+        sequence_all(robots, v_max, a_max, move_times=move_times)
+    with measure('plan_paths'):
+        plan_paths(robots, v_max, a_max)
+    with measure('check_collisions'):
+        collisions = check_collisions(robots, tool_clearance, safe_dist, mode=collision_mode, broadphase=True)
+    with measure('resolve_conflicts'):
+        resolve_conflicts(robots, tool_clearance, safe_dist, collisions)
+    with measure('write_output'):
+        write_output(robots, output_path)
+
+def bench_case(robots, operations, density, seed, repeat, collision_mode, tmp):
+    input_path = os.path.join(tmp, 'scenario.txt')
+    output_path = os.path.join(tmp, 'output.txt')
+    write_scenario(input_path, robots, operations, density, seed=seed)
+
+    times = {stage: math.inf for stage in STAGES}
+    peaks = {}
+
+    @contextmanager
+    def timed(stage):
+        start = time.perf_counter()
+        yield
+        times[stage] = min(times[stage], time.perf_counter() - start)
+
+    @contextmanager
+    def traced(stage):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        yield
+        peaks[stage] = tracemalloc.get_traced_memory()[1] - before
+
+    with use(Recorder('quiet')):
+        # Every run starts with an empty IK cache, so reachability is timed cold
+        for _ in range(repeat):
+            ik_cache.clear()
+            run_stages(input_path, output_path, collision_mode, timed)
+        ik_cache.clear()
+        tracemalloc.start()
+        try:
+            run_stages(input_path, output_path, collision_mode, traced)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'robots': robots,
+        'operations': operations,
+        'density': density,
+        'stages': {stage: {'time': times[stage], 'peak_memory': peaks[stage]} for stage in STAGES},
+        'total_time': sum(times.values()),
+    }
+
+def print_results(results):
+    print(f"{'case':<20}" + "".join(f"{stage:>21}" for stage in STAGES) + f"{'total':>10}")
+    for name, case in results.items():
+        cells = "".join(f"{case['stages'][s]['time']:11.3f}s {case['stages'][s]['peak_memory'] / 2**20:7.1f}M"
+                        for s in STAGES)
+        print(f"{name:<20}{cells}{case['total_time']:9.3f}s")
+
+def print_scaling(results):
+    """Log-log slope of time vs operations per stage, for cases that only differ in operations."""
+    series = {}
+    for case in results.values():
+        series.setdefault((case['robots'], case['density']), []).append(case)
+    for (robots, density), cases in sorted(series.items()):
+        if len(cases) < 2:
+            continue
+        cases.sort(key=lambda case: case['operations'])
+        first, last = cases[0], cases[-1]
+        span = math.log(last['operations'] / first['operations'])
+        slopes = []
+        for stage in STAGES:
+            t0, t1 = first['stages'][stage]['time'], last['stages'][stage]['time']
+            slopes.append(f"{stage} {math.log(t1 / t0) / span:.2f}" if t0 > 0 and t1 > 0 else f"{stage} n/a")
+        print(f"scaling exponent ({robots} robots, density {density:g}, "
+              f"{first['operations']}-{last['operations']} ops): " + ", ".join(slopes))
+
+def compare(results, baseline, threshold, min_time):
+    """Prints stage-by-stage ratios against the baseline; returns the list of regressions."""
+    regressions = []
+    for name, case in results.items():
+        base_case = baseline['cases'].get(name)
+        if base_case is None:
+            print(f"{name}: not in the baseline")
+            continue
+        for stage in STAGES:
+            now, then = case['stages'][stage], base_case['stages'].get(stage)
+            if then is None:
+                continue
+            time_ratio = now['time'] / then['time'] if then['time'] > 0 else math.inf
+            memory_ratio = now['peak_memory'] / then['peak_memory'] if then['peak_memory'] > 0 else 1.0
+            slower = max(now['time'], then['time']) >= min_time and time_ratio > 1 + threshold
+            bigger = now['peak_memory'] - then['peak_memory'] > 2**20 and memory_ratio > 1 + threshold
+            flag = '  REGRESSION' if slower or bigger else ''
+            print(f"{name:<20} {stage:<18} time {time_ratio:6.2f}x  memory {memory_ratio:6.2f}x{flag}")
+            if flag:
+                regressions.append((name, stage, time_ratio, memory_ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages on generated scenarios.')
+    parser.add_argument('--robots', type=int, nargs='+', help='robot counts (with --operations: a grid)')
+    parser.add_argument('--operations', type=int, nargs='+', help='operation counts')
+    parser.add_argument('--density', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case (best is kept)')
+    parser.add_argument('--collision-mode', default='exact', choices=['exact', 'vectorized', 'sampled'])
+    parser.add_argument('--json', metavar='PATH', help='write the results as JSON')
+    parser.add_argument('--save-baseline', metavar='PATH', help='store the results as the new baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against a stored baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown / memory growth as a fraction (default 0.25)')
+    parser.add_argument('--min-time', type=float, default=0.01,
+                        help='stages faster than this (seconds) are not compared (default 0.01)')
+    args = parser.parse_args()
+
+    if args.robots or args.operations:
+        cases = [(r, n, args.density) for r in (args.robots or [4]) for n in (args.operations or [1000])]
+    else:
+        cases = DEFAULT_CASES
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for robots, operations, density in cases:
+            name = case_name(robots, operations, density)
+            results[name] = bench_case(robots, operations, density, args.seed, args.repeat,
+                                       args.collision_mode, tmp)
+            print(f"{name}: {results[name]['total_time']:.3f}s", file=sys.stderr)
+
+    print_results(results)
+    print_scaling(results)
+
+    report = {
+        'version': BASELINE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'collision_mode': args.collision_mode,
+        'cases': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('version') != BASELINE_VERSION:
+            sys.exit(f"{args.baseline}: unsupported baseline version {baseline.get('version')}")
+        regressions = compare(results, baseline, args.threshold, args.min_time)
+        if regressions:
+            print(f"{len(regressions)} stage regressions beyond {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# bench_trajectory_planner.py
+# Compares planning robot by robot and move by move (plan_trajectory) with the batched
+# planner (plan_trajectories) and the process pool planner (plan_trajectories_parallel)
+# on randomly assigned operations, and checks that all produce the same trajectories.
+#
+#   python benchmarks/bench_trajectory_planner.py [num_operations] [--robots K] [--workers N]
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from trajectory_planner import plan_trajectory, plan_trajectories, plan_trajectories_parallel
+
+V_MAX = 90.0 * 3.14159 / 180
+A_MAX = 450.0 * 3.14159 / 180
+FIELDS = ('t0', 'start', 'end', 't_acc', 't_cruise', 'v_peak', 'accel')
+
+def make_robots(num_operations, num_robots, seed=0):
+    rng = random.Random(seed)
+    robots = [{'id': f'R{k+1}', 'base_x': 1.5 * k, 'base_y': 0.0, 'base_z': 0.0, 'operations': []}
+              for k in range(num_robots)]
+    for i in range(num_operations):
+        robots[rng.randrange(num_robots)]['operations'].append({
+            'id': i + 1,
+            'pick_x': rng.uniform(-2.0, 6.0), 'pick_y': rng.uniform(0.2, 2.0), 'pick_z': rng.uniform(0.2, 1.0),
+            'place_x': rng.uniform(-2.0, 6.0), 'place_y': rng.uniform(0.2, 2.0), 'place_z': rng.uniform(0.2, 1.0),
+            't_i': rng.uniform(0.2, 3.0),
+        })
+    return robots
+
+def plan_each(robots):
+    return [plan_trajectory(robot, robot['operations'], V_MAX, A_MAX) for robot in robots]
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s")
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the trajectory planners.')
+    parser.add_argument('num_operations', nargs='?', type=int, default=20000)
+    parser.add_argument('--robots', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=0, help='process pool size (0: one per CPU)')
+    args = parser.parse_args()
+
+    robots = make_robots(args.num_operations, args.robots)
+    print(f"{args.num_operations} operations ({2 * args.num_operations} moves), {args.robots} robots")
+
+    scalar, t_scalar = timed('plan_trajectory per robot', plan_each, robots)
+    scalar_makespans = [robot['makespan'] for robot in robots]
+    batched, t_batched = timed('plan_trajectories (batched)', plan_trajectories, robots, V_MAX, A_MAX)
+
+    for one, other in zip(scalar, batched):
+        for field in FIELDS:
+            assert np.allclose(getattr(one, field), getattr(other, field), rtol=0.0, atol=1e-9), field
+    assert np.allclose(scalar_makespans, [robot['makespan'] for robot in robots], rtol=0.0, atol=1e-9)
+    print(f"speedup: {t_scalar / t_batched:.1f}x")
+
+    parallel, t_parallel = timed(f'plan_trajectories_parallel ({args.workers or os.cpu_count()})',
+                                 plan_trajectories_parallel, robots, V_MAX, A_MAX, args.workers or None, 0)
+    for one, other in zip(batched, parallel):
+        for field in FIELDS:
+            assert np.array_equal(getattr(one, field), getattr(other, field)), field
+    print(f"speedup over batched: {t_batched / t_parallel:.1f}x")
+
+    timed('sample all trajectories (5 mm)', lambda: [t.sample(5e-3) for t in batched])
+
+if __name__ == '__main__':
+    main()
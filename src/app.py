@@ -1,11 +1,14 @@
 # app.py (located in src/)
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
-import subprocess
 import sys
 import json
+import queue
+import threading
 import traceback
+import uuid
+from collections import OrderedDict
 
 # Get the project root directory (one level up from src/)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -13,6 +16,19 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 # Add the src directory to the path so we can import our modules
 sys.path.append(os.path.dirname(__file__))
 
+from pipeline import robots_to_json
+from output_generator import format_output
+from output_parser import parse_output_content, OutputFormatError
+from jobs import JobManager, QueueFullError, DONE, CANCELLED, FINISHED_STATES
+from result_cache import ResultCache, cache_key
+from kinematics import ik_cache
+from planning_session import PlanningSession
+
+# Seconds a single scheduler run may take before the request gives up on it
+SCHEDULER_TIMEOUT = 30
+# Seconds between keep-alive comments on an idle progress stream (streams have no timeout)
+STREAM_KEEPALIVE = 15
+
 app = Flask(__name__)
 CORS(app)  # This allows your frontend to talk to the backend
 
@@ -20,6 +36,144 @@ CORS(app)  # This allows your frontend to talk to the backend
 os.makedirs(os.path.join(PROJECT_ROOT, 'data'), exist_ok=True)
 os.makedirs(os.path.join(PROJECT_ROOT, 'web'), exist_ok=True)
 
+# Solver options a client may set, with their allowed values; the first one is the default
+SOLVER_OPTIONS = {
+    'collision_mode': ('exact', 'vectorized', 'sampled'),
+    'assignment': ('balanced', 'greedy'),
+    'sequencing': (True, False),
+    'timing': ('cartesian', 'joint'),
+}
+
+def parse_solver_options(data):
+    """
+    Validated solver options from a request body with every option filled in (defaults for
+    the missing ones), so equal runs get equal cache keys; raises ValueError on unknown ones
+    """
+    options = data.get('options') or {}
+    if not isinstance(options, dict):
+        raise ValueError('Solver options must be an object')
+    for name, value in options.items():
+        if name not in SOLVER_OPTIONS:
+            raise ValueError(f'Unknown solver option: {name}')
+        allowed = SOLVER_OPTIONS[name]
+        # 1 == True, so the type is checked as well
+        if not isinstance(value, type(allowed[0])) or value not in allowed:
+            raise ValueError(f'Invalid value for {name}: {value!r}')
+    return {name: options.get(name, allowed[0]) for name, allowed in SOLVER_OPTIONS.items()}
+
+# Results of previous runs keyed by normalized scenario + options.
+# Set SCHEDULER_CACHE_DIR to keep them on disk across restarts.
+result_cache = ResultCache(max_entries=int(os.environ.get('SCHEDULER_CACHE_SIZE', 128)),
+                           ttl=float(os.environ.get('SCHEDULER_CACHE_TTL', 3600)),
+                           disk_dir=os.environ.get('SCHEDULER_CACHE_DIR'))
+
+def build_run_response(result, job):
+    """Stores the job's output.txt in its workspace, builds the JSON payload and caches it"""
+    output_data = format_output(result['robots'])
+    with open(os.path.join(job.workspace, 'output.txt'), 'w') as f:
+        f.write(output_data)
+    metadata = build_result_metadata(result)
+    payload = {
+        'success': True,
+        'schedule': output_data,
+        'makespan': metadata['makespan'],
+        'metadata': metadata,
+        'robots': robots_to_json(result['robots']),
+        'report': result['report']
+    }
+    result_cache.put(cache_key(job.scenario, job.options), payload)
+    return payload
+
+# Bounded pool of scheduler workers; each job runs in its own data/jobs/<job_id>/ workspace
+job_manager = JobManager(os.path.join(PROJECT_ROOT, 'data', 'jobs'), build_run_response,
+                         max_workers=4, max_queue=16)
+
+def sse_event(kind, data):
+    """One Server-Sent Events message"""
+    return f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+def stream_listener(events):
+    """
+    Pipeline progress listener for a streamed run: puts (kind, JSON-friendly data) on the
+    `events` queue. Planned robots become 'robot' events with the robots_to_json() layout and
+    collisions are tagged with the stage that found them (check_collisions, or the
+    re-verification in resolve_conflicts).
+    """
+    current_stage = {'stage': None}
+
+    def listener(kind, data):
+        if kind == 'stage' and data['status'] == 'started':
+            current_stage['stage'] = data['stage']
+        if kind == 'robot_planned':
+            kind, data = 'robot', robots_to_json([data['robot']])[0]
+        elif kind == 'collision':
+            data = dict(data, stage=current_stage['stage'])
+        events.put((kind, data))
+    return listener
+
+# Incremental planning sessions, kept in memory; the least recently used are dropped beyond MAX_SESSIONS
+MAX_SESSIONS = int(os.environ.get('SCHEDULER_MAX_SESSIONS', 32))
+sessions = OrderedDict()  # session id -> (lock, PlanningSession)
+sessions_lock = threading.Lock()
+
+def get_session(session_id):
+    """(lock, session) of a planning session, or None"""
+    with sessions_lock:
+        entry = sessions.get(session_id)
+        if entry is not None:
+            sessions.move_to_end(session_id)
+        return entry
+
+def build_session_payload(session_id, session, robot_ids=None, resolve=False, cancel_event=None):
+    """
+    Session state for the frontend: only the robots in `robot_ids` (all if None) are included.
+    With `resolve`, conflict resolution is applied to a copy of the plan and every robot is included.
+    """
+    robots, resolution = session.resolved(cancel_event) if resolve else (session.robots, None)
+    shown = robots if resolve or robot_ids is None else [robot for robot in robots if robot['id'] in robot_ids]
+    collisions = session.collisions
+    makespan = max((robot['makespan'] for robot in robots), default=0.0) * 1000  # ms, like the output file
+    return {
+        'success': True,
+        'session_id': session_id,
+        'makespan': makespan,
+        'metadata': {
+            'makespan': makespan,
+            'num_robots': len(robots),
+            'num_operations': len(session.operations),
+            'unreachable_operations': list(session.unassigned),
+            'collisions_detected': len(collisions),
+            'collisions_remaining': resolution['unresolved'] if resolution else len(collisions),
+            'waits': resolution['waits'] if resolution else [],
+        },
+        'collisions': [list(collision) for collision in collisions],
+        'robots': robots_to_json(shown),
+        'report': session.recorder.report()
+    }
+
+def job_error_response(job):
+    """Maps a failed or cancelled job to an error response"""
+    if job.status == CANCELLED:
+        return jsonify({'error': job.error, 'job_id': job.id, 'status': job.status}), 409
+    status_code = 400 if job.invalid_input else 500
+    return jsonify({'error': job.error, 'job_id': job.id, 'status': job.status}), status_code
+
+def run_session_task(task, status_code=200):
+    """
+    Runs `task(cancel_event)` (work on a planning session) as a job and waits for it like
+    api_run_scheduler: the timeout cancels it. Returns the response with the task's result.
+    """
+    try:
+        job = job_manager.submit_task(task)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    if not job_manager.wait(job.id, timeout=SCHEDULER_TIMEOUT):
+        job_manager.cancel(job.id)
+        return jsonify({'error': f'Planning session timed out after {SCHEDULER_TIMEOUT} seconds'}), 500
+    if job.status != DONE:
+        return job_error_response(job)
+    return jsonify(job.result), status_code
+
 # Serve the main visualizer page
 @app.route('/')
 def serve_visualizer():
@@ -33,7 +187,6 @@ def serve_visualizer():
 def serve_static(path):
     return send_from_directory(os.path.join(PROJECT_ROOT, 'web'), path)
 
-# API endpoint to run the scheduler
 # API endpoint to run the scheduler
 @app.route('/api/run_scheduler', methods=['POST'])
 def api_run_scheduler():
@@ -44,75 +197,203 @@ def api_run_scheduler():
             return jsonify({'error': 'No scenario content provided'}), 400
         
         scenario_content = data['scenario']
-        
-        # Save the scenario content to input.txt
-        input_file_path = os.path.join(PROJECT_ROOT, 'data', 'input.txt')
         try:
-            with open(input_file_path, 'w') as f:
-                f.write(scenario_content)
-            print(f"Saved scenario to {input_file_path}")
-        except Exception as e:
-            return jsonify({'error': f'Failed to write input file: {str(e)}'}), 500
-        
+            options = parse_solver_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Identical scenarios skip parsing, planning and collision checking entirely
+        cached = result_cache.get(cache_key(scenario_content, options))
+        if cached is not None:
+            print("Serving scheduler result from cache")
+            return jsonify(dict(cached, cached=True))
+
         print("Running scheduler with provided scenario...")
         
-        # Run your main.py logic
-        try:
-            result = subprocess.run([
-                sys.executable, 'main.py', input_file_path
-            ], capture_output=True, text=True, cwd=os.path.join(PROJECT_ROOT, 'src'), timeout=30)
-
-            # Check if main.py ran successfully
-            if result.returncode != 0:
-                error_message = f"Backend error: {result.stderr}"
-                print(error_message)
-                return jsonify({'error': error_message}), 500
-
-            print("Simulation completed successfully!")
-            print("STDOUT:", result.stdout)
-            if result.stderr:
-                print("STDERR:", result.stderr)
-
-        except subprocess.TimeoutExpired:
-            return jsonify({'error': 'Scheduler timed out after 30 seconds'}), 500
-        except Exception as e:
-            return jsonify({'error': f'Failed to run scheduler: {str(e)}'}), 500
-
-        # Read the generated output
-        output_file_path = os.path.join(PROJECT_ROOT, 'data', 'output.txt')
-        output_data = ""
+        # Run the pipeline as a job and wait for it; the timeout cancels the job
         try:
-            if os.path.exists(output_file_path):
-                with open(output_file_path, 'r') as f:
-                    output_data = f.read()
-                print(f"Read output from {output_file_path}")
-                
-                # Debug: print first few lines of output
-                lines = output_data.split('\n')
-                print("First 10 lines of output:")
-                for i, line in enumerate(lines[:10]):
-                    print(f"{i}: {repr(line)}")
-                    
-            else:
-                return jsonify({'error': 'Output file was not generated'}), 500
-        except Exception as e:
-            return jsonify({'error': f'Failed to read output file: {str(e)}'}), 500
-        
-        # Parse the output to extract metadata for the frontend
-        metadata = parse_output_metadata(output_data)
-        
-        return jsonify({
-            'success': True,
-            'schedule': output_data,
-            'makespan': metadata['makespan'],
-            'metadata': metadata
-        })
+            job = job_manager.submit(scenario_content, options)
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+
+        if not job_manager.wait(job.id, timeout=SCHEDULER_TIMEOUT):
+            job_manager.cancel(job.id)
+            return jsonify({'error': f'Scheduler timed out after {SCHEDULER_TIMEOUT} seconds'}), 500
+        if job.status != DONE:
+            return job_error_response(job)
+
+        print("Simulation completed successfully!")
+        return jsonify(job.result)
 
     except Exception as e:
         print(f"Unexpected error in api_run_scheduler: {str(e)}")
         print(traceback.format_exc())
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+# Streaming variant of run_scheduler: Server-Sent Events while the pipeline runs
+@app.route('/api/run_scheduler/stream', methods=['POST'])
+def api_run_scheduler_stream():
+    data = request.get_json(silent=True)
+    if not data or 'scenario' not in data:
+        return jsonify({'error': 'No scenario content provided'}), 400
+    try:
+        options = parse_solver_options(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+    cached = result_cache.get(cache_key(data['scenario'], options))
+    if cached is not None:
+        return Response(sse_event('summary', dict(cached, cached=True)), mimetype='text/event-stream',
+                        headers=headers)
+
+    events = queue.Queue()
+    try:
+        job = job_manager.submit(data['scenario'], options, listener=stream_listener(events))
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+
+    def generate():
+        try:
+            yield sse_event('job', job.to_dict())
+            while True:
+                try:
+                    kind, event = events.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if kind == 'finished':
+                    break
+                yield sse_event(kind, event)
+            if job.status == DONE:
+                yield sse_event('summary', job.result)
+            else:
+                yield sse_event('error', {'error': job.error, 'job_id': job.id, 'status': job.status})
+        finally:
+            # The client went away before the run ended
+            if not job.done_event.is_set():
+                job_manager.cancel(job.id)
+
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+# Asynchronous job API: submit returns a job ID immediately
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    data = request.get_json(silent=True)
+    if not data or 'scenario' not in data:
+        return jsonify({'error': 'No scenario content provided'}), 400
+    try:
+        options = parse_solver_options(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    cached = result_cache.get(cache_key(data['scenario'], options))
+    if cached is not None:
+        job = job_manager.submit_completed(data['scenario'], dict(cached, cached=True), options)
+        return jsonify(job.to_dict()), 202
+
+    try:
+        job = job_manager.submit(data['scenario'], options)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def api_job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    if job.status not in FINISHED_STATES:
+        return jsonify(job.to_dict()), 202
+    if job.status != DONE:
+        return job_error_response(job)
+    return jsonify(job.result)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    return jsonify(job.to_dict())
+
+# Incremental planning: create a session, then send it deltas instead of whole scenarios
+@app.route('/api/sessions', methods=['POST'])
+def api_create_session():
+    data = request.get_json(silent=True)
+    if not data or 'scenario' not in data:
+        return jsonify({'error': 'No scenario content provided'}), 400
+    try:
+        options = parse_solver_options(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def create(cancel_event):
+        # The session is only registered once its first payload is ready, so a cancelled one is dropped
+        session = PlanningSession.from_scenario(data['scenario'], cancel_event=cancel_event, **options)
+        session_id = uuid.uuid4().hex
+        payload = build_session_payload(session_id, session, resolve=bool(data.get('resolve')),
+                                        cancel_event=cancel_event)
+        with sessions_lock:
+            sessions[session_id] = (threading.Lock(), session)
+            while len(sessions) > MAX_SESSIONS:
+                sessions.popitem(last=False)
+        return payload
+
+    return run_session_task(create, 201)
+
+@app.route('/api/sessions/<session_id>', methods=['GET'])
+def api_get_session(session_id):
+    entry = get_session(session_id)
+    if entry is None:
+        return jsonify({'error': f'Unknown session {session_id}'}), 404
+    lock, session = entry
+    if request.args.get('resolve') != '1':
+        with lock:
+            return jsonify(build_session_payload(session_id, session))
+
+    def resolve(cancel_event):
+        with lock:
+            return build_session_payload(session_id, session, resolve=True, cancel_event=cancel_event)
+
+    return run_session_task(resolve)
+
+@app.route('/api/sessions/<session_id>/deltas', methods=['POST'])
+def api_apply_deltas(session_id):
+    entry = get_session(session_id)
+    if entry is None:
+        return jsonify({'error': f'Unknown session {session_id}'}), 404
+    data = request.get_json(silent=True)
+    if not data or 'deltas' not in data:
+        return jsonify({'error': 'No deltas provided'}), 400
+    lock, session = entry
+
+    def apply(cancel_event):
+        # Cancelling only stops the resolution: the deltas, once applied, stay applied
+        with lock:
+            changes = session.apply(data['deltas'])
+            # Only the re-planned robots are sent back
+            payload = build_session_payload(session_id, session, set(changes['replanned']),
+                                            bool(data.get('resolve')), cancel_event)
+            payload['changes'] = changes
+            return payload
+
+    return run_session_task(apply)
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def api_delete_session(session_id):
+    with sessions_lock:
+        entry = sessions.pop(session_id, None)
+    if entry is None:
+        return jsonify({'error': f'Unknown session {session_id}'}), 404
+    return jsonify({'success': True, 'session_id': session_id})
+
 # API endpoint to parse output for visualization
 @app.route('/api/parse_output', methods=['POST'])
 def api_parse_output():
@@ -123,14 +404,17 @@ def api_parse_output():
         
         output_content = data['output_content']
         
-        # Parse the output for visualization data
-        visualization_data = parse_output_for_visualization(output_content)
+        # Parse once, then build the visualization data and the metadata from the same arrays
+        parsed = parse_output_content(output_content)
         
         return jsonify({
             'success': True,
-            'visualization_data': visualization_data
+            'visualization_data': parse_output_for_visualization(output_content, parsed),
+            'metadata': parse_output_metadata(output_content, parsed)
         })
         
+    except OutputFormatError as e:
+        return jsonify({'error': f'Invalid output file: {str(e)}'}), 400
     except Exception as e:
         print(f"Output parsing error: {str(e)}")
         return jsonify({'error': f'Output parsing error: {str(e)}'}), 500
@@ -160,116 +444,53 @@ def api_get_scenarios():
 def api_health():
     return jsonify({
         'status': 'ok',
-        'message': 'Flask server is running'
+        'message': 'Flask server is running',
+        'jobs': job_manager.stats(),
+        'cache': result_cache.stats(),
+        'ik_cache': ik_cache.stats(),
+        'sessions': len(sessions)
     })
 
-def parse_output_metadata(output_content):
-    """Extract metadata from output file content with better error handling"""
-    try:
-        lines = output_content.strip().split('\n')
-        if not lines:
-            return {'makespan': 0, 'num_robots': 0, 'num_operations': 0, 'collisions_detected': 0}
-        
-        # Find the first non-empty line for makespan
-        makespan_line = None
-        for line in lines:
-            if line.strip():  # Skip empty lines
-                makespan_line = line.strip()
-                break
-        
-        if not makespan_line:
-            return {'makespan': 0, 'num_robots': 0, 'num_operations': 0, 'collisions_detected': 0}
-        
-        makespan = float(makespan_line)
-        
-        # Count robots and waypoints
-        num_robots = 0
-        total_waypoints = 0
-        i = 1  # Start after makespan line
-        
-        while i < len(lines):
-            line = lines[i].strip()
-            if not line:  # Skip empty lines
-                i += 1
-                continue
-                
-            if line.startswith('R'):
-                num_robots += 1
-                parts = line.split()
-                if len(parts) >= 2:
-                    try:
-                        num_waypoints = int(parts[1])
-                        total_waypoints += num_waypoints
-                        i += num_waypoints + 1  # Skip waypoint lines
-                    except ValueError:
-                        i += 1  # Skip malformed line
-                else:
-                    i += 1
-            else:
-                i += 1
-        
+def build_result_metadata(result):
+    """Metadata for the frontend, taken from an in-process pipeline result"""
+    return {
+        'makespan': result['makespan'] * 1000,  # ms, like the output file
+        'num_robots': len(result['robots']),
+        'num_operations': len(result['operations']),
+        'unreachable_operations': result['assignment'].get('unreachable', []),
+        'collisions_detected': len(result['collisions']),
+        'collisions_remaining': result['conflict_resolution']['unresolved'],
+        'waits': result['conflict_resolution']['waits'],
+        'makespan_estimate': (result['assignment']['makespan_estimate'] or 0.0) * 1000,  # ms
+        'sequenced_makespan_estimate': (result['sequencing'] or {}).get('makespan_after', 0.0) * 1000  # ms
+    }
+
+def parse_output_metadata(output_content, parsed=None):
+    """Extract metadata from output file content; raises OutputFormatError if it is malformed"""
+    parsed = parsed or parse_output_content(output_content)
+    return {
+        'makespan': parsed['makespan'],
+        'num_robots': parsed['num_robots'],
+        'num_waypoints': parsed['num_waypoints'],
+        'num_operations': parsed['num_waypoints'] // 2,  # Rough estimate
         # Count collisions from the debug output (this is a simple approach)
-        collisions_detected = output_content.count('COLLISION DETECTED')
-        
-        return {
-            'makespan': makespan,
-            'num_robots': num_robots,
-            'num_operations': total_waypoints // 2,  # Rough estimate
-            'collisions_detected': collisions_detected
-        }
-    except Exception as e:
-        print(f"Error parsing output metadata: {str(e)}")
-        return {'makespan': 0, 'num_robots': 0, 'num_operations': 0, 'collisions_detected': 0}
+        'collisions_detected': output_content.count('COLLISION DETECTED')
+    }
 
-def parse_output_for_visualization(output_content):
-    """Parse output file content for visualization data"""
-    try:
-        lines = output_content.strip().split('\n')
-        if not lines:
-            return {'robots': [], 'makespan': 0}
-        
-        makespan = float(lines[0].strip())
-        robots = []
-        
-        i = 1
-        robot_id = 1
-        while i < len(lines):
-            if lines[i].startswith('R'):
-                parts = lines[i].split()
-                if len(parts) >= 2:
-                    num_waypoints = int(parts[1])
-                    waypoints = []
-                    
-                    for j in range(1, num_waypoints + 1):
-                        if i + j < len(lines):
-                            wp_parts = lines[i + j].split()
-                            if len(wp_parts) >= 4:
-                                waypoints.append({
-                                    'time': float(wp_parts[0]),
-                                    'x': float(wp_parts[1]),
-                                    'y': float(wp_parts[2]),
-                                    'z': float(wp_parts[3])
-                                })
-                    
-                    robots.append({
-                        'id': f'R{robot_id}',
-                        'waypoints': waypoints,
-                        'color': get_robot_color(robot_id)
-                    })
-                    robot_id += 1
-                    i += num_waypoints + 1
-                else:
-                    i += 1
-            else:
-                i += 1
-        
-        return {
-            'robots': robots,
-            'makespan': makespan
-        }
-    except Exception as e:
-        print(f"Error parsing output for visualization: {str(e)}")
-        return {'robots': [], 'makespan': 0}
+def parse_output_for_visualization(output_content, parsed=None):
+    """Parse output file content for visualization data; raises OutputFormatError if it is malformed"""
+    parsed = parsed or parse_output_content(output_content)
+    robots = []
+    for robot_id, waypoints in enumerate(parsed['robots'].values(), start=1):
+        robots.append({
+            'id': f'R{robot_id}',
+            'waypoints': [{'time': t, 'x': x, 'y': y, 'z': z} for t, x, y, z in waypoints.tolist()],
+            'color': get_robot_color(robot_id)
+        })
+    return {
+        'robots': robots,
+        'makespan': parsed['makespan']
+    }
 
 def get_robot_color(robot_id):
     """Assign colors to robots for visualization"""
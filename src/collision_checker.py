@@ -1,128 +1,652 @@
+import bisect
 import math
+import numpy as np
+from interpolation import schedule_arrays, schedule_position_at, interpolate_many, ScheduleCursor
+from instrumentation import debug, info, warning, count, record, emit, enabled, DEBUG
+from motion import COLLISION_TOLERANCE, robot_schedule
+from schedule import Schedule
 
 # collision_checker.py
 def get_position_at_time(schedule, t):
     """
     Gets the interpolated (x, y, z) position of a robot at time 't' from its schedule.
+    Before the first waypoint the robot holds its first position, after the last one its last.
     """
-    # Find the segment of the schedule where the time 't' falls
-    for i in range(len(schedule) - 1):
-        t_start, x_start, y_start, z_start = schedule[i]
-        t_end, x_end, y_end, z_end = schedule[i+1]
+    return schedule_position_at(schedule, t)
 
-        if t_start <= t <= t_end:
-            # Linear interpolation
-            frac = (t - t_start) / (t_end - t_start)
-            x = x_start + frac * (x_end - x_start)
-            y = y_start + frac * (y_end - y_start)
-            z = z_start + frac * (z_end - z_start)
-            return (x, y, z)
-    # If time is beyond the schedule, return the last position
-    last_point = schedule[-1]
-    return (last_point[1], last_point[2], last_point[3])
+def _robot_schedules(robots):
+    """
+    Piecewise-linear schedules for the checks: analytic trajectories are sampled within
+    COLLISION_TOLERANCE. Returns (schedules, margin) where margin is how much the distance
+    between two sampled robots can differ from the exact one (added to the safety distance).
+    """
+    schedules = [robot_schedule(robot, COLLISION_TOLERANCE) for robot in robots]
+    exact = all(robot.get('trajectory') is None for robot in robots)
+    return schedules, 0.0 if exact else 2 * COLLISION_TOLERANCE
 
-def check_collisions(robots, tool_clearance, safe_dist, time_step=0.1):
+def check_collisions(robots, tool_clearance, safe_dist, time_step=0.1, mode='sampled', broadphase=False):
     """
     Checks for collisions between any two robots at any time.
-    Returns a list of collision events: (time, robot_i_id, robot_j_id)
+    mode='sampled': reference per-tick loop, samples every `time_step` seconds and
+        returns a list of collision events: (time, robot_i_id, robot_j_id)
+    mode='vectorized': same time grid and return value as 'sampled', computed with NumPy
+    mode='exact': solves the closest approach of every pair in closed form and
+        returns collision intervals: (start, end, robot_i_id, robot_j_id, min_distance)
+    broadphase=True drops robot pairs whose swept bounding boxes never come within
+    the safety distance before any distance is computed.
     """
+    if mode == 'exact':
+        return check_collisions_exact(robots, tool_clearance, safe_dist, broadphase)
+    if mode == 'vectorized':
+        return check_collisions_vectorized(robots, tool_clearance, safe_dist, time_step, broadphase=broadphase)
+    if mode != 'sampled':
+        raise ValueError(f"Unknown collision check mode: {mode}")
+
     collision_events = []
     global_makespan = max(robot['makespan'] for robot in robots)
     min_safe_distance = tool_clearance + safe_dist + tool_clearance  # Robot1 radius + gap + Robot2 radius
 
     # Print the safety parameters for clarity
-    print(f"DEBUG: Tool Clearance: {tool_clearance}m, Safe Distance: {safe_dist}m")
-    print(f"DEBUG: Minimum required distance between robot centers: {min_safe_distance}m")
+    debug(f"DEBUG: Tool Clearance: {tool_clearance}m, Safe Distance: {safe_dist}m")
+    debug(f"DEBUG: Minimum required distance between robot centers: {min_safe_distance}m")
+
+    pairs = _pairs_to_check(robots, min_safe_distance, broadphase)
+    # Analytic trajectories are evaluated exactly at every tick
+    cursors = [robot['trajectory'] if robot.get('trajectory') is not None
+               else ScheduleCursor.from_schedule(robot['schedule']) for robot in robots]
 
     t = 0
     # only run the detailed debug for the first few timesteps to avoid too much output
     debug_max_time = 0.2
-    detailed_debug = True
+    log_debug = enabled(DEBUG)
+    detailed_debug = log_debug
+    num_ticks = 0
 
     while t < global_makespan:
         positions = {}
         # Get all robot positions at time t
-        for robot in robots:
-            pos = get_position_at_time(robot['schedule'], t)
+        for robot, cursor in zip(robots, cursors):
+            pos = cursor.position_at(t)
             positions[robot['id']] = pos
 
         # NEW: Detailed debug printing for the start of the simulation
         if detailed_debug and t <= debug_max_time:
-            print(f"\nDEBUG: Time = {t:.6f}s")
+            debug(f"\nDEBUG: Time = {t:.6f}s")
             for robot_id, pos in positions.items():
-                print(f"DEBUG:   {robot_id} position: ({pos[0]:.6f}, {pos[1]:.6f}, {pos[2]:.6f})")
+                debug(f"DEBUG:   {robot_id} position: ({pos[0]:.6f}, {pos[1]:.6f}, {pos[2]:.6f})")
 
-        # Check all pairs of robots
+        # Check all candidate pairs of robots
         robot_ids = list(positions.keys())
-        for i in range(len(robot_ids)):
-            for j in range(i + 1, len(robot_ids)):
-                id_i = robot_ids[i]
-                id_j = robot_ids[j]
-                pos_i = positions[id_i]
-                pos_j = positions[id_j]
-                # Calculate Euclidean distance
-                distance = math.sqrt(sum((a - b) ** 2 for a, b in zip(pos_i, pos_j)))
-                
-                # NEW: Print distance calculation for the first few timesteps
-                if detailed_debug and t <= debug_max_time:
-                    print(f"DEBUG:   Distance between {id_i} and {id_j}: {distance:.6f}m")
-
-                if distance < min_safe_distance:
-                    # NEW: Print a clear message when a collision is detected
-                    print(f"DEBUG:   COLLISION DETECTED! {distance:.6f}m < {min_safe_distance}m")
-                    collision_events.append((t, id_i, id_j))
+        for i, j in pairs:
+            id_i = robot_ids[i]
+            id_j = robot_ids[j]
+            pos_i = positions[id_i]
+            pos_j = positions[id_j]
+            # Calculate Euclidean distance
+            distance = math.sqrt(sum((a - b) ** 2 for a, b in zip(pos_i, pos_j)))
+
+            # NEW: Print distance calculation for the first few timesteps
+            if detailed_debug and t <= debug_max_time:
+                debug(f"DEBUG:   Distance between {id_i} and {id_j}: {distance:.6f}m")
+
+            if distance < min_safe_distance:
+                # NEW: Print a clear message when a collision is detected
+                if log_debug:
+                    debug(f"DEBUG:   COLLISION DETECTED! {distance:.6f}m < {min_safe_distance}m")
+                collision_events.append((t, id_i, id_j))
+                emit('collision', {'time': t, 'robot_i': id_i, 'robot_j': id_j})
         
         # NEW: After the first few timesteps, turn off detailed debug to avoid too much output
         if t > debug_max_time:
             detailed_debug = False
 
         t += time_step
+        num_ticks += 1
+
+    count('pairs_tested', len(pairs))
+    count('pair_distance_evaluations', len(pairs) * num_ticks)
+    count('collision_events', len(collision_events))
 
     # NEW: Print a summary of what was found
     if collision_events:
-        print(f"\nDEBUG: Found {len(collision_events)} potential collision events.")
+        debug(f"\nDEBUG: Found {len(collision_events)} potential collision events.")
         # Print just the first few collisions to avoid spam
         for i, (collision_time, robot_i, robot_j) in enumerate(collision_events[:3]):
-            print(f"DEBUG: Collision #{i+1}: at t={collision_time:.6f}s between {robot_i} and {robot_j}")
+            debug(f"DEBUG: Collision #{i+1}: at t={collision_time:.6f}s between {robot_i} and {robot_j}")
+        if len(collision_events) > 3:
+            debug(f"DEBUG: ... and {len(collision_events) - 3} more collisions")
+    else:
+        debug("\nDEBUG: No collisions detected in the detailed check.")
+
+    return collision_events
+
+def find_collision_intervals(schedule_i, schedule_j, min_safe_distance, t_end=None, t_start=0.0):
+    """
+    Finds every time interval in [t_start, t_end] in which two piecewise-linear schedules
+    are closer than `min_safe_distance`.
+    Both robots move linearly between the merged breakpoints of the two schedules,
+    so inside each shared interval the squared distance is a quadratic in time and
+    the closest approach and the entry/exit times have a closed form.
+    Returns a list of (start, end, min_distance) with touching intervals merged.
+    """
+    times_i, points_i = schedule_arrays(schedule_i)
+    times_j, points_j = schedule_arrays(schedule_j)
+    if t_end is None:
+        t_end = max(times_i[-1], times_j[-1])
+
+    breakpoints = np.union1d(np.union1d(times_i, times_j), [t_start, t_end])
+    breakpoints = breakpoints[(breakpoints >= t_start) & (breakpoints <= t_end)]
+
+    # Relative position of robot i with respect to robot j at every breakpoint
+    rel = interpolate_many(times_i, points_i.T, breakpoints) - interpolate_many(times_j, points_j.T, breakpoints)
+    r_sq = min_safe_distance ** 2
+
+    if len(breakpoints) == 1:
+        distance = float(np.linalg.norm(rel[0]))
+        return [(breakpoints[0], breakpoints[0], distance)] if distance < min_safe_distance else []
+
+    # Inside interval k: rel(u) = d0 + u * e for u in [0, 1]
+    d0 = rel[:-1]
+    e = rel[1:] - d0
+    a = np.einsum('ij,ij->i', e, e)
+    b = np.einsum('ij,ij->i', d0, e)
+    c = np.einsum('ij,ij->i', d0, d0)
+    t0 = breakpoints[:-1]
+    h = np.diff(breakpoints)
+
+    moving = a > 0
+    safe_a = np.where(moving, a, 1.0)
+
+    # Closest approach inside each interval
+    u_min = np.where(moving, np.clip(-b / safe_a, 0.0, 1.0), 0.0)
+    min_dist = np.sqrt(np.maximum(a * u_min ** 2 + 2 * b * u_min + c, 0.0))
+
+    # Roots of a*u^2 + 2*b*u + (c - r^2) = 0 bound the part of the interval in collision
+    disc = b ** 2 - a * (c - r_sq)
+    sqrt_disc = np.sqrt(np.maximum(disc, 0.0))
+    u_enter = np.where(moving, np.clip((-b - sqrt_disc) / safe_a, 0.0, 1.0), 0.0)
+    u_exit = np.where(moving, np.clip((-b + sqrt_disc) / safe_a, 0.0, 1.0), 1.0)
+    colliding = np.where(moving, (disc > 0) & (u_enter < u_exit), c < r_sq) & (h > 0)
+
+    intervals = []
+    for k in np.flatnonzero(colliding):
+        start = t0[k] + u_enter[k] * h[k]
+        end = t0[k] + u_exit[k] * h[k]
+        if intervals and start <= intervals[-1][1] + 1e-9:
+            prev_start, _, prev_min = intervals[-1]
+            intervals[-1] = (prev_start, end, min(prev_min, min_dist[k]))
+        else:
+            intervals.append((start, end, min_dist[k]))
+
+    return [(float(s), float(e_), float(d)) for s, e_, d in intervals]
+
+def check_collisions_vectorized(robots, tool_clearance, safe_dist, time_step=0.1, max_chunk_bytes=64 * 2**20,
+                                broadphase=False):
+    """
+    Vectorized version of the sampled check.
+    Resamples every schedule onto the shared time grid with np.interp, then evaluates the
+    pairwise distances of the upper triangle of the (T x K x K) tensor chunk by chunk so
+    that no chunk needs more than `max_chunk_bytes` of scratch memory.
+    Returns the same collision events as mode='sampled': (time, robot_i_id, robot_j_id)
+    """
+    collision_events = []
+    global_makespan = max(robot['makespan'] for robot in robots)
+    min_safe_distance = tool_clearance + safe_dist + tool_clearance  # Robot1 radius + gap + Robot2 radius
+
+    debug(f"DEBUG: Tool Clearance: {tool_clearance}m, Safe Distance: {safe_dist}m")
+    debug(f"DEBUG: Minimum required distance between robot centers: {min_safe_distance}m")
+
+    robot_ids = [robot['id'] for robot in robots]
+    num_robots = len(robots)
+    grid = np.arange(0.0, global_makespan, time_step)
+
+    # (T, K, 3) positions of every robot on the shared grid
+    positions = np.empty((len(grid), num_robots, 3))
+    for k, robot in enumerate(robots):
+        if robot.get('trajectory') is not None:
+            positions[:, k, :] = robot['trajectory'].positions_at(grid)
+            continue
+        times, points = schedule_arrays(robot['schedule'])
+        positions[:, k, :] = interpolate_many(times, points.T, grid)
+
+    pairs = _pairs_to_check(robots, min_safe_distance, broadphase)
+    pair_i = np.array([i for i, _ in pairs], dtype=int)
+    pair_j = np.array([j for _, j in pairs], dtype=int)
+    bytes_per_step = max(1, len(pairs) * 8 * 2)
+    chunk_size = max(1, max_chunk_bytes // bytes_per_step)
+    r_sq = min_safe_distance ** 2
+
+    for start in range(0, len(grid) if pairs else 0, chunk_size):
+        chunk = positions[start:start + chunk_size]
+        dist_sq = np.zeros((len(chunk), len(pairs)))
+        for axis in range(3):
+            coord = chunk[:, :, axis]
+            dist_sq += (coord[:, pair_i] - coord[:, pair_j]) ** 2
+        violations = dist_sq < r_sq
+        for t_idx, p in zip(*np.nonzero(violations)):
+            t, id_i, id_j = float(grid[start + t_idx]), robot_ids[pair_i[p]], robot_ids[pair_j[p]]
+            collision_events.append((t, id_i, id_j))
+            emit('collision', {'time': t, 'robot_i': id_i, 'robot_j': id_j})
+
+    count('pairs_tested', len(pairs))
+    count('pair_distance_evaluations', len(pairs) * len(grid))
+    count('collision_events', len(collision_events))
+
+    if collision_events:
+        debug(f"\nDEBUG: Found {len(collision_events)} potential collision events.")
+        for i, (collision_time, robot_i, robot_j) in enumerate(collision_events[:3]):
+            debug(f"DEBUG: Collision #{i+1}: at t={collision_time:.6f}s between {robot_i} and {robot_j}")
         if len(collision_events) > 3:
-            print(f"DEBUG: ... and {len(collision_events) - 3} more collisions")
+            debug(f"DEBUG: ... and {len(collision_events) - 3} more collisions")
     else:
-        print("\nDEBUG: No collisions detected in the detailed check.")
+        debug("\nDEBUG: No collisions detected in the vectorized check.")
 
     return collision_events
 
+def _segment_bucket_boxes(schedule, t_end, bucket_width, num_buckets):
+    """
+    Axis-aligned bounding box of a robot for each time bucket.
+    Every schedule segment is linear, so the box of its two endpoints bounds it; the box is
+    added to every bucket the segment overlaps. The robot is held at its first/last waypoint
+    outside its schedule, exactly like the narrow-phase checks do.
+    Returns (box_min, box_max), each of shape (num_buckets, 3).
+    """
+    times, points = schedule_arrays(schedule)
+    if times[0] > 0.0:
+        times = np.concatenate(([0.0], times))
+        points = np.vstack((points[:1], points))
+    if times[-1] < t_end or len(times) == 1:
+        times = np.concatenate((times, [max(t_end, times[-1])]))
+        points = np.vstack((points, points[-1:]))
+
+    seg_min = np.minimum(points[:-1], points[1:])
+    seg_max = np.maximum(points[:-1], points[1:])
+    first_bucket = np.clip((times[:-1] // bucket_width).astype(int), 0, num_buckets - 1)
+    last_bucket = np.clip((times[1:] // bucket_width).astype(int), 0, num_buckets - 1)
+
+    # Expand every segment into one row per bucket it overlaps
+    counts = last_bucket - first_bucket + 1
+    seg_idx = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(seg_idx)) - np.repeat(np.cumsum(counts) - counts, counts)
+    buckets = first_bucket[seg_idx] + offsets
+
+    box_min = np.full((num_buckets, 3), np.inf)
+    box_max = np.full((num_buckets, 3), -np.inf)
+    np.minimum.at(box_min, buckets, seg_min[seg_idx])
+    np.maximum.at(box_max, buckets, seg_max[seg_idx])
+    return box_min, box_max
+
+def broadphase_pairs(robots, min_safe_distance, num_buckets=64, schedules=None):
+    """
+    Sweep-and-prune broadphase over time-bucketed bounding boxes.
+    Each robot's box is inflated by half the minimum safe distance, so two robots can
+    only come closer than `min_safe_distance` in a bucket where their boxes overlap.
+    `schedules` are the robots' piecewise-linear schedules (sampled from their trajectories
+    if not given; the sampling margin is added to the distance in that case).
+    Returns (candidate_pairs, rejected_count) where candidate_pairs is a sorted list of
+    (i, j) robot indices with i < j.
+    """
+    num_robots = len(robots)
+    total_pairs = num_robots * (num_robots - 1) // 2
+    if num_robots < 2:
+        return [], 0
+    if schedules is None:
+        schedules, sampling_margin = _robot_schedules(robots)
+        min_safe_distance += sampling_margin
+
+    t_end = max(robot['makespan'] for robot in robots)
+    num_buckets = max(1, num_buckets if t_end > 0 else 1)
+    bucket_width = t_end / num_buckets if t_end > 0 else 1.0
+    margin = min_safe_distance / 2.0
+
+    box_min = np.empty((num_buckets, num_robots, 3))
+    box_max = np.empty((num_buckets, num_robots, 3))
+    for k, schedule in enumerate(schedules):
+        lo, hi = _segment_bucket_boxes(schedule, t_end, bucket_width, num_buckets)
+        box_min[:, k, :] = lo - margin
+        box_max[:, k, :] = hi + margin
+
+    candidates = set()
+    for b in range(num_buckets):
+        lo = box_min[b]
+        hi = box_max[b]
+        order = np.argsort(lo[:, 0], kind='stable')
+        active = []
+        for i in order:
+            # Drop boxes that end before this one starts along the sweep axis
+            active = [j for j in active if hi[j, 0] >= lo[i, 0]]
+            for j in active:
+                if (lo[i, 1] <= hi[j, 1] and lo[j, 1] <= hi[i, 1] and
+                        lo[i, 2] <= hi[j, 2] and lo[j, 2] <= hi[i, 2]):
+                    candidates.add((min(i, j), max(i, j)))
+            active.append(i)
+
+    candidate_pairs = sorted((int(i), int(j)) for i, j in candidates)
+    return candidate_pairs, total_pairs - len(candidate_pairs)
+
+def _pairs_to_check(robots, min_safe_distance, broadphase, schedules=None):
+    """All (i, j) robot index pairs, or only the broadphase candidates."""
+    if not broadphase:
+        return [(i, j) for i in range(len(robots)) for j in range(i + 1, len(robots))]
+    pairs, rejected = broadphase_pairs(robots, min_safe_distance, schedules=schedules)
+    count('pairs_rejected_by_broadphase', rejected)
+    debug(f"DEBUG: Broadphase kept {len(pairs)} candidate pairs, rejected {rejected}")
+    return pairs
+
+def check_collisions_exact(robots, tool_clearance, safe_dist, broadphase=False):
+    """
+    Exact continuous-time collision check over the piecewise-linear schedules.
+    Cost depends on the number of waypoints, not on makespan / time_step.
+    Analytic trajectories are sampled within COLLISION_TOLERANCE and the safety distance
+    is widened by the sampling error, so no real conflict is missed.
+    Returns a list of collision intervals: (start, end, robot_i_id, robot_j_id, min_distance)
+    """
+    collision_intervals = []
+    global_makespan = max(robot['makespan'] for robot in robots)
+    schedules, sampling_margin = _robot_schedules(robots)
+    min_safe_distance = tool_clearance + safe_dist + tool_clearance + sampling_margin  # Robot1 radius + gap + Robot2 radius
+
+    debug(f"DEBUG: Tool Clearance: {tool_clearance}m, Safe Distance: {safe_dist}m")
+    debug(f"DEBUG: Minimum required distance between robot centers: {min_safe_distance}m")
+
+    pairs = _pairs_to_check(robots, min_safe_distance, broadphase, schedules)
+    for i, j in pairs:
+        robot_i = robots[i]
+        robot_j = robots[j]
+        for start, end, min_distance in find_collision_intervals(
+                schedules[i], schedules[j], min_safe_distance, global_makespan):
+            collision_intervals.append((start, end, robot_i['id'], robot_j['id'], min_distance))
+            emit('collision', {'start': start, 'end': end, 'robot_i': robot_i['id'], 'robot_j': robot_j['id'],
+                               'min_distance': min_distance})
+
+    collision_intervals.sort()
+    count('pairs_tested', len(pairs))
+    count('collision_events', len(collision_intervals))
+
+    if collision_intervals:
+        debug(f"\nDEBUG: Found {len(collision_intervals)} collision intervals.")
+        for i, (start, end, robot_i, robot_j, min_distance) in enumerate(collision_intervals[:3]):
+            debug(f"DEBUG: Collision #{i+1}: t=[{start:.6f}s, {end:.6f}s] between {robot_i} and {robot_j} "
+                  f"(min distance {min_distance:.6f}m)")
+        if len(collision_intervals) > 3:
+            debug(f"DEBUG: ... and {len(collision_intervals) - 3} more collision intervals")
+    else:
+        debug("\nDEBUG: No collisions detected in the exact check.")
+
+    return collision_intervals
+
 # resolving collisions by adding delay timestamps
 
-def prevent_collisions_by_staggered_start(robots, tool_clearance, safe_dist, v_max_linear):
+# Latest rest waypoints tried per conflict before it is given up as unresolvable by waiting
+MAX_WAIT_STOPS = 8
+
+# First window (seconds) of the search for the next conflict, doubled until one is found
+CONFLICT_SEARCH_WINDOW = 1.0
+
+def _rest_mask(robot, schedule):
     """
-    Prevent initial collisions: 
-    delay the start of one robot to let the other clear the shared space first.
+    Waypoints where the robot is at rest, so a wait keeps the velocity profiles valid: every
+    segment boundary of its trajectory (the start, every arrival and departure of a move or
+    dwell, and the end). Every waypoint of a stored piecewise-linear schedule is a boundary.
     """
-    # Delay the robot that has the longer total travel distance
-    robot_to_delay = None
-    for robot in robots:
-        if robot['id'] == 'R2': 
-            robot_to_delay = robot
+    times = schedule.times
+    trajectory = robot.get('trajectory')
+    if trajectory is None or not len(trajectory):
+        return np.ones(len(times), dtype=bool)
+    return np.isin(times, np.concatenate(([0.0], trajectory.t0, trajectory.t0 + trajectory.duration)))
+
+def _window(schedule, t_start, t_end):
+    """View of the waypoints of `schedule` that cover [t_start, t_end] (no copy)."""
+    times = schedule.times
+    lo = max(int(np.searchsorted(times, t_start, side='right')) - 1, 0)
+    hi = max(int(np.searchsorted(times, t_end, side='left')) + 1, lo + 1)
+    return schedule[lo:hi]
+
+def _first_conflict(schedule, committed, min_safe_distance, t_start=0.0, atol=1e-6, known=None):
+    """
+    (start, end, other_id) of the earliest conflict after `t_start` with any committed
+    (id, schedule), or None. Conflicts ending within `atol` of t_start are the tail of one
+    already handled and are skipped.
+    The pairs are checked over a window after t_start that doubles until the earliest conflict
+    is known, so the cost follows the distance to it rather than the horizon. `known` maps
+    other ids to [t_checked, intervals], what is already checked, and is kept across calls
+    (see _forget).
+    """
+    if known is None:
+        known = {}
+    span = CONFLICT_SEARCH_WINDOW
+    while True:
+        first = None
+        reach = math.inf  # every pair is checked up to here
+        for other_id, other in committed:
+            t_end = max(schedule.makespan, other.makespan, t_start)
+            checked, intervals = known.setdefault(other_id, [t_start, []])
+            limit = min(t_start + span, t_end)
+            if checked < limit:
+                found = find_collision_intervals(_window(schedule, checked, limit), _window(other, checked, limit),
+                                                 min_safe_distance, limit, checked)
+                if found and intervals and found[0][0] <= intervals[-1][1]:
+                    # The conflict that ran into the end of the last window goes on
+                    start, _, distance = intervals.pop()
+                    found[0] = (start, found[0][1], min(distance, found[0][2]))
+                intervals.extend(found)
+                checked = known[other_id][0] = limit
+            if checked < t_end:
+                reach = min(reach, checked)
+            k = bisect.bisect_right(intervals, t_start + atol, key=lambda interval: interval[1])
+            if k < len(intervals) and (first is None or intervals[k][0] < first[0]):
+                first = (intervals[k][0], intervals[k][1], other_id)
+                open_end = intervals[k][1] >= checked and checked < t_end
+        if first is None and reach == math.inf:
+            return None
+        if first is not None and first[0] <= reach and not open_end:
+            return first
+        span *= 2
+
+def _forget(known, t):
+    """Drops what `known` (see _first_conflict) says after time t, where the schedule changed."""
+    for other_id, (checked, intervals) in known.items():
+        known[other_id] = [min(checked, t), [(start, min(end, t), distance)
+                                             for start, end, distance in intervals if start < t]]
+
+def _minimal_wait(schedule, stop, segment_end, committed, min_safe_distance, max_wait, tolerance, parked_until=0.0):
+    """
+    Smallest wait at waypoint `stop` after which the robot has no conflict up to the end of
+    the conflicting segment (`segment_end`, shifted by the wait), or up to `parked_until` if
+    the segment ends at its final position, found by doubling and then bisection.
+    Only that window of the schedule is rebuilt and checked.
+    Returns None if no wait up to `max_wait` works.
+    """
+    times, positions = schedule.times, schedule.positions
+    t_stop = float(times[stop])
+    hi = int(np.searchsorted(times, segment_end, side='right'))
+    window_positions = np.vstack((positions[stop], positions[stop:hi]))
+
+    def conflicts(wait):
+        # Holds the stop for `wait` seconds, then follows the schedule shifted by `wait`;
+        # yields the start of each conflict and the committed schedule it is with
+        t_end = max(segment_end + wait, parked_until)
+        candidate = Schedule(np.concatenate(([t_stop], times[stop:hi] + wait)), window_positions)
+        for _, other in committed:
+            for start, _, _ in find_collision_intervals(candidate, _window(other, t_stop, t_end), min_safe_distance,
+                                                        t_end, t_stop):
+                yield start, other
+
+    low, high = 0.0, tolerance
+    while True:
+        found = list(conflicts(high))
+        if not found:
             break
+        # Standing at the stop is only safe until a committed robot first comes too close, and
+        # once a committed robot has parked in the way, waiting longer only meets it later
+        if any(start < t_stop + high or start >= other.makespan for start, other in found):
+            return None
+        low, high = high, 2 * high
+        if low > max_wait:
+            return None
+    while high - low > tolerance:
+        mid = 0.5 * (low + high)
+        if next(conflicts(mid), None) is None:
+            high = mid
+        else:
+            low = mid
+    return high
 
-    if robot_to_delay is None:
-        return # Nothing to do
+def _plan_waits(robots, order, initial, min_safe_distance, tolerance, max_iterations, checkpoint=None):
+    """
+    One prioritized planning pass over copies of the `initial` schedules (by robot id),
+    committing robots in `order`. A conflict that waiting cannot clear is recorded and the
+    robot moves on to its next conflict after it.
+    Returns (schedules by robot id, waits, failures as (robot_id, other_id) pairs).
+    """
+    committed = []
+    schedules = {}
+    waits = []
+    failures = []
+    for robot in order:
+        schedule = initial[robot['id']].copy()
+        at_rest = _rest_mask(robot, schedule)
+        floor = 0.0     # waits only go at or after this time (the end of the last unresolved conflict)
+        t_search = 0.0  # no conflict before this time
+        known = {}      # conflicts with each committed robot found so far (see _first_conflict)
+        for _ in range(max_iterations):
+            if checkpoint is not None:
+                checkpoint()
+            conflict = _first_conflict(schedule, committed, min_safe_distance, t_search, known=known)
+            if conflict is None:
+                break
+            t_conflict, t_clear, other_id = conflict
+            times = schedule.times
+            stops = np.flatnonzero(at_rest)
+            # End of the conflicting move; a robot parked at its final position delays its last move
+            later = stops[times[stops] >= t_conflict]
+            segment_end = float(times[later[0]] if len(later) else times[stops[-1]])
+            # Beyond this wait every committed robot has parked, so waiting longer cannot help
+            horizon = max(other.makespan for _, other in committed)
+            max_wait = max(horizon - t_conflict, 0.0) + max(segment_end - t_conflict, 0.0) + tolerance
+            parked_until = horizon if segment_end >= schedule.makespan else 0.0
+            wait = None
+            candidates = stops[(times[stops] >= floor) & (times[stops] < min(t_conflict, segment_end))]
+            for stop in candidates[::-1][:MAX_WAIT_STOPS]:
+                wait = _minimal_wait(schedule, stop, segment_end, committed, min_safe_distance, max_wait,
+                                     tolerance, parked_until)
+                if wait is not None:
+                    break
+            if wait is None:
+                # No wait clears it: leave this conflict and go on after it
+                failures.append((robot['id'], other_id))
+                if t_clear <= t_search:
+                    break
+                floor = t_search = t_clear
+                continue
+            x, y, z = (float(c) for c in schedule.positions[stop])
+            waits.append({
+                'robot': robot['id'],
+                'yields_to': other_id,
+                'waypoint': int(stop),
+                'time': float(times[stop]),
+                'duration': wait,
+                'position': (x, y, z),
+            })
+            size = len(schedule)
+            schedule.insert_wait(stop, wait)
+            if len(schedule) > size:
+                at_rest = np.insert(at_rest, stop + 1, True)
+            t_search = float(schedule.times[stop])
+            # Only what follows the wait moved; the conflicts before it stand
+            _forget(known, t_search)
+        schedules[robot['id']] = schedule
+        committed.append((robot['id'], schedule))
+    return schedules, waits, failures
+
+def resolve_conflicts(robots, tool_clearance, safe_dist, conflicts=None, priority=None, tolerance=1e-3,
+                      max_iterations=1000, max_attempts=None, checkpoint=None):
+    """
+    Removes collisions by inserting the smallest waits (prioritized planning).
+    Robots are committed one at a time to a space-time reservation table of committed
+    schedules: by default the robot with more remaining work goes first and the others yield,
+    or in the order of the robot ids in `priority`. At its earliest conflict with a committed
+    robot, a robot waits at the latest segment boundary before it (where it is at rest, so
+    the velocity profiles stay valid) for the minimal time that clears the conflicting move;
+    earlier boundaries are tried when waiting there cannot help, and a conflict no wait clears
+    is skipped. If a robot cannot avoid a committed one by waiting (e.g. the other robot
+    crosses its final position), it is moved ahead of that robot and the pass is repeated, up
+    to `max_attempts` times. The best pass is applied and re-verified with the exact check.
+    `conflicts` are the collisions detected beforehand; if it is an empty list nothing is done.
+    `checkpoint` is called before each conflict is handled and may raise to abort.
+    Returns {'waits': [...], 'total_wait', 'makespan_penalty', 'unresolved', 'remaining'}:
+    'remaining' are the exact collision intervals left after the waits, 'unresolved' their number.
+    """
+    report = {'waits': [], 'total_wait': 0.0, 'makespan_penalty': 0.0, 'unresolved': 0, 'remaining': []}
+    if conflicts is not None and len(conflicts) == 0:
+        info("No collisions detected, no waits needed.")
+        return report
 
-    # Calculate a safe delay time. 
-    # time = distance / velocity. Use average velocity.
-    # Avoid division by zero: if v_max is 0, use a small default delay
-    if v_max_linear > 0:
-        # Time to move 2 meters at half the max speed
-        delay_time = 2.0 / (v_max_linear / 2)  
+    sampled, sampling_margin = _robot_schedules(robots)
+    initial = {robot['id']: schedule for robot, schedule in zip(robots, sampled)}
+    min_safe_distance = tool_clearance + safe_dist + tool_clearance + sampling_margin
+    makespan_before = max((robot['makespan'] for robot in robots), default=0.0)
+    if priority is None:
+        order = sorted(robots, key=lambda robot: (-robot['makespan'], robot['id']))
     else:
-        delay_time = 5.0  # fallback delay if speed is zero
+        rank = {robot_id: k for k, robot_id in enumerate(priority)}
+        order = sorted(robots, key=lambda robot: rank.get(robot['id'], len(rank)))
+    if max_attempts is None:
+        max_attempts = 2 * len(robots)
 
-    print(f"Proactively delaying {robot_to_delay['id']} start by {delay_time:.2f}s to prevent initial collisions...")
+    by_id = {robot['id']: robot for robot in robots}
+    best = None
+    tried = set()
+    for _ in range(max_attempts):
+        ids = tuple(robot['id'] for robot in order)
+        tried.add(ids)
+        schedules, waits, failures = _plan_waits(robots, order, initial, min_safe_distance, tolerance, max_iterations,
+                                                 checkpoint)
+        makespan = max((schedule.makespan for schedule in schedules.values()), default=0.0)
+        if best is None or (len(failures), makespan) < (len(best[2]), best[3]):
+            best = (schedules, waits, failures, makespan, ids)
+        if not failures:
+            break
+        # Let a robot that could not yield go before the robot it conflicts with: the first such
+        # move of this pass, or else of the best pass so far, that gives an untried order
+        order = None
+        moves = [(ids, failure) for failure in failures] + [(best[4], failure) for failure in best[2]]
+        for base, (robot_id, other_id) in dict.fromkeys(moves):
+            moved = [k for k in base if k != robot_id]
+            moved.insert(moved.index(other_id), robot_id)
+            if tuple(moved) not in tried:
+                order = [by_id[k] for k in moved]
+                break
+        if order is None:
+            break
+
+    schedules, waits, failures, _, _ = best
+    for robot in robots:
+        trajectory = robot.get('trajectory')
+        if trajectory is None:
+            robot['schedule'] = schedules[robot['id']]
+            robot['makespan'] = robot['schedule'].makespan
+            continue
+        # Replay the waits on the analytic trajectory (they were planned in this order)
+        for wait in waits:
+            if wait['robot'] == robot['id']:
+                trajectory.insert_wait(wait['time'], wait['duration'])
+        robot['makespan'] = trajectory.makespan
+    for wait in waits:
+        x, y, z = wait['position']
+        info(f"{wait['robot']} waits {wait['duration']:.3f}s at t={wait['time']:.3f}s "
+             f"({x:.3f}, {y:.3f}, {z:.3f}) to let {wait['yields_to']} pass")
+    for robot_id, other_id in failures:
+        warning(f"WARNING: Could not resolve the conflict of {robot_id} with {other_id} by waiting.")
 
-    # Apply the delay by shifting the entire schedule
-    new_schedule = []
-    for point in robot_to_delay['schedule']:
-        new_time = point[0] + delay_time
-        new_schedule.append((new_time, point[1], point[2], point[3]))
-    robot_to_delay['schedule'] = new_schedule
-    robot_to_delay['makespan'] += delay_time
\ No newline at end of file
+    remaining = check_collisions_exact(robots, tool_clearance, safe_dist, broadphase=True)
+    report['waits'] = waits
+    report['unresolved'] = len(remaining)
+    report['remaining'] = remaining
+    report['total_wait'] = sum(wait['duration'] for wait in waits)
+    report['makespan_penalty'] = max((robot['makespan'] for robot in robots), default=0.0) - makespan_before
+    count('waits_inserted', len(waits))
+    record('wait_time_total', report['total_wait'])
+    info(f"Inserted {len(waits)} waits ({report['total_wait']:.3f}s total, makespan "
+         f"+{report['makespan_penalty']:.3f}s); {len(remaining)} collision intervals remain")
+    return report
@@ -1,67 +1,144 @@
 # input_parser.py
-def parse_input(input_source, is_filename=True):
+import io
+import itertools
+import numpy as np
+
+# Column order of an operation line and of the N x 7 operation array
+OPERATION_COLUMNS = ('pick_x', 'pick_y', 'pick_z', 'place_x', 'place_y', 'place_z', 't_i')
+
+def _open_source(input_source, is_filename):
+    return open(input_source, 'r') if is_filename else io.StringIO(input_source)
+
+def _content_lines(f):
+    """(line number, stripped line) for the non-blank lines of a text stream, read lazily."""
+    for number, line in enumerate(f, 1):
+        line = line.strip()
+        if line:
+            yield number, line
+
+def _next_line(lines):
+    numbered = next(lines, None)
+    if numbered is None:
+        raise ValueError("unexpected end of input")
+    return numbered[1]
+
+def _read_header(lines):
+    """
+    Parses everything before the operation block from an iterator of numbered non-blank
+    lines (see _content_lines), consuming exactly those lines.
+    Returns (N, robots, tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian).
+    """
+    # Parse first line
+    K, N = map(int, _next_line(lines).split())
+
+    # Parse robot base positions
+    robots = []
+    for i in range(K):
+        coords = list(map(float, _next_line(lines).split()))
+        robots.append({
+            'id': f'R{i+1}',
+            'base_x': coords[0],
+            'base_y': coords[1],
+            'base_z': coords[2],
+            'operations': []  # To be assigned later
+        })
+
+    # Parse joint parameters (we'll use the first joint's max speed/accel for cartesian approximation)
+    joint_params = []
+    for i in range(6):
+        params = list(map(float, _next_line(lines).split()))
+        joint_params.append(params) # [min, max, v_max, a_max]
+    # Let's use the minimum of all joint V_max and A_max for our cartesian movement model
+    v_max = min(param[2] for param in joint_params) # deg/s
+    a_max = min(param[3] for param in joint_params) # deg/s²
+    # Convert to rad/s for a more standard unit. We'll assume a worst-case lever arm of 1m.
+    v_max_cartesian = (v_max * 3.14159 / 180) * 1.0 # m/s (very rough approximation)
+    a_max_cartesian = (a_max * 3.14159 / 180) * 1.0 # m/s²
+
+    # Parse safety parameters
+    tool_clearance, safe_dist = map(float, _next_line(lines).split())
+
+    # Also add max_reach and the joint limits for the inverse kinematics
+    for robot in robots:
+        # Estimate max_reach as the length of a fully extended arm.
+        # A typical 6-axis arm might have a reach of 1.5m-2.0m.
+        robot['max_reach'] = 2.2  # meters
+        robot['joint_params'] = joint_params  # [min, max, v_max, a_max] per joint (degrees)
+
+    return N, robots, tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian
+
+def _operation_lines(lines, count):
+    """The next `count` operation lines of numbered `lines`; a line with too few values raises ValueError."""
+    for number, line in itertools.islice(lines, count):
+        values = len(line.split())
+        if values < len(OPERATION_COLUMNS):
+            raise ValueError(f"line {number}: expected {len(OPERATION_COLUMNS)} values, found {values}")
+        yield line
+
+def _load_operation_rows(lines, count):
+    """
+    Bulk-parses the next `count` operation lines of numbered `lines` into a (rows x 7) array;
+    rows < count if the input ends early.
+    """
+    rows = _operation_lines(lines, count)
+    first = next(rows, None)
+    if first is None:
+        return np.empty((0, len(OPERATION_COLUMNS)))
+    return np.loadtxt(itertools.chain([first], rows), dtype=float, usecols=range(len(OPERATION_COLUMNS)),
+                      ndmin=2, comments=None)
+
+def load_scenario(input_source, is_filename=True):
+    """
+    Bulk loader: reads the operation block in one numeric read instead of one dict per line.
+    Returns (robots, operations, tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian)
+    where `operations` is an N x 7 float array with the columns of OPERATION_COLUMNS.
+    """
     try:
-        if is_filename:
-            with open(input_source, 'r') as f:
-                content = f.read()
-            lines = [line.strip() for line in content.split('\n') if line.strip()]
-        else:
-            lines = [line.strip() for line in input_source.split('\n') if line.strip()]
-
-        # Parse first line
-        K, N = map(int, lines[0].split())
-        index = 1
-
-        # Parse robot base positions
-        robots = []
-        for i in range(K):
-            coords = list(map(float, lines[index].split()))
-            robots.append({
-                'id': f'R{i+1}',
-                'base_x': coords[0],
-                'base_y': coords[1],
-                'base_z': coords[2],
-                'operations': []  # To be assigned later
-            })
-            index += 1
-
-        # Parse joint parameters (we'll use the first joint's max speed/accel for cartesian approximation)
-        joint_params = []
-        for i in range(6):
-            params = list(map(float, lines[index].split()))
-            joint_params.append(params) # [min, max, v_max, a_max]
-            index += 1
-        # Let's use the minimum of all joint V_max and A_max for our cartesian movement model
-        v_max = min(param[2] for param in joint_params) # deg/s
-        a_max = min(param[3] for param in joint_params) # deg/s²
-        # Convert to rad/s for a more standard unit. We'll assume a worst-case lever arm of 1m.
-        v_max_cartesian = (v_max * 3.14159 / 180) * 1.0 # m/s (very rough approximation)
-        a_max_cartesian = (a_max * 3.14159 / 180) * 1.0 # m/s²
-
-        # Parse safety parameters
-        tool_clearance, safe_dist = map(float, lines[index].split())
-        index += 1
-
-        # Parse operations
-        operations = []
-        for i in range(N):
-            op_data = list(map(float, lines[index].split()))
-            operations.append({
-                'id': i+1,
-                'pick_x': op_data[0], 'pick_y': op_data[1], 'pick_z': op_data[2],
-                'place_x': op_data[3], 'place_y': op_data[4], 'place_z': op_data[5],
-                't_i': op_data[6]  # fixed operation time
-            })
-            index += 1
-
-            # Also add max_reach for the simplified kinematics check
-        for robot in robots:
-            # Estimate max_reach as the length of a fully extended arm.
-            # A typical 6-axis arm might have a reach of 1.5m-2.0m.
-            robot['max_reach'] = 2.2  # meters
-            # A robot can likely reach points very close to its base.
-            robot['min_reach'] = 0.1  # meters  # Changed from 0.2 to 0.1
+        with _open_source(input_source, is_filename) as f:
+            lines = _content_lines(f)
+            N, robots, tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian = _read_header(lines)
+            operations = _load_operation_rows(lines, N)
+        if len(operations) < N:
+            raise ValueError(f"expected {N} operations, found {len(operations)}")
+    except Exception as e:
+        raise ValueError(f"Input parsing failed: {str(e)}")
+    return robots, operations, tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian
 
+def iter_operation_chunks(input_source, chunk_size=65536, is_filename=True):
+    """
+    Streaming loader: yields (first_id, chunk) for consecutive blocks of at most
+    `chunk_size` operations, where chunk is a (rows x 7) float array and first_id is the
+    1-based id of its first operation. Only one chunk is held in memory at a time.
+    Use load_scenario() or parse_input() for the robots and parameters in the header.
+    """
+    try:
+        with _open_source(input_source, is_filename) as f:
+            lines = _content_lines(f)
+            N = _read_header(lines)[0]
+            first_id = 1
+            while first_id <= N:
+                rows = min(chunk_size, N - first_id + 1)
+                chunk = _load_operation_rows(lines, rows)
+                if len(chunk) < rows:
+                    raise ValueError(f"expected {N} operations, found {first_id - 1 + len(chunk)}")
+                yield first_id, chunk
+                first_id += rows
     except Exception as e:
         raise ValueError(f"Input parsing failed: {str(e)}")
-    return robots, operations, tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian
\ No newline at end of file
+
+def operations_from_array(operations, first_id=1):
+    """Operation dicts (as returned by parse_input) from an N x 7 operation array."""
+    return [
+        {
+            'id': first_id + i,
+            'pick_x': row[0], 'pick_y': row[1], 'pick_z': row[2],
+            'place_x': row[3], 'place_y': row[4], 'place_z': row[5],
+            't_i': row[6]  # fixed operation time
+        }
+        for i, row in enumerate(np.asarray(operations, dtype=float).reshape(-1, 7).tolist())
+    ]
+
+def parse_input(input_source, is_filename=True):
+    robots, operations, tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian = load_scenario(
+        input_source, is_filename)
+    return robots, operations_from_array(operations), tool_clearance, safe_dist, v_max_cartesian, a_max_cartesian
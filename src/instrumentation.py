@@ -0,0 +1,116 @@
+# instrumentation.py
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+
+# Log levels: a message is printed when its level is <= the recorder's level
+QUIET = 0
+WARNING = 1
+INFO = 2
+DEBUG = 3
+LEVELS = {'quiet': QUIET, 'warning': WARNING, 'info': INFO, 'debug': DEBUG}
+
+class Recorder:
+    """
+    Collects per-stage wall time and counters for one pipeline run, and filters log
+    output by level. Messages are formatted lazily (`message % args`) so disabled
+    levels cost no string formatting in hot loops.
+    `listener(kind, data)`, if given, receives progress events as they happen: stage
+    starts and ends, planned robots and collisions found (see emit()).
+    """
+
+    def __init__(self, level=INFO, listener=None):
+        self.level = LEVELS.get(level, level) if isinstance(level, str) else level
+        self.listener = listener
+        self.stages = {}
+        self.counters = {}
+        self.values = {}
+        self._started = time.perf_counter()
+
+    def enabled(self, level):
+        return level <= self.level
+
+    def log(self, level, message, *args):
+        if level <= self.level:
+            print(message % args if args else message)
+
+    @contextmanager
+    def stage(self, name):
+        """Times a pipeline stage; repeated stages accumulate."""
+        self.emit('stage', {'stage': name, 'status': 'started'})
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            self.emit('stage', {'stage': name, 'status': 'finished', 'time': elapsed})
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name, value):
+        """Stores a single value (e.g. a makespan estimate) in the report."""
+        self.values[name] = value
+
+    def emit(self, kind, data):
+        """Passes a progress event to the listener, if there is one."""
+        if self.listener is not None:
+            self.listener(kind, data)
+
+    def report(self):
+        return {
+            'stages': dict(self.stages),
+            'counters': dict(self.counters),
+            'values': dict(self.values),
+            'total_time': time.perf_counter() - self._started,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.report(), **kwargs)
+
+_default_recorder = Recorder()
+_current_recorder = contextvars.ContextVar('instrumentation_recorder', default=None)
+
+def current():
+    """The recorder of the running pipeline (per thread/context), or the process default."""
+    recorder = _current_recorder.get()
+    return recorder if recorder is not None else _default_recorder
+
+@contextmanager
+def use(recorder):
+    """Makes `recorder` the current recorder for the duration of the block."""
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+def enabled(level):
+    return current().enabled(level)
+
+def debug(message, *args):
+    current().log(DEBUG, message, *args)
+
+def info(message, *args):
+    current().log(INFO, message, *args)
+
+def warning(message, *args):
+    current().log(WARNING, message, *args)
+
+def stage(name):
+    return current().stage(name)
+
+def count(name, amount=1):
+    current().count(name, amount)
+
+def record(name, value):
+    current().record(name, value)
+
+def listening():
+    """True if progress events are being streamed (build expensive event data only then)."""
+    return current().listener is not None
+
+def emit(kind, data):
+    current().emit(kind, data)
@@ -0,0 +1,113 @@
+# interpolation.py
+import bisect
+import numpy as np
+from schedule import Schedule
+
+# Shared piecewise-linear interpolation of robot schedules.
+# A schedule is a Schedule or a list of waypoints (t, x, y, z) sorted by time.
+# Consecutive waypoints may share the same time (zero-duration segments from
+# zero-distance moves or zero dwell times); lookups always pick the last waypoint at or
+# before `t`, so no segment with zero duration is ever divided by. Outside the schedule
+# the robot holds its first/last waypoint.
+
+def schedule_arrays(schedule):
+    """Time array and Nx3 position array of a schedule (no copy for a Schedule)."""
+    if isinstance(schedule, Schedule):
+        return schedule.times, schedule.positions
+    data = np.asarray(schedule, dtype=float).reshape(-1, 4)
+    return data[:, 0], data[:, 1:4]
+
+def find_segment(times, t, key=None):
+    """
+    Index of the last waypoint whose time is <= t (O(log n) bisection).
+    Returns -1 if t is before the first waypoint.
+    """
+    return bisect.bisect_right(times, t, key=key) - 1
+
+def _lerp(times, columns, i, t):
+    """Position at time t inside the segment starting at waypoint i."""
+    n = len(times)
+    if i < 0:
+        return tuple(float(col[0]) for col in columns)
+    if i >= n - 1:
+        return tuple(float(col[-1]) for col in columns)
+    t_start = times[i]
+    frac = (t - t_start) / (times[i + 1] - t_start)
+    return tuple(float(col[i] + frac * (col[i + 1] - col[i])) for col in columns)
+
+def interpolate(times, columns, t):
+    """
+    Interpolated position at time t.
+    `columns` is a sequence of coordinate arrays aligned with `times`, e.g. (x, y, z).
+    """
+    return _lerp(times, columns, find_segment(times, t), t)
+
+def schedule_position_at(schedule, t):
+    """Interpolated (x, y, z) of a schedule, without copying it."""
+    if isinstance(schedule, Schedule):
+        return interpolate(schedule.times, schedule.positions.T, t)
+    i = find_segment(schedule, t, key=lambda wp: wp[0])
+    n = len(schedule)
+    if i < 0:
+        i, t = 0, schedule[0][0]
+    if i >= n - 1:
+        last_point = schedule[-1]
+        return (last_point[1], last_point[2], last_point[3])
+    t_start, x_start, y_start, z_start = schedule[i]
+    t_end, x_end, y_end, z_end = schedule[i + 1]
+    frac = (t - t_start) / (t_end - t_start)
+    return (x_start + frac * (x_end - x_start),
+            y_start + frac * (y_end - y_start),
+            z_start + frac * (z_end - z_start))
+
+def interpolate_many(times, columns, query_times):
+    """
+    Batch interpolation: positions at every time in `query_times`.
+    Returns an array of shape (len(query_times), len(columns)).
+    """
+    times = np.asarray(times, dtype=float)
+    query_times = np.asarray(query_times, dtype=float)
+    n = len(times)
+    idx = np.clip(np.searchsorted(times, query_times, side='right') - 1, 0, max(n - 2, 0))
+    if n > 1:
+        span = times[idx + 1] - times[idx]
+        safe_span = np.where(span > 0, span, 1.0)
+        frac = np.clip(np.where(span > 0, (query_times - times[idx]) / safe_span, 1.0), 0.0, 1.0)
+    else:
+        frac = np.zeros_like(query_times)
+    out = np.empty((len(query_times), len(columns)))
+    for k, col in enumerate(columns):
+        col = np.asarray(col, dtype=float)
+        nxt = col[np.minimum(idx + 1, n - 1)]
+        out[:, k] = col[idx] + frac * (nxt - col[idx])
+    return out
+
+class ScheduleCursor:
+    """
+    Stateful interpolator for monotonically increasing query times.
+    Each query advances from the previous segment, so a sweep over a schedule costs
+    amortized O(1) per query. Queries that go back in time fall back to bisection.
+    """
+
+    def __init__(self, times, columns):
+        self.times = times
+        self.columns = columns
+        self._index = -1
+
+    @classmethod
+    def from_schedule(cls, schedule):
+        """Builds a cursor over a Schedule or a list of (t, x, y, z) waypoints."""
+        times, points = schedule_arrays(schedule)
+        return cls(times.tolist(), [points[:, k].tolist() for k in range(3)])
+
+    def position_at(self, t):
+        times = self.times
+        i = self._index
+        if i >= 0 and t < times[i]:
+            i = find_segment(times, t)
+        else:
+            n = len(times)
+            while i + 1 < n and times[i + 1] <= t:
+                i += 1
+        self._index = i
+        return _lerp(times, self.columns, i, t)
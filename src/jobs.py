@@ -0,0 +1,181 @@
+# jobs.py
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import run_scenario, PipelineCancelled
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+class Job:
+    """One scheduler run: its scenario, isolated workspace, state and result."""
+
+    def __init__(self, scenario, workspace, options=None, listener=None, task=None):
+        self.id = uuid.uuid4().hex
+        self.scenario = scenario
+        self.options = options or {}
+        self.listener = listener  # listener(kind, data) for progress events; ('finished', {...}) comes last
+        self.task = task          # task(cancel_event) run instead of the pipeline; returns the result
+        self.workspace = os.path.join(workspace, self.id)
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.invalid_input = False  # True when the scenario itself could not be parsed
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.future = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+class JobManager:
+    """
+    Runs scheduler jobs on a bounded thread pool.
+    Every job gets its own workspace directory (input.txt/output.txt), so concurrent
+    clients never share files. Other work (e.g. on a planning session) can be submitted
+    as a task and shares the pool. Submissions beyond `max_workers + max_queue` pending
+    jobs are refused with QueueFullError (backpressure). Queued jobs can be cancelled
+    immediately; running jobs stop at the next pipeline stage boundary.
+    `build_result(run_result, job)` turns a pipeline result into the stored job result.
+    """
+
+    def __init__(self, workspace_root, build_result, max_workers=4, max_queue=16, max_finished=256):
+        self.workspace_root = workspace_root
+        self.build_result = build_result
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scheduler-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(workspace_root, exist_ok=True)
+
+    def stats(self):
+        with self._lock:
+            states = [job.status for job in self._jobs.values()]
+        return {
+            'queued': states.count(QUEUED),
+            'running': states.count(RUNNING),
+            'finished': sum(states.count(state) for state in FINISHED_STATES),
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+        }
+
+    def submit(self, scenario, options=None, listener=None):
+        """
+        Queues a scenario and returns its Job; raises QueueFullError when saturated.
+        `listener(kind, data)` receives the run's progress events (see Recorder).
+        """
+        return self._submit(Job(scenario, self.workspace_root, options, listener))
+
+    def submit_task(self, task):
+        """
+        Queues `task(cancel_event)` and returns its Job, whose result is what the task returns;
+        raises QueueFullError when saturated. The task should raise PipelineCancelled once
+        the event is set, and ValueError for invalid input.
+        """
+        return self._submit(Job(None, self.workspace_root, task=task))
+
+    def _submit(self, job):
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status in (QUEUED, RUNNING))
+            if pending >= self.max_workers + self.max_queue:
+                raise QueueFullError(f"Scheduler queue is full ({pending} pending jobs)")
+            self._jobs[job.id] = job
+            self._evict_finished()
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def submit_completed(self, scenario, result, options=None):
+        """Registers an already finished job (e.g. a cache hit) so clients can poll it like any other."""
+        job = Job(scenario, self.workspace_root, options)
+        job.result = result
+        job.started_at = job.submitted_at
+        self._finish(job, DONE)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict_finished()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancels a job; returns the Job, or None if it does not exist."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED, error='Cancelled before start')
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """Blocks until the job finishes; returns False on timeout."""
+        job = self.get(job_id)
+        return job is not None and job.done_event.wait(timeout)
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED, error='Cancelled before start')
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            if job.task is not None:
+                job.result = job.task(job.cancel_event)
+            else:
+                os.makedirs(job.workspace, exist_ok=True)
+                with open(os.path.join(job.workspace, 'input.txt'), 'w') as f:
+                    f.write(job.scenario)
+                run_result = run_scenario(job.scenario, cancel_event=job.cancel_event, listener=job.listener,
+                                          **job.options)
+                job.result = self.build_result(run_result, job)
+            self._finish(job, DONE)
+        except PipelineCancelled:
+            self._finish(job, CANCELLED, error='Cancelled while running')
+        except ValueError as e:
+            job.invalid_input = True
+            self._finish(job, FAILED, error=str(e))
+        except Exception as e:
+            print(traceback.format_exc())
+            self._finish(job, FAILED, error=f'Failed to run scheduler: {str(e)}')
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.done_event.set()
+        if job.listener is not None:
+            job.listener('finished', {'status': status, 'error': error})
+
+    def _evict_finished(self):
+        """Drops the oldest finished jobs (and their workspaces) beyond `max_finished`. Caller holds the lock."""
+        finished = [job for job in self._jobs.values() if job.status in FINISHED_STATES]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+            shutil.rmtree(job.workspace, ignore_errors=True)
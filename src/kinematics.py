@@ -1,45 +1,272 @@
 # kinematics.py
 import math
+import threading
+from collections import OrderedDict
 import numpy as np
+from instrumentation import count
+
+# Arm model for inverse kinematics. Only the position of the tool matters for pick and place,
+# so the first three joints place it and the wrist (joints 4-6) is kept at its neutral pose:
+#   joint 1: rotation about the vertical axis through the base (yaw)
+#   joint 2: shoulder pitch, 0 = upper arm pointing straight up
+#   joint 3: elbow pitch, 0 = forearm in line with the upper arm
+# The upper arm and the forearm (including the tool) are each half of the robot's
+# `max_reach`, the length of the fully extended arm.
+# Joint limits are the [min, max] columns (degrees) of the joint rows of the input file.
+
+DEFAULT_MAX_REACH = 2.2  # meters
+DEFAULT_JOINT_PARAMS = [  # [min, max, v_max, a_max] per joint, as in the example input
+    [-170.0, 170.0, 100.0, 500.0],
+    [-120.0, 120.0, 90.0, 450.0],
+    [-170.0, 170.0, 100.0, 500.0],
+    [-120.0, 120.0, 90.0, 450.0],
+    [-270.0, 270.0, 180.0, 720.0],
+    [-270.0, 270.0, 180.0, 720.0],
+]
+IK_TOLERANCE = 1e-3   # meters between the reached and the target position
+IK_MAX_ITERATIONS = 100
+IK_DAMPING = 0.02     # damped least squares lambda (meters)
+
+class IKCache:
+    """
+    LRU cache of IK solutions used as warm starts. Keys are the arm (its joint limits and
+    reach) and the exact target relative to the robot base, so repeated pick/place points
+    share entries across stages, robots on the same base and scenarios. A solution is never
+    used for a neighboring target and failures are not stored, so whether a target is
+    reached does not depend on what was asked before.
+    """
+
+    def __init__(self, max_entries=65536):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> joint angles (radians) of joints 1-3
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def keys(self, arm, targets):
+        """Cache keys of an (M x 3) array of targets relative to the base."""
+        targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+        return [(arm, target) for target in map(tuple, targets.tolist())]
+
+    def lookup(self, keys):
+        """Warm starts for `keys`: (M x 3) angles and a mask of the keys that were found."""
+        angles = np.zeros((len(keys), 3))
+        found = np.zeros(len(keys), dtype=bool)
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    angles[i] = entry
+                    found[i] = True
+            self.hits += int(found.sum())
+            self.misses += len(keys) - int(found.sum())
+        return angles, found
+
+    def store(self, keys, angles):
+        with self._lock:
+            for key, q in zip(keys, angles):
+                self._entries[key] = q
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+# Shared by all robots and scenarios of the process
+ik_cache = IKCache()
+
+def _arm(robot_config):
+    """(hashable arm key, link lengths, joint limits in radians as a 6 x 2 array) of a robot."""
+    reach = robot_config.get('max_reach', DEFAULT_MAX_REACH)
+    params = robot_config.get('joint_params') or DEFAULT_JOINT_PARAMS
+    limits = np.radians(np.array([row[:2] for row in params], dtype=float))
+    key = (float(reach),) + tuple(limits.ravel().tolist())
+    return key, (reach / 2.0, reach / 2.0), limits
+
+def _base(robot_config):
+    return np.array([robot_config['base_x'], robot_config['base_y'], robot_config['base_z']], dtype=float)
+
+def _arm_positions(q, links):
+    """Tool positions relative to the base for (M x 3) angles of joints 1-3 (radians)."""
+    upper, fore = links
+    shoulder = q[:, 1]
+    elbow = q[:, 1] + q[:, 2]
+    radial = upper * np.sin(shoulder) + fore * np.sin(elbow)
+    height = upper * np.cos(shoulder) + fore * np.cos(elbow)
+    return np.column_stack((radial * np.cos(q[:, 0]), radial * np.sin(q[:, 0]), height))
+
+def _arm_jacobians(q, links):
+    """(M x 3 x 3) position Jacobians of joints 1-3."""
+    upper, fore = links
+    yaw = q[:, 0]
+    shoulder = q[:, 1]
+    elbow = q[:, 1] + q[:, 2]
+    radial = upper * np.sin(shoulder) + fore * np.sin(elbow)
+    d_radial = np.column_stack((upper * np.cos(shoulder) + fore * np.cos(elbow), fore * np.cos(elbow)))
+    d_height = np.column_stack((-radial, -fore * np.sin(elbow)))
+    cos_yaw = np.cos(yaw)[:, None]
+    sin_yaw = np.sin(yaw)[:, None]
+    jacobian = np.zeros((len(q), 3, 3))
+    jacobian[:, 0, 0] = -radial * np.sin(yaw)
+    jacobian[:, 1, 0] = radial * np.cos(yaw)
+    jacobian[:, 0, 1:] = cos_yaw * d_radial
+    jacobian[:, 1, 1:] = sin_yaw * d_radial
+    jacobian[:, 2, 1:] = d_height
+    return jacobian
+
+def _seeds(targets, links):
+    """
+    Initial guesses for cold targets: the four configurations of the position chain
+    (facing the target or reaching over the back, elbow either way) from the two-link
+    law of cosines, ignoring the joint limits. Yields (M x 3) angle arrays.
+    """
+    upper, fore = links
+    face = np.arctan2(targets[:, 1], targets[:, 0])
+    radial = np.hypot(targets[:, 0], targets[:, 1])
+    height = targets[:, 2]
+    cos_elbow = np.clip((radial ** 2 + height ** 2 - upper ** 2 - fore ** 2) / (2 * upper * fore), -1.0, 1.0)
+    for yaw, signed_radial in ((face, radial), ((face + 2 * math.pi) % (2 * math.pi) - math.pi, -radial)):
+        direction = np.arctan2(signed_radial, height)  # from the vertical
+        for sign in (1.0, -1.0):
+            elbow = sign * np.arccos(cos_elbow)
+            shoulder = direction - np.arctan2(fore * np.sin(elbow), upper + fore * np.cos(elbow))
+            shoulder = (shoulder + math.pi) % (2 * math.pi) - math.pi
+            yield np.column_stack((yaw, shoulder, elbow))
+
+def _damped_least_squares(q, targets, links, limits, tolerance, max_iterations):
+    """
+    Iterates all (M x 3) guesses towards their targets at once, clamping to the joint limits.
+    Returns (angles, position errors).
+    """
+    low, high = limits[:3, 0], limits[:3, 1]
+    q = np.clip(q, low, high)
+    identity = np.eye(3)
+    active = np.arange(len(q))
+    error = np.linalg.norm(targets - _arm_positions(q, links), axis=1)
+    for _ in range(max_iterations):
+        active = active[error[active] > tolerance]
+        if not len(active):
+            break
+        qa = q[active]
+        residual = targets[active] - _arm_positions(qa, links)
+        jacobian = _arm_jacobians(qa, links)
+        jjt = jacobian @ jacobian.transpose(0, 2, 1) + IK_DAMPING ** 2 * identity
+        step = np.einsum('mji,mj->mi', jacobian, np.linalg.solve(jjt, residual[:, :, None])[:, :, 0])
+        q[active] = np.clip(qa + step, low, high)
+        error[active] = np.linalg.norm(targets[active] - _arm_positions(q[active], links), axis=1)
+    return q, error
+
+def solve_ik(robot_config, targets, cache=ik_cache, tolerance=IK_TOLERANCE, max_iterations=IK_MAX_ITERATIONS):
+    """
+    Batched numerical inverse kinematics (damped least squares within the joint limits).
+    `targets` is an (M x 3) array of tool positions in world coordinates.
+    Returns (angles, reached): (M x 6) joint angles in degrees and a boolean mask of the
+    targets the tool gets within `tolerance` of. Cached solutions are used as warm starts;
+    the other targets, and those the warm start does not bring within tolerance, start from
+    each elbow configuration of the arm before they are declared unreachable (which is not
+    cached, so the answer does not depend on earlier queries).
+    """
+    key, links, limits = _arm(robot_config)
+    targets = np.asarray(targets, dtype=float).reshape(-1, 3) - _base(robot_config)
+    num_targets = len(targets)
+    angles = np.zeros((num_targets, 3))
+    error = np.full(num_targets, np.inf)
+
+    # Beyond the fully extended arm nothing can help
+    candidates = np.flatnonzero(np.linalg.norm(targets, axis=1) <= sum(links) + tolerance)
+    keys = cache.keys(key, targets[candidates]) if cache is not None else []
+    if keys:
+        warm, found = cache.lookup(keys)
+        hit = candidates[found]
+        angles[hit], error[hit] = _damped_least_squares(warm[found], targets[hit], links, limits,
+                                                        tolerance, max_iterations)
+
+    for seed in _seeds(targets, links):
+        pending = candidates[error[candidates] > tolerance]
+        if not len(pending):
+            break
+        q, err = _damped_least_squares(seed[pending], targets[pending], links, limits, tolerance, max_iterations)
+        better = err < error[pending]
+        angles[pending[better]] = q[better]
+        error[pending[better]] = err[better]
+
+    reached = error <= tolerance
+    if keys:
+        solved = reached[candidates]
+        cache.store([key for key, ok in zip(keys, solved.tolist()) if ok], angles[candidates[solved]])
+    count('ik_targets', num_targets)
+    count('ik_unreachable', int(num_targets - reached.sum()))
+
+    # Wrist joints stay at their neutral pose (or the nearest limit)
+    wrist = np.clip(0.0, limits[3:, 0], limits[3:, 1])
+    full = np.column_stack((angles, np.tile(wrist, (num_targets, 1))))
+    return np.degrees(full), reached
+
+def ik_configurations(robot_config, targets, tolerance=IK_TOLERANCE):
+    """
+    Every exact solution (facing the target or reaching over the back, elbow either way) for
+    an (M x 3) array of world tool positions, from the law of cosines; not cached.
+    Returns (angles, reached): (4 x M x 6) joint angles in degrees and a (4 x M) boolean mask
+    of the solutions within the joint limits that put the tool within `tolerance`.
+    """
+    _, links, limits = _arm(robot_config)
+    targets = np.asarray(targets, dtype=float).reshape(-1, 3) - _base(robot_config)
+    angles = np.array(list(_seeds(targets, links))).reshape(-1, len(targets), 3)
+    within = ((angles >= limits[:3, 0]) & (angles <= limits[:3, 1])).all(axis=2)
+    error = np.linalg.norm(_arm_positions(angles.reshape(-1, 3), links).reshape(angles.shape) - targets, axis=2)
+    wrist = np.clip(0.0, limits[3:, 0], limits[3:, 1])
+    full = np.concatenate((angles, np.broadcast_to(wrist, angles.shape[:2] + (3,))), axis=2)
+    return np.degrees(full), within & (error <= tolerance)
+
+def forward_kinematics(robot_config, angles):
+    """World tool positions (M x 3) for (M x 6) joint angles in degrees (inverse of solve_ik)."""
+    _, links, _ = _arm(robot_config)
+    q = np.radians(np.asarray(angles, dtype=float).reshape(-1, 6))[:, :3]
+    return _arm_positions(q, links) + _base(robot_config)
 
 def is_point_reachable(robot_config, point_x, point_y, point_z):
     """
     Checks if a point (x, y, z) is within the achievable workspace of a robot.
-    Simplified model: Checks if the point is between the min and max reach.
     Args:
-        robot_config: A dictionary containing the robot's base position and joint limits.
-                     We assume it has 'base_x', 'base_y', 'base_z', and a 'max_reach' key.
+        robot_config: A dictionary containing the robot's base position, its 'max_reach'
+                     (fully extended arm) and 'joint_params' (joint limits).
         point_x, point_y, point_z: Target point coordinates.
     Returns:
-        bool: True if the point is likely reachable, False otherwise.
-    """
-    # Calculate distance from robot base to target point
-    distance_to_point = math.sqrt(
-        (point_x - robot_config['base_x'])**2 +
-        (point_y - robot_config['base_y'])**2 +
-        (point_z - robot_config['base_z'])**2
-    )
-    
-    # Define a reasonable max and min reach for a 6-axis arm.
-    # max_reach = sum of link lengths (you might need to estimate this from joint limits)
-    # min_reach = minimum working distance (often ~0)
-    # For a hackathon, we can hardcode these or calculate from provided data.
-    # Let's assume robot_config has a 'max_reach' attribute. We need to add this in input_parser.
-    max_reach = robot_config.get('max_reach', 1.5)  # meters, example value
-    min_reach = robot_config.get('min_reach', 0.2)  # meters, can't reach too close
-    
-    return min_reach <= distance_to_point <= max_reach
-
-# --- BONUS: A more advanced, placeholder IK function ---
-# This is where you would use `scipy.optimize` if you have time.
+        bool: True if inverse kinematics finds joint angles within the limits that reach it.
+    """
+    return bool(points_reachable(robot_config, [(point_x, point_y, point_z)])[0])
+
+def points_reachable(robot_config, points):
+    """Vectorized is_point_reachable for one robot over an (M x 3) array of points."""
+    return solve_ik(robot_config, points)[1]
+
+def reachability_matrix(robots, picks, places):
+    """
+    Batch reachability of operations: picks and places are (N x 3) arrays of the operations'
+    pick and place points. Returns a K x N boolean matrix, True where robot k can reach
+    both points of operation j (one batched IK solve per robot).
+    """
+    picks = np.asarray(picks, dtype=float).reshape(-1, 3)
+    places = np.asarray(places, dtype=float).reshape(-1, 3)
+    matrix = np.zeros((len(robots), len(picks)), dtype=bool)
+    for k, robot in enumerate(robots):
+        reached = points_reachable(robot, np.vstack((picks, places)))
+        matrix[k] = reached[:len(picks)] & reached[len(picks):]
+    return matrix
+
 def calculate_ik(robot_config, target_x, target_y, target_z):
     """
-    Placeholder for a real Inverse Kinematics solver.
-    This would use optimization to find joint angles to reach the target.
-    For now, it just returns a dummy success flag and joint angles.
+    Inverse kinematics for a single target.
+    Returns (success, [six joint angles in degrees]).
     """
-    # This is a complex function. For the hackathon, you can initially
-    # just return (True, [0,0,0,0,0,0]) and focus on other parts.
-    # Implement this only if you have extra time.
-    print(f"WARNING: Using placeholder IK for target ({target_x}, {target_y}, {target_z})")
-    return True, [0.0, 0.0, 0.0, 0.0, 0.0, 0.0] # Dummy angles
\ No newline at end of file
+    angles, reached = solve_ik(robot_config, [(target_x, target_y, target_z)])
+    return bool(reached[0]), angles[0].tolist()
@@ -1,44 +1,77 @@
 # main.py
-from input_parser import parse_input
-from scheduler import assign_operations, plan_paths
-from collision_checker import check_collisions, prevent_collisions_by_staggered_start
+from pipeline import run_scenario
 from output_generator import write_output
+from motion import OUTPUT_TOLERANCE
+from instrumentation import Recorder, use, info, stage
+import argparse
+import json
 import sys
 import os
 
-def main(input_filename):
-    print("Parsing input...")
-    robots, operations, tool_clearance, safe_dist, v_max_linear, a_max = parse_input(input_filename)
+def main(input_filename, log_level='info', assignment='balanced', sequencing=True, sequencing_budget=0.05,
+         output_format='text', output_tolerance=OUTPUT_TOLERANCE, plan_workers=1, timing='cartesian'):
+    """
+    Runs the full pipeline on `input_filename` and writes the output schedule, sampling the
+    trajectories within `output_tolerance` meters.
+    Returns the instrumentation report: per-stage wall time, counters and recorded values.
+    """
+    recorder = Recorder(log_level)
+    result = run_scenario(input_filename, is_filename=True, recorder=recorder, assignment=assignment,
+                          sequencing=sequencing, sequencing_budget=sequencing_budget,
+                          plan_workers=plan_workers, timing=timing)
 
-    print("Assigning operations to robots...")
-    assign_operations(robots, operations)
+    with use(recorder):
+        info("Writing output file...")
+        # Determine the correct output path
+        if input_filename.startswith('data/'):
+            output_file_path = input_filename.replace('input.txt', 'output.txt')
+        else:
+            # Get the project root directory (one level up from src/)
+            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+            output_file_path = os.path.join(project_root, 'data', 'output.txt')
+        if output_format == 'binary':
+            output_file_path = os.path.splitext(output_file_path)[0] + '.bin'
 
-    print("Planning paths and calculating timings...")
-    plan_paths(robots, v_max_linear, a_max)
+        with stage('write_output'):
+            write_output(result['robots'], output_file_path, binary=output_format == 'binary',
+                         tolerance=output_tolerance)
 
-    print("Checking for collisions...")
-    collisions = check_collisions(robots, tool_clearance, safe_dist)
-    print("Applying proactive collision prevention...")
-    # Make sure to pass v_max_linear to the function!
-    prevent_collisions_by_staggered_start(robots, tool_clearance, safe_dist, v_max_linear)
+        info("Done!")
 
-    print("Writing output file...")
-    # Determine the correct output path
-    if input_filename.startswith('data/'):
-        output_file_path = input_filename.replace('input.txt', 'output.txt')
-    else:
-        # Get the project root directory (one level up from src/)
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        output_file_path = os.path.join(project_root, 'data', 'output.txt')
-    
-    write_output(robots, output_file_path)  # You'll need to modify write_output to accept a path
-
-    print("Done!")
+    return recorder.report()
 
 if __name__ == "__main__":
-    # Allow running from command line with a filename argument
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    else:
-        input_file = 'data/input.txt'  # default
-    main(input_file)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Robot scheduler')
+    parser.add_argument('input_file', nargs='?', default='data/input.txt')  # default
+    parser.add_argument('--quiet', action='store_true', help='print nothing but the metrics (if requested)')
+    parser.add_argument('--verbose', action='store_true', help='print DEBUG output from every stage')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help="dump stage timings and counters as JSON ('-' for stdout)")
+    parser.add_argument('--assignment', choices=['balanced', 'greedy'], default='balanced',
+                        help='operation assignment: load-balanced (default) or nearest-base greedy')
+    parser.add_argument('--no-sequencing', action='store_true',
+                        help='run each robot\'s operations in assignment order')
+    parser.add_argument('--sequencing-budget', type=float, default=0.05, metavar='SECONDS',
+                        help='local search time budget per robot (default 0.05)')
+    parser.add_argument('--output-format', choices=['text', 'binary'], default='text',
+                        help='text output.txt (default) or memory-mappable binary output.bin')
+    parser.add_argument('--output-tolerance', type=float, default=OUTPUT_TOLERANCE, metavar='METERS',
+                        help=f'maximum deviation of the written waypoints from the exact motion (default {OUTPUT_TOLERANCE})')
+    parser.add_argument('--plan-workers', type=int, default=1, metavar='N',
+                        help='plan robot paths across N processes (0: one per CPU; default 1, in-process)')
+    parser.add_argument('--timing', choices=['cartesian', 'joint'], default='cartesian',
+                        help='move timing: Cartesian tool limits (default) or each joint\'s own limits, synchronized')
+    args = parser.parse_args()
+
+    level = 'quiet' if args.quiet else 'debug' if args.verbose else 'info'
+    report = main(args.input_file, log_level=level, assignment=args.assignment,
+                  sequencing=not args.no_sequencing, sequencing_budget=args.sequencing_budget,
+                  output_format=args.output_format, output_tolerance=args.output_tolerance,
+                  plan_workers=args.plan_workers, timing=args.timing)
+
+    if args.metrics_json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.metrics_json:
+        with open(args.metrics_json, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,191 @@
+# motion.py
+import math
+import numpy as np
+from schedule import Schedule
+
+# Analytic robot motion. A trajectory is a sequence of straight-line segments, each a
+# rest-to-rest trapezoidal (or triangular) velocity profile:
+#   accelerate at `accel` for t_acc, cruise at v_peak for t_cruise, decelerate for t_acc.
+# A dwell is a segment with start == end, v_peak = 0 and the dwell time as t_cruise.
+# Positions are exact at any time; waypoints are only produced by sampling with a chord
+# tolerance. Within an acceleration or deceleration phase the distance is quadratic in time,
+# so linear interpolation over a step h is off by at most accel * h^2 / 8; cruise phases are
+# linear and need no samples in between.
+
+# Default sampling tolerances in meters
+OUTPUT_TOLERANCE = 5e-3     # waypoints written to the output file
+COLLISION_TOLERANCE = 5e-4  # waypoints used by the collision checks (which add 2x this to the safety distance)
+
+def move_profiles(distance, v_max, a_max):
+    """
+    Rest-to-rest profiles of moves of `distance` meters (array or scalar); the single
+    timing model shared by the planner, the move time tables and the estimates.
+    Returns (t_acc, t_cruise, v_peak, duration) arrays.
+    """
+    distance = np.asarray(distance, dtype=float)
+    d_acc_dec = v_max * (v_max / a_max)  # distance needed to accelerate to v_max and back
+    triangle = distance < d_acc_dec      # not enough distance to reach v_max
+    t_acc = np.where(triangle, np.sqrt(distance / a_max), v_max / a_max)
+    t_cruise = np.where(triangle, 0.0, (distance - d_acc_dec) / v_max)
+    v_peak = np.where(triangle, a_max * t_acc, v_max)
+    return t_acc, t_cruise, v_peak, 2 * t_acc + t_cruise
+
+def _distance_along(tau, t_acc, t_cruise, v_peak, accel):
+    """Distance covered `tau` seconds into a segment (vectorized over segments)."""
+    tau_acc = np.minimum(tau, t_acc)
+    tau_cruise = np.clip(tau - t_acc, 0.0, t_cruise)
+    tau_dec = np.clip(tau - t_acc - t_cruise, 0.0, t_acc)
+    return (0.5 * accel * tau_acc ** 2 + v_peak * tau_cruise
+            + v_peak * tau_dec - 0.5 * accel * tau_dec ** 2)
+
+class Trajectory:
+    """
+    Struct-of-arrays analytic trajectory: one row per segment (start time, start/end point,
+    profile). Memory grows with the number of moves and dwells, not with a sampling rate.
+    Before its first segment the robot holds `origin` (its base), after the last one the
+    end point of the last segment.
+    """
+
+    def __init__(self, origin, t0=(), start=(), end=(), t_acc=(), t_cruise=(), v_peak=(), accel=()):
+        self.origin = np.asarray(origin, dtype=float).reshape(3)
+        self.t0 = np.asarray(t0, dtype=float).reshape(-1)
+        self.start = np.asarray(start, dtype=float).reshape(-1, 3)
+        self.end = np.asarray(end, dtype=float).reshape(-1, 3)
+        self.t_acc = np.asarray(t_acc, dtype=float).reshape(-1)
+        self.t_cruise = np.asarray(t_cruise, dtype=float).reshape(-1)
+        self.v_peak = np.asarray(v_peak, dtype=float).reshape(-1)
+        self.accel = np.asarray(accel, dtype=float).reshape(-1)
+        self.length = np.linalg.norm(self.end - self.start, axis=1)
+
+    @classmethod
+    def from_segments(cls, origin, segments):
+        """Builds a trajectory from (t0, start, end, t_acc, t_cruise, v_peak, accel) tuples."""
+        if not segments:
+            return cls(origin)
+        t0, start, end, t_acc, t_cruise, v_peak, accel = zip(*segments)
+        return cls(origin, t0, start, end, t_acc, t_cruise, v_peak, accel)
+
+    @classmethod
+    def from_array(cls, origin, array):
+        """Inverse of to_array()."""
+        array = np.asarray(array, dtype=float).reshape(-1, 11)
+        return cls(origin, array[:, 0], array[:, 1:4], array[:, 4:7], array[:, 7], array[:, 8],
+                   array[:, 9], array[:, 10])
+
+    def to_array(self):
+        """
+        All segments as one (n x 11) float array with the columns
+        t0, start xyz, end xyz, t_acc, t_cruise, v_peak, accel.
+        """
+        array = np.zeros((len(self.t0), 11))
+        array[:, 0] = self.t0
+        array[:, 1:4] = self.start
+        array[:, 4:7] = self.end
+        array[:, 7] = self.t_acc
+        array[:, 8] = self.t_cruise
+        array[:, 9] = self.v_peak
+        array[:, 10] = self.accel
+        return array
+
+    @property
+    def duration(self):
+        return 2 * self.t_acc + self.t_cruise
+
+    @property
+    def makespan(self):
+        return float(self.t0[-1] + self.duration[-1]) if len(self.t0) else 0.0
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.t0, self.start, self.end, self.t_acc, self.t_cruise,
+                                      self.v_peak, self.accel, self.length))
+
+    def __len__(self):
+        return len(self.t0)
+
+    def __repr__(self):
+        return f"Trajectory({len(self)} segments, makespan={self.makespan:.6f}s)"
+
+    def positions_at(self, times):
+        """Exact (len(times) x 3) positions at the given times."""
+        times = np.asarray(times, dtype=float).reshape(-1)
+        if not len(self.t0):
+            return np.tile(self.origin, (len(times), 1))
+        k = np.clip(np.searchsorted(self.t0, times, side='right') - 1, 0, len(self.t0) - 1)
+        tau = np.clip(times - self.t0[k], 0.0, self.duration[k])
+        distance = _distance_along(tau, self.t_acc[k], self.t_cruise[k], self.v_peak[k], self.accel[k])
+        length = self.length[k]
+        frac = np.clip(np.divide(distance, length, out=np.zeros_like(distance), where=length > 0), 0.0, 1.0)
+        return self.start[k] + frac[:, None] * (self.end[k] - self.start[k])
+
+    def position_at(self, t):
+        x, y, z = self.positions_at([t])[0]
+        return (float(x), float(y), float(z))
+
+    def sample(self, tolerance=OUTPUT_TOLERANCE):
+        """
+        Waypoint Schedule whose linear interpolation stays within `tolerance` meters of the
+        exact trajectory: every segment boundary plus evenly spaced points inside each
+        acceleration/deceleration phase, including the phase ends (h <= sqrt(8 * tolerance / accel)).
+        """
+        if not len(self.t0):
+            return Schedule([0.0], [self.origin], capacity=1)
+        end_times = self.t0 + self.duration
+
+        # Points of the accel (and mirrored decel) phase of every move, up to and including
+        # the phase end where the profile switches to cruising (or to decelerating)
+        curved = (self.accel > 0) & (self.t_acc > 0)
+        steps = np.zeros(len(self.t0), dtype=int)
+        steps[curved] = np.ceil(self.t_acc[curved] / np.sqrt(8 * tolerance / self.accel[curved])).astype(int)
+        seg = np.repeat(np.arange(len(self.t0)), steps)
+        i = np.arange(len(seg)) - np.repeat(np.cumsum(steps) - steps, steps) + 1
+        offset = self.t_acc[seg] * i / steps[seg]
+        accel_times = self.t0[seg] + offset
+        decel_times = end_times[seg] - offset
+
+        times = np.unique(np.concatenate(([0.0], self.t0, end_times, accel_times, decel_times)))
+        return Schedule(times, self.positions_at(times), capacity=len(times))
+
+    def shift(self, dt):
+        """Shifts every segment by `dt` seconds in place."""
+        self.t0 += dt
+
+    def insert_wait(self, time, duration):
+        """
+        Holds the robot for `duration` seconds at `time`, which must be a moment when it is at
+        rest (its start, or a segment boundary); every later segment is shifted.
+        """
+        if duration <= 0:
+            return
+        k = int(np.searchsorted(self.t0, time - 1e-9, side='left'))
+        position = self.positions_at([time])[0]
+        self.t0 = np.insert(self.t0, k, time)
+        self.t0[k + 1:] += duration
+        self.start = np.insert(self.start, k, position, axis=0)
+        self.end = np.insert(self.end, k, position, axis=0)
+        self.t_acc = np.insert(self.t_acc, k, 0.0)
+        self.t_cruise = np.insert(self.t_cruise, k, duration)
+        self.v_peak = np.insert(self.v_peak, k, 0.0)
+        self.accel = np.insert(self.accel, k, 0.0)
+        self.length = np.insert(self.length, k, 0.0)
+
+    def copy(self):
+        return Trajectory(self.origin.copy(), self.t0.copy(), self.start.copy(), self.end.copy(),
+                          self.t_acc.copy(), self.t_cruise.copy(), self.v_peak.copy(), self.accel.copy())
+
+    def to_json(self):
+        """Segments as JSON-friendly dicts."""
+        return [
+            {'t0': t0, 'start': start, 'end': end, 't_acc': t_acc, 't_cruise': t_cruise,
+             'v_peak': v_peak, 'accel': accel}
+            for t0, start, end, t_acc, t_cruise, v_peak, accel in zip(
+                self.t0.tolist(), self.start.tolist(), self.end.tolist(), self.t_acc.tolist(),
+                self.t_cruise.tolist(), self.v_peak.tolist(), self.accel.tolist())
+        ]
+
+def robot_schedule(robot, tolerance=OUTPUT_TOLERANCE):
+    """Waypoints of a robot: its trajectory sampled with `tolerance`, or its stored schedule."""
+    trajectory = robot.get('trajectory')
+    if trajectory is not None:
+        return trajectory.sample(tolerance)
+    return robot.get('schedule', [])
@@ -0,0 +1,94 @@
+# move_times.py
+from collections import OrderedDict
+import numpy as np
+from motion import move_profiles
+
+# Move times between the points of a scenario, computed once with NumPy from
+# motion.move_profiles(), the same trapezoidal profile the planner uses.
+# The base->pick (K x N) and pick->place (N) tables are dense. The place->pick table is
+# N x N, so it is computed lazily in square tiles and only `max_tiles` of them are kept.
+
+def move_time(distance, v_max, a_max):
+    """Move time for an array (or scalar) of distances: the duration of move_profiles()."""
+    return move_profiles(distance, v_max, a_max)[3]
+
+def pairwise_distances(a, b):
+    """Euclidean distances between the rows of a (M x 3) and b (N x 3) as an M x N array."""
+    diff = a[:, None, :] - b[None, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+
+def operation_points(operations):
+    """(picks, places, dwell) arrays of a list of operation dicts."""
+    data = np.array([[op['pick_x'], op['pick_y'], op['pick_z'],
+                      op['place_x'], op['place_y'], op['place_z'], op['t_i']] for op in operations],
+                    dtype=float).reshape(-1, 7)
+    return data[:, 0:3], data[:, 3:6], data[:, 6]
+
+class MoveTimeMatrix:
+    """
+    Move times of one scenario, indexed by robot position k and operation position j
+    in the lists it was built from.
+      base_to_pick[k, j]   base of robot k -> pick of operation j
+      pick_to_place[j]     pick -> place of operation j
+      operation_time[j]    pick dwell + pick->place + place dwell
+      place_to_pick(i, j)  place of operation i -> pick of operation j (tiled, cached)
+    """
+
+    def __init__(self, robots, operations, v_max, a_max, tile_size=512, max_tiles=64):
+        self.v_max = v_max
+        self.a_max = a_max
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.robot_index = {robot['id']: k for k, robot in enumerate(robots)}
+        self.op_index = {op['id']: j for j, op in enumerate(operations)}
+
+        self.bases = np.array([[r['base_x'], r['base_y'], r['base_z']] for r in robots], dtype=float).reshape(-1, 3)
+        self.picks, self.places, dwell = operation_points(operations)
+        self.base_to_pick = move_time(pairwise_distances(self.bases, self.picks), v_max, a_max)
+        self.pick_to_place = move_time(np.linalg.norm(self.places - self.picks, axis=1), v_max, a_max)
+        self.operation_time = self.pick_to_place + 2 * dwell
+        self._tiles = OrderedDict()  # (tile_row, tile_col) -> array, least recently used first
+
+    def __len__(self):
+        return len(self.picks)
+
+    @property
+    def nbytes(self):
+        """Memory held by the dense tables and the cached place->pick tiles."""
+        tiles = sum(tile.nbytes for tile in self._tiles.values())
+        return self.base_to_pick.nbytes + self.pick_to_place.nbytes + self.operation_time.nbytes + tiles
+
+    def _tile(self, row, col):
+        key = (row, col)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+        size = self.tile_size
+        tile = move_time(pairwise_distances(self.places[row * size:(row + 1) * size],
+                                            self.picks[col * size:(col + 1) * size]),
+                         self.v_max, self.a_max)
+        self._tiles[key] = tile
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def place_to_pick(self, i, j):
+        """Move time from the place point of operation i to the pick point of operation j."""
+        size = self.tile_size
+        return float(self._tile(i // size, j // size)[i % size, j % size])
+
+    def place_to_pick_submatrix(self, indices):
+        """len(indices) x len(indices) place->pick times among a subset of operations (computed directly)."""
+        indices = np.asarray(indices, dtype=int)
+        return move_time(pairwise_distances(self.places[indices], self.picks[indices]),
+                         self.v_max, self.a_max)
+
+    def route_time(self, k, indices):
+        """Completion time of robot k running operations `indices` in order, starting from its base."""
+        if len(indices) == 0:
+            return 0.0
+        indices = np.asarray(indices, dtype=int)
+        travel = move_time(np.linalg.norm(self.picks[indices[1:]] - self.places[indices[:-1]], axis=1),
+                           self.v_max, self.a_max)
+        return float(self.base_to_pick[k, indices[0]] + travel.sum() + self.operation_time[indices].sum())
@@ -1,30 +1,124 @@
 # output_generator.py
-def write_output(robots, output_file_path='output.txt'):
+import io
+import numpy as np
+from interpolation import schedule_arrays
+from motion import OUTPUT_TOLERANCE, robot_schedule
+
+# Binary schedule format (little-endian, all offsets in bytes from the start of the file):
+#   header      24 bytes   magic b'RSCHED\x00\x01', uint32 version, uint32 robot count K,
+#                          float64 makespan in ms
+#   robot table K x 32     char[16] robot id (NUL padded), uint64 offset of its first
+#                          record, uint64 record count
+#   records     n x 32     float64 t (ms), x, y, z for every waypoint, robot after robot
+# The values are the same as in the text format, but unrounded.
+BINARY_MAGIC = b'RSCHED\x00\x01'
+BINARY_VERSION = 1
+BINARY_HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('num_robots', '<u4'), ('makespan', '<f8')])
+BINARY_ROBOT = np.dtype([('id', 'S16'), ('offset', '<u8'), ('count', '<u8')])
+BINARY_RECORD = np.dtype('<f8')
+
+def write_output(robots, output_file_path='output.txt', binary=False, tolerance=OUTPUT_TOLERANCE):
     """
-    Write the schedule to an output file.
-    Supports robots having `schedule` as list of (t, x, y, z).
+    Write the schedule to an output file (text by default, or the binary format).
+    Robots with a `trajectory` are sampled within `tolerance` meters; robots with only a
+    `schedule` (a Schedule or a list of (t, x, y, z)) are written as they are.
     """
+    if binary:
+        write_output_binary(robots, output_file_path, tolerance)
+        return
     with open(output_file_path, 'w') as f:
-        makespan = 0.0
-
-        # --- compute makespan ---
-        for robot in robots:
-            waypoints = robot.get('schedule', [])
-            if waypoints:
-                last_time = waypoints[-1][0]  # tuple (t, x, y, z)
-                makespan = max(makespan, last_time)
-
-        # write makespan in milliseconds
-        f.write(f"{makespan * 1000:.6f}\n")
-
-        # --- write each robot’s schedule ---
-        for i, robot in enumerate(robots):
-            robot_id = i + 1
-            waypoints = robot.get('schedule', [])
-            f.write(f"R{robot_id} {len(waypoints)}\n")
-
-            for wp in waypoints:
-                if isinstance(wp, (tuple, list)) and len(wp) >= 4:
-                    time_ms = wp[0] * 1000
-                    x, y, z = wp[1], wp[2], wp[3]
-                    f.write(f"{time_ms:.6f} {x:.6f} {y:.6f} {z:.6f}\n")
+        write_output_stream(robots, f, tolerance)
+
+def format_output(robots, tolerance=OUTPUT_TOLERANCE):
+    """Returns the output file content as a string, without touching the disk."""
+    buffer = io.StringIO()
+    write_output_stream(robots, buffer, tolerance)
+    return buffer.getvalue()
+
+def output_makespan(schedules):
+    """Latest waypoint time over all schedules, in seconds."""
+    makespan = 0.0
+    for waypoints in schedules:
+        if len(waypoints):
+            last_time = waypoints[-1][0]  # (t, x, y, z)
+            makespan = max(makespan, last_time)
+    return makespan
+
+def write_output_stream(robots, f, tolerance=OUTPUT_TOLERANCE):
+    """Writes the output format to an open text stream."""
+    schedules = [robot_schedule(robot, tolerance) for robot in robots]
+    makespan = output_makespan(schedules)
+
+    # write makespan in milliseconds
+    f.write(f"{makespan * 1000:.6f}\n")
+
+    # --- write each robot’s schedule ---
+    for i, waypoints in enumerate(schedules):
+        robot_id = i + 1
+        f.write(f"R{robot_id} {len(waypoints)}\n")
+        if not len(waypoints):
+            continue
+
+        # Format the whole block at once: one "%.6f %.6f %.6f %.6f" row per waypoint
+        times, positions = schedule_arrays(waypoints)
+        block = np.column_stack((times * 1000, positions))
+        np.savetxt(f, block, fmt='%.6f', delimiter=' ')
+
+def write_output_binary(robots, output_file_path='output.bin', tolerance=OUTPUT_TOLERANCE):
+    """Writes the binary schedule format; robot ids are R1..RK like in the text format."""
+    schedules = [robot_schedule(robot, tolerance) for robot in robots]
+    header = np.zeros(1, dtype=BINARY_HEADER)
+    header['magic'] = BINARY_MAGIC
+    header['version'] = BINARY_VERSION
+    header['num_robots'] = len(robots)
+    header['makespan'] = output_makespan(schedules) * 1000
+
+    table = np.zeros(len(robots), dtype=BINARY_ROBOT)
+    offset = BINARY_HEADER.itemsize + len(robots) * BINARY_ROBOT.itemsize
+    blocks = []
+    for i, waypoints in enumerate(schedules):
+        times, positions = schedule_arrays(waypoints)
+        block = np.empty((len(times), 4), dtype=BINARY_RECORD)
+        block[:, 0] = times * 1000
+        block[:, 1:] = positions
+        table[i] = (f"R{i + 1}".encode(), offset, len(times))
+        offset += block.nbytes
+        blocks.append(block)
+
+    with open(output_file_path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(table.tobytes())
+        for block in blocks:
+            f.write(block.tobytes())
+
+def is_binary_output(output_file_path):
+    """True if the file starts with the binary schedule magic."""
+    with open(output_file_path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def read_output_binary(output_file_path):
+    """
+    Memory-maps a binary schedule file.
+    Returns (makespan_ms, {robot_id: waypoints}) where each waypoints array is a read-only
+    (n x 4) view of the file (columns t in ms, x, y, z); nothing is copied until used.
+    Raises ValueError if the file is not a valid binary schedule.
+    """
+    data = np.memmap(output_file_path, dtype=np.uint8, mode='r')
+    if len(data) < BINARY_HEADER.itemsize:
+        raise ValueError(f"{output_file_path} is too short for a binary schedule")
+    header = data[:BINARY_HEADER.itemsize].view(BINARY_HEADER)[0]
+    if header['magic'] != BINARY_MAGIC or header['version'] != BINARY_VERSION:
+        raise ValueError(f"{output_file_path} is not a binary schedule (version {BINARY_VERSION})")
+
+    table_end = BINARY_HEADER.itemsize + int(header['num_robots']) * BINARY_ROBOT.itemsize
+    if len(data) < table_end:
+        raise ValueError(f"{output_file_path} is truncated (robot table)")
+    table = data[BINARY_HEADER.itemsize:table_end].view(BINARY_ROBOT)
+
+    robots = {}
+    for robot_id, offset, count in table.tolist():
+        end = offset + count * 4 * BINARY_RECORD.itemsize
+        if end > len(data):
+            raise ValueError(f"{output_file_path} is truncated (records of {robot_id.decode()})")
+        robots[robot_id.decode()] = data[offset:end].view(BINARY_RECORD).reshape(count, 4)
+    return float(header['makespan']), robots
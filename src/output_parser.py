@@ -0,0 +1,90 @@
+# output_parser.py
+import numpy as np
+from output_generator import is_binary_output, read_output_binary
+
+# Shared reader for schedule files (text output.txt or the binary format).
+# The text is split once: only the robot header lines are visited in Python, all waypoint
+# lines are converted to floats in one bulk read and then split into per-robot blocks.
+
+class OutputFormatError(ValueError):
+    """Raised when a schedule file is malformed or truncated."""
+
+def _robot_header(line, line_number):
+    parts = line.split()
+    if len(parts) != 2 or not parts[0].startswith('R'):
+        raise OutputFormatError(f"line {line_number}: expected a robot header 'R<k> <waypoints>', got {line!r}")
+    try:
+        count = int(parts[1])
+    except ValueError:
+        raise OutputFormatError(f"line {line_number}: invalid waypoint count {parts[1]!r}")
+    if count < 0:
+        raise OutputFormatError(f"line {line_number}: negative waypoint count {count}")
+    return parts[0], count
+
+def parse_output_content(content):
+    """
+    Parses the text schedule format.
+    Returns {'makespan' (ms), 'num_robots', 'num_waypoints', 'robots'} where 'robots' maps
+    each robot id to an (n x 4) float array with columns t (ms), x, y, z.
+    Raises OutputFormatError on malformed or truncated content.
+    """
+    stripped = [line.strip() for line in content.split('\n')]
+    numbers = [number for number, line in enumerate(stripped, 1) if line]  # file line of each kept line
+    lines = [stripped[number - 1] for number in numbers]
+    if not lines:
+        raise OutputFormatError("output is empty")
+    try:
+        makespan = float(lines[0])
+    except ValueError:
+        raise OutputFormatError(f"line {numbers[0]}: invalid makespan {lines[0]!r}")
+
+    # Walk the headers only; each one says how many waypoint lines follow
+    headers = []
+    data_lines = []
+    index = 1
+    while index < len(lines):
+        robot_id, count = _robot_header(lines[index], numbers[index])
+        block = lines[index + 1:index + 1 + count]
+        if len(block) < count:
+            raise OutputFormatError(f"{robot_id} declares {count} waypoints but the output ends after {len(block)}")
+        headers.append((robot_id, count))
+        data_lines.extend(block)
+        index += 1 + count
+
+    try:
+        data = np.loadtxt(data_lines, dtype=float, ndmin=2, comments=None) if data_lines else np.empty((0, 4))
+    except ValueError as e:
+        raise OutputFormatError(f"invalid waypoint line: {e}")
+    if data.shape[1] != 4:
+        raise OutputFormatError(f"waypoint lines must have 4 columns (t, x, y, z), got {data.shape[1]}")
+
+    robots = {}
+    offset = 0
+    for robot_id, count in headers:
+        robots[robot_id] = data[offset:offset + count]
+        offset += count
+    return {
+        'makespan': makespan,
+        'num_robots': len(robots),
+        'num_waypoints': len(data),
+        'robots': robots,
+    }
+
+def parse_output_file(output_file_path):
+    """
+    Parses a schedule file, text or binary (detected from its first bytes); the binary
+    format is memory-mapped. Same return value and errors as parse_output_content().
+    """
+    if is_binary_output(output_file_path):
+        try:
+            makespan, robots = read_output_binary(output_file_path)
+        except ValueError as e:
+            raise OutputFormatError(str(e))
+        return {
+            'makespan': makespan,
+            'num_robots': len(robots),
+            'num_waypoints': sum(len(waypoints) for waypoints in robots.values()),
+            'robots': robots,
+        }
+    with open(output_file_path, 'r') as f:
+        return parse_output_content(f.read())
@@ -0,0 +1,131 @@
+# pipeline.py
+from input_parser import parse_input
+from scheduler import assign_operations, plan_paths
+from sequencer import sequence_all
+from move_times import MoveTimeMatrix
+from collision_checker import check_collisions, resolve_conflicts
+from interpolation import schedule_arrays
+from motion import robot_schedule
+from kinematics import reachability_matrix
+from instrumentation import Recorder, use, info, stage, count
+
+class PipelineCancelled(Exception):
+    """Raised at a stage boundary when the run's cancel event has been set."""
+
+def _checkpoint(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise PipelineCancelled()
+
+def run_pipeline(robots, operations, tool_clearance, safe_dist, v_max_linear, a_max, cancel_event=None,
+                 collision_mode='exact', assignment='balanced', sequencing=True, sequencing_budget=0.05,
+                 plan_workers=1, timing='cartesian'):
+    """
+    Runs every stage after parsing on already parsed scenario data.
+    Mutates `robots` in place (operations, schedule, makespan) and returns
+    (collisions, summary): the collisions found before collision prevention was applied
+    (format depends on `collision_mode`) and a dict with the 'assignment' (including the
+    ids of the 'unreachable' operations, which are left unassigned) and (when
+    `sequencing` is on) 'sequencing' makespan estimates and the 'conflict_resolution' report.
+    `plan_workers` > 1 (or 0 for one per CPU) plans the robots' paths across a process pool.
+    timing='joint' times the moves from the joints' own limits instead of the Cartesian model.
+    If `cancel_event` (a threading.Event) is set, PipelineCancelled is raised before the next stage
+    (or before the next conflict inside resolve_conflicts).
+    """
+    summary = {}
+    _checkpoint(cancel_event)
+    with stage('move_times'):
+        move_times = MoveTimeMatrix(robots, operations, v_max_linear, a_max)
+    with stage('reachability'):
+        reachable = reachability_matrix(robots, move_times.picks, move_times.places)
+
+    _checkpoint(cancel_event)
+    info("Assigning operations to robots...")
+    with stage('assign_operations'):
+        summary['assignment'] = assign_operations(robots, operations, v_max_linear, a_max, strategy=assignment,
+                                                  move_times=move_times, reachable=reachable)
+
+    if sequencing:
+        _checkpoint(cancel_event)
+        info("Sequencing operations per robot...")
+        with stage('sequence_operations'):
+            summary['sequencing'] = sequence_all(robots, v_max_linear, a_max, sequencing_budget, move_times)
+
+    _checkpoint(cancel_event)
+    info("Planning paths and calculating timings...")
+    with stage('plan_paths'):
+        plan_paths(robots, v_max_linear, a_max, plan_workers, timing)
+
+    _checkpoint(cancel_event)
+    info("Checking for collisions...")
+    with stage('check_collisions'):
+        collisions = check_collisions(robots, tool_clearance, safe_dist, mode=collision_mode, broadphase=True)
+    _checkpoint(cancel_event)
+    info("Resolving conflicts with minimal waits...")
+    with stage('resolve_conflicts'):
+        summary['conflict_resolution'] = resolve_conflicts(robots, tool_clearance, safe_dist, collisions,
+                                                           checkpoint=lambda: _checkpoint(cancel_event))
+
+    return collisions, summary
+
+def run_scenario(scenario, is_filename=False, log_level='quiet', recorder=None, cancel_event=None,
+                 collision_mode='exact', assignment='balanced', sequencing=True, sequencing_budget=0.05,
+                 plan_workers=1, timing='cartesian', listener=None):
+    """
+    In-process entry point: parses a scenario (text by default, or a file path) and runs
+    the whole pipeline without writing anything to disk.
+    `listener(kind, data)` receives the progress events of the run (see Recorder).
+    Returns a dict with the scheduled robots (each with its analytic Trajectory), the makespan in
+    seconds, the collision intervals and the instrumentation report.
+    Raises ValueError if the scenario cannot be parsed.
+    """
+    recorder = recorder or Recorder(log_level, listener)
+    with use(recorder):
+        info("Parsing input...")
+        with stage('parse_input'):
+            robots, operations, tool_clearance, safe_dist, v_max_linear, a_max = parse_input(
+                scenario, is_filename=is_filename)
+        count('robots', len(robots))
+        count('operations', len(operations))
+
+        collisions, summary = run_pipeline(
+            robots, operations, tool_clearance, safe_dist, v_max_linear, a_max,
+            cancel_event=cancel_event, collision_mode=collision_mode, assignment=assignment,
+            sequencing=sequencing, sequencing_budget=sequencing_budget, plan_workers=plan_workers,
+            timing=timing)
+
+        makespan = max((robot['makespan'] for robot in robots), default=0.0)
+        recorder.record('makespan', makespan)
+        recorder.record('collision_intervals', len(collisions))
+
+    return {
+        'robots': robots,
+        'operations': operations,
+        'makespan': makespan,
+        'collisions': collisions,
+        'assignment': summary['assignment'],
+        'sequencing': summary.get('sequencing'),
+        'conflict_resolution': summary['conflict_resolution'],
+        'tool_clearance': tool_clearance,
+        'safe_dist': safe_dist,
+        'report': recorder.report(),
+    }
+
+def robots_to_json(robots):
+    """
+    JSON-friendly view of scheduled robots: base, assigned operation ids, the sampled
+    waypoint columns and the exact trajectory segments.
+    """
+    robots_json = []
+    for robot in robots:
+        times, positions = schedule_arrays(robot_schedule(robot))
+        trajectory = robot.get('trajectory')
+        robots_json.append({
+            'id': robot['id'],
+            'base': [robot['base_x'], robot['base_y'], robot['base_z']],
+            'operations': [op['id'] for op in robot.get('operations', [])],
+            'makespan': robot.get('makespan', 0.0),
+            'times': times.tolist(),
+            'positions': positions.tolist(),
+            'segments': trajectory.to_json() if trajectory is not None else [],
+        })
+    return robots_json
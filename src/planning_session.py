@@ -0,0 +1,331 @@
+# planning_session.py
+import math
+import numpy as np
+from input_parser import parse_input
+from scheduler import assign_operations
+from sequencer import sequence_all
+from move_times import MoveTimeMatrix, operation_points, move_time
+from trajectory_planner import plan_trajectory_tails
+from collision_checker import broadphase_pairs, find_collision_intervals, resolve_conflicts
+from kinematics import points_reachable, reachability_matrix
+from motion import Trajectory, COLLISION_TOLERANCE
+from instrumentation import Recorder, use, info, warning, stage, count
+from pipeline import _checkpoint
+
+# Incremental re-planning. A session keeps a scenario's robots, their assignments,
+# trajectories and collision intervals in memory. A delta (operation added, removed or
+# changed) only re-plans the robots it touches, from the first changed operation on: the
+# trajectory before that operation is kept as it is. Collision intervals are stored per
+# robot pair and only re-checked for the pairs and the time window that changed.
+# The session holds the plan before conflict resolution; resolved() applies the waits to a copy.
+
+OPERATION_FIELDS = ('pick_x', 'pick_y', 'pick_z', 'place_x', 'place_y', 'place_z', 't_i')
+DELTA_ACTIONS = ('add', 'remove', 'update')
+
+class PlanningSession:
+    """
+    In-memory plan of one scenario that is updated by deltas instead of being re-run.
+    The first plan uses the same stages as run_pipeline() (without conflict resolution);
+    collisions are always found with the exact interval check. Like run_pipeline(), the
+    first plan raises PipelineCancelled before its next stage once `cancel_event` is set.
+    """
+
+    def __init__(self, robots, operations, tool_clearance, safe_dist, v_max_linear, a_max,
+                 assignment='balanced', sequencing=True, sequencing_budget=0.05, timing='cartesian',
+                 collision_mode='exact', log_level='quiet', recorder=None, cancel_event=None):
+        if collision_mode != 'exact':
+            raise ValueError("Planning sessions only support the exact collision check")
+        self.robots = robots
+        self.tool_clearance = tool_clearance
+        self.safe_dist = safe_dist
+        self.v_max = v_max_linear
+        self.a_max = a_max
+        self.timing = timing
+        self.recorder = recorder or Recorder(log_level)
+        self.operations = {op['id']: op for op in operations}
+        self.unassigned = {}        # id -> operation no robot can reach
+        self._owner = {}            # operation id -> robot index
+        self._finish = []           # per robot: finish time of each of its operations
+        self._schedules = []        # per robot: trajectory sampled for the collision check
+        self._intervals = {}        # (i, j) robot indices -> [(start, end, min_distance)]
+        # Trajectories are sampled within COLLISION_TOLERANCE, so the sampling error is added
+        self._min_safe_distance = 2 * tool_clearance + safe_dist + 2 * COLLISION_TOLERANCE
+
+        with use(self.recorder):
+            _checkpoint(cancel_event)
+            with stage('move_times'):
+                move_times = MoveTimeMatrix(robots, operations, v_max_linear, a_max)
+            with stage('reachability'):
+                reachable = reachability_matrix(robots, move_times.picks, move_times.places)
+            _checkpoint(cancel_event)
+            with stage('assign_operations'):
+                self.assignment = assign_operations(robots, operations, v_max_linear, a_max, strategy=assignment,
+                                                    move_times=move_times, reachable=reachable)
+            if sequencing:
+                _checkpoint(cancel_event)
+                with stage('sequence_operations'):
+                    sequence_all(robots, v_max_linear, a_max, sequencing_budget, move_times)
+            for op_id in self.assignment['unreachable']:
+                self.unassigned[op_id] = self.operations[op_id]
+            for k, robot in enumerate(robots):
+                self._owner.update((op['id'], k) for op in robot['operations'])
+            self._finish = [np.zeros(0) for _ in robots]
+            self._schedules = [None] * len(robots)
+            _checkpoint(cancel_event)
+            with stage('plan_paths'):
+                self._replan({k: 0 for k in range(len(robots))})
+            _checkpoint(cancel_event)
+            with stage('check_collisions'):
+                self._check_all()
+
+    @classmethod
+    def from_scenario(cls, scenario, is_filename=False, **options):
+        """Parses a scenario (text by default, or a file path) and plans it; raises ValueError if it cannot be parsed."""
+        robots, operations, tool_clearance, safe_dist, v_max_linear, a_max = parse_input(scenario, is_filename)
+        return cls(robots, operations, tool_clearance, safe_dist, v_max_linear, a_max, **options)
+
+    @property
+    def makespan(self):
+        return max((robot['makespan'] for robot in self.robots), default=0.0)
+
+    @property
+    def collisions(self):
+        """Collision intervals like check_collisions_exact(): (start, end, robot_i_id, robot_j_id, min_distance)."""
+        ids = [robot['id'] for robot in self.robots]
+        return sorted((start, end, ids[i], ids[j], min_distance)
+                      for (i, j), intervals in self._intervals.items()
+                      for start, end, min_distance in intervals)
+
+    def apply(self, deltas):
+        """
+        Applies a list of deltas, then re-plans and re-checks what they changed. A delta is one of
+            {'action': 'add', 'operation': {pick_x, pick_y, pick_z, place_x, place_y, place_z, t_i[, id]}}
+            {'action': 'remove', 'id': operation id}
+            {'action': 'update', 'id': operation id, <any of the operation fields>}
+        An added operation goes to the robot (and position in its sequence) that can reach it
+        and would finish earliest with it; an updated one stays where it is while its robot can
+        still reach it. Deltas are validated before anything changes (ValueError otherwise).
+        Returns {'replanned': {robot_id: first re-planned operation index}, 'added': [ids],
+        'pairs_rechecked', 'makespan'}.
+        """
+        deltas = self._validate(deltas)
+        with use(self.recorder):
+            dirty = {}
+            added = []
+            for action, op_id, fields in deltas:
+                if action == 'add':
+                    added.append(self._add(dict(fields, id=op_id), dirty))
+                elif action == 'remove':
+                    self._remove(op_id, dirty)
+                else:
+                    self._update(op_id, fields, dirty)
+            count('deltas_applied', len(deltas))
+
+            horizon = self.makespan
+            with stage('replan'):
+                changed = self._replan(dirty)
+            with stage('recheck_collisions'):
+                pairs = self._recheck(changed, horizon)
+            info(f"Applied {len(deltas)} deltas: re-planned {len(dirty)} robots, re-checked {pairs} pairs, "
+                 f"makespan {self.makespan:.3f}s")
+        return {
+            'replanned': {self.robots[k]['id']: index for k, index in sorted(dirty.items())},
+            'added': added,
+            'pairs_rechecked': pairs,
+            'makespan': self.makespan,
+        }
+
+    def resolved(self, cancel_event=None):
+        """
+        Copies of the robots with conflict resolution applied; the session keeps its unresolved plan.
+        Returns (robots, resolve_conflicts() report). Raises PipelineCancelled before the next
+        conflict once `cancel_event` is set.
+        """
+        robots = [dict(robot, operations=list(robot['operations']), trajectory=robot['trajectory'].copy())
+                  for robot in self.robots]
+        with use(self.recorder):
+            with stage('resolve_conflicts'):
+                report = resolve_conflicts(robots, self.tool_clearance, self.safe_dist, self.collisions,
+                                           checkpoint=lambda: _checkpoint(cancel_event))
+        return robots, report
+
+    def _validate(self, deltas):
+        """Deltas as (action, operation id, fields) tuples; raises ValueError on the first bad one."""
+        if not isinstance(deltas, list):
+            raise ValueError("Deltas must be a list")
+        known = set(self.operations)
+        next_id = max(known, default=0) + 1
+        validated = []
+        for n, delta in enumerate(deltas):
+            action = delta.get('action') if isinstance(delta, dict) else None
+            if action not in DELTA_ACTIONS:
+                raise ValueError(f"Delta {n}: unknown action {action!r}")
+            if action == 'add':
+                operation = delta.get('operation') or {}
+                if not isinstance(operation, dict):
+                    raise ValueError(f"Delta {n}: the new operation must be an object")
+                missing = [name for name in OPERATION_FIELDS if name not in operation]
+                if missing:
+                    raise ValueError(f"Delta {n}: the new operation has no {', '.join(missing)}")
+                op_id = _operation_id(operation.get('id', next_id), n)
+                if op_id in known:
+                    raise ValueError(f"Delta {n}: operation {op_id} already exists")
+                fields = _operation_fields(operation, n)
+            else:
+                op_id = _operation_id(delta.get('id'), n)
+                if op_id not in known:
+                    raise ValueError(f"Delta {n}: unknown operation {op_id!r}")
+                fields = _operation_fields(delta, n)
+            if action == 'remove':
+                known.discard(op_id)
+            else:
+                known.add(op_id)
+            next_id = max(next_id, op_id + 1)
+            validated.append((action, op_id, fields))
+        return validated
+
+    def _reaches(self, k, op):
+        return bool(points_reachable(self.robots[k], [(op['pick_x'], op['pick_y'], op['pick_z']),
+                                                      (op['place_x'], op['place_y'], op['place_z'])]).all())
+
+    def _cheapest_insertion(self, k, op):
+        """(estimated finish time, position) of inserting `op` into robot k's sequence where it adds the least travel."""
+        robot = self.robots[k]
+        picks, places, _ = operation_points(robot['operations'])
+        pick, place, dwell = (array[0] for array in operation_points([op]))
+        before = np.vstack(([robot['base_x'], robot['base_y'], robot['base_z']], places))
+
+        def travel(a, b):
+            return move_time(np.linalg.norm(a - b, axis=-1), self.v_max, self.a_max)
+
+        extra = travel(before, pick) + travel(pick, place) + 2 * dwell
+        extra[:-1] += travel(place, picks) - travel(before[:-1], picks)
+        position = int(np.argmin(extra))
+        return robot['makespan'] + float(extra[position]), position
+
+    def _add(self, op, dirty):
+        self.operations[op['id']] = op
+        candidates = [k for k in range(len(self.robots)) if self._reaches(k, op)]
+        if not candidates:
+            warning(f"WARNING: No robot can reach operation {op['id']}; it is left unassigned.")
+            self.unassigned[op['id']] = op
+            return op['id']
+        finish, position, k = min(self._cheapest_insertion(k, op) + (k,) for k in candidates)
+        self.robots[k]['operations'].insert(position, op)
+        self._owner[op['id']] = k
+        dirty[k] = min(dirty.get(k, position), position)
+        return op['id']
+
+    def _remove(self, op_id, dirty):
+        op = self.operations.pop(op_id)
+        if self.unassigned.pop(op_id, None) is not None:
+            return
+        k = self._owner.pop(op_id)
+        index = self.robots[k]['operations'].index(op)
+        del self.robots[k]['operations'][index]
+        dirty[k] = min(dirty.get(k, index), index)
+
+    def _update(self, op_id, fields, dirty):
+        op = self.operations[op_id]
+        k = self._owner.get(op_id)
+        if k is None or not self._reaches(k, dict(op, **fields)):
+            self._remove(op_id, dirty)
+            self._add(dict(op, **fields), dirty)
+            return
+        index = self.robots[k]['operations'].index(op)
+        op.update(fields)
+        dirty[k] = min(dirty.get(k, index), index)
+
+    def _replan(self, starts):
+        """
+        Re-plans robot k from its operation starts[k] on (keeping the trajectory before it).
+        Returns {k: time from which robot k's trajectory may have changed}.
+        """
+        ks = sorted(starts)
+        if not ks:
+            return {}
+        robots = [self.robots[k] for k in ks]
+        start_times = [float(self._finish[k][starts[k] - 1]) if starts[k] else 0.0 for k in ks]
+        tails, finish_times = plan_trajectory_tails(robots, [starts[k] for k in ks], start_times,
+                                                    self.v_max, self.a_max, self.timing)
+        for k, t_from, tail, finish in zip(ks, start_times, tails, finish_times):
+            robot = self.robots[k]
+            old = robot.get('trajectory')
+            if old is None or not starts[k]:
+                trajectory = tail
+            else:
+                # Segments of the unchanged operations all end by t_from
+                keep = int(np.searchsorted(old.t0, t_from - 1e-9, side='left'))
+                trajectory = Trajectory.from_array(old.origin, np.vstack((old.to_array()[:keep], tail.to_array())))
+            robot['trajectory'] = trajectory
+            self._finish[k] = np.concatenate((self._finish[k][:starts[k]], finish))
+            robot['makespan'] = float(self._finish[k][-1]) if len(self._finish[k]) else 0.0
+            self._schedules[k] = trajectory.sample(COLLISION_TOLERANCE)
+        return dict(zip(ks, start_times))
+
+    def _check_all(self):
+        """Full exact check of the broadphase candidate pairs."""
+        pairs, _ = broadphase_pairs(self.robots, self._min_safe_distance, schedules=self._schedules)
+        horizon = self.makespan
+        self._intervals = {
+            (i, j): find_collision_intervals(self._schedules[i], self._schedules[j], self._min_safe_distance, horizon)
+            for i, j in pairs
+        }
+        count('pairs_tested', len(pairs))
+
+    def _recheck(self, changed, old_horizon):
+        """
+        Re-checks the pairs of every re-planned robot from the time its trajectory changed, and
+        (when the makespan moved) the pairs that are in collision while parked at the end.
+        Returns the number of re-checked pairs.
+        """
+        horizon = self.makespan
+        windows = {}
+        for k, t_from in changed.items():
+            for other in range(len(self.robots)):
+                if other != k:
+                    pair = (min(k, other), max(k, other))
+                    windows[pair] = min(windows.get(pair, math.inf), t_from)
+        if horizon != old_horizon:
+            # Robots that are done hold their last position; only a collision lasting until
+            # the old end of the schedule can grow or shrink with the makespan
+            edge = min(horizon, old_horizon)
+            for pair, intervals in self._intervals.items():
+                if intervals and intervals[-1][1] >= edge - 1e-9:
+                    windows[pair] = min(windows.get(pair, math.inf), edge)
+
+        for (i, j), t_from in windows.items():
+            intervals = self._intervals.get((i, j), [])
+            # An interval that is still going on at t_from is re-checked from its start
+            for start, end, _ in intervals:
+                if end >= t_from:
+                    t_from = min(t_from, start)
+                    break
+            kept = [interval for interval in intervals if interval[1] < t_from]
+            self._intervals[(i, j)] = kept + find_collision_intervals(
+                self._schedules[i], self._schedules[j], self._min_safe_distance, horizon, t_start=t_from)
+        count('pairs_rechecked', len(windows))
+        return len(windows)
+
+def _operation_id(value, n):
+    """`value` as an operation id; raises ValueError unless it is an integer."""
+    # bool is an int subclass, but True would name operation 1
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"Delta {n}: operation id must be an integer, got {value!r}")
+    return value
+
+def _operation_fields(source, n):
+    """The operation fields present in `source`, as floats."""
+    fields = {}
+    for name in OPERATION_FIELDS:
+        if name in source:
+            try:
+                fields[name] = float(source[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"Delta {n}: {name} must be a number, got {source[name]!r}")
+            # float() accepts 'nan' and 'inf'
+            if not math.isfinite(fields[name]):
+                raise ValueError(f"Delta {n}: {name} must be finite, got {source[name]!r}")
+    if fields.get('t_i', 0.0) < 0:
+        raise ValueError(f"Delta {n}: t_i must not be negative")
+    return fields
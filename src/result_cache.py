@@ -0,0 +1,113 @@
+# result_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Bump when the pipeline output changes so stale on-disk entries are never served
+CACHE_VERSION = 8
+
+def normalize_scenario(scenario):
+    """Scenario text with blank lines dropped and runs of whitespace collapsed."""
+    lines = (' '.join(line.split()) for line in scenario.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+def cache_key(scenario, options=None):
+    """Content address of a run: SHA-256 of the normalized scenario plus the solver options."""
+    payload = json.dumps({
+        'version': CACHE_VERSION,
+        'scenario': normalize_scenario(scenario),
+        'options': options or {},
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serializable scheduler results.
+    The memory tier is an LRU bounded by `max_entries`; entries older than `ttl` seconds
+    are treated as misses in both tiers. If `disk_dir` is given, results are also written
+    there as <key>.json and survive restarts.
+    """
+
+    def __init__(self, max_entries=128, ttl=3600.0, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.json')
+
+    def get(self, key):
+        """Returns the cached value or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._expired(stored_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, value)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+        if self.disk_dir:
+            tmp_path = self._disk_path(key) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._disk_path(key))
+
+    def _store(self, key, value):
+        """Inserts into the memory tier and evicts least recently used entries. Caller holds the lock."""
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'disk': bool(self.disk_dir),
+            }
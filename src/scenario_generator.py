@@ -0,0 +1,75 @@
+# scenario_generator.py
+import argparse
+import math
+import random
+from kinematics import DEFAULT_JOINT_PARAMS
+
+# Seeded synthetic scenarios in the input file format.
+# Robots stand on a grid whose spacing shrinks as `density` grows (density 1: 2 m apart,
+# so neighboring workspaces overlap a little; density 2: 1 m apart, heavy sharing).
+# Every operation belongs to one robot's workspace: its pick and place points lie in a
+# ring around that base, at table height, where the arm can reach them.
+
+BASE_SPACING = 2.0       # meters between neighboring bases at density 1
+RING = (0.6, 1.8)        # radial distance of pick/place points from the base (meters)
+HEIGHT = (0.2, 1.0)      # z range of pick/place points (meters)
+
+def robot_bases(num_robots, density=1.0):
+    """Base positions on a near-square grid, row by row."""
+    spacing = BASE_SPACING / density
+    columns = max(1, math.ceil(math.sqrt(num_robots)))
+    return [((k % columns) * spacing, (k // columns) * spacing, 0.0) for k in range(num_robots)]
+
+def _workspace_point(rng, base):
+    radius = rng.uniform(*RING)
+    angle = rng.uniform(-math.pi, math.pi)
+    return (base[0] + radius * math.cos(angle), base[1] + radius * math.sin(angle), rng.uniform(*HEIGHT))
+
+def iter_scenario_lines(num_robots, num_operations, density=1.0, dwell=(0.2, 3.0), seed=0,
+                        tool_clearance=0.1, safe_dist=0.2):
+    """Lines of a generated scenario (without newlines); operations are produced lazily."""
+    rng = random.Random(seed)
+    bases = robot_bases(num_robots, density)
+    yield f"{num_robots} {num_operations}"
+    for x, y, z in bases:
+        yield f"{x:.4f} {y:.4f} {z:.4f}"
+    for joint_min, joint_max, v_max, a_max in DEFAULT_JOINT_PARAMS:
+        yield f"{joint_min} {joint_max} {v_max} {a_max}"
+    yield f"{tool_clearance} {safe_dist}"
+    for _ in range(num_operations):
+        base = bases[rng.randrange(num_robots)]
+        pick = _workspace_point(rng, base)
+        place = _workspace_point(rng, base)
+        values = " ".join(f"{v:.4f}" for v in pick + place)
+        yield f"{values} {rng.uniform(*dwell):.3f}"
+
+def generate_scenario(num_robots, num_operations, density=1.0, dwell=(0.2, 3.0), seed=0,
+                      tool_clearance=0.1, safe_dist=0.2):
+    """
+    Scenario text with `num_robots` robots and `num_operations` operations.
+    `density` scales how closely the robots stand, `dwell` is the (min, max) operation time in
+    seconds and `seed` makes the result reproducible.
+    """
+    return "\n".join(iter_scenario_lines(num_robots, num_operations, density, dwell, seed,
+                                         tool_clearance, safe_dist)) + "\n"
+
+def write_scenario(path, num_robots, num_operations, density=1.0, dwell=(0.2, 3.0), seed=0,
+                   tool_clearance=0.1, safe_dist=0.2):
+    """Writes a generated scenario to `path` line by line (large scenarios are never held in memory)."""
+    with open(path, 'w') as f:
+        for line in iter_scenario_lines(num_robots, num_operations, density, dwell, seed,
+                                        tool_clearance, safe_dist):
+            f.write(line + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a synthetic scenario file')
+    parser.add_argument('output_file')
+    parser.add_argument('--robots', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=100)
+    parser.add_argument('--density', type=float, default=1.0,
+                        help='robot packing: 1 = bases 2 m apart, 2 = 1 m apart (default 1)')
+    parser.add_argument('--dwell', type=float, nargs=2, default=(0.2, 3.0), metavar=('MIN', 'MAX'),
+                        help='operation time range in seconds (default 0.2 3.0)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_scenario(args.output_file, args.robots, args.operations, args.density, tuple(args.dwell), args.seed)
@@ -0,0 +1,133 @@
+# schedule.py
+import numpy as np
+
+class Schedule:
+    """
+    Struct-of-arrays robot schedule: a float64 time column and an Nx3 float64 position
+    column (32 bytes per waypoint). Behaves like the old list of (t, x, y, z) tuples for
+    indexing and iteration, but grows by blocks, slices without copying and shifts in place.
+    """
+
+    def __init__(self, times=None, positions=None, capacity=16):
+        times = np.empty(0) if times is None else np.asarray(times, dtype=float).reshape(-1)
+        positions = np.empty((0, 3)) if positions is None else np.asarray(positions, dtype=float).reshape(-1, 3)
+        if len(times) != len(positions):
+            raise ValueError(f"Schedule has {len(times)} times but {len(positions)} positions")
+        self._size = len(times)
+        self._times = np.empty(max(capacity, self._size))
+        self._positions = np.empty((len(self._times), 3))
+        self._times[:self._size] = times
+        self._positions[:self._size] = positions
+
+    @classmethod
+    def from_waypoints(cls, waypoints):
+        """Builds a schedule from an iterable of (t, x, y, z) waypoints."""
+        data = np.asarray(list(waypoints), dtype=float).reshape(-1, 4)
+        return cls(data[:, 0], data[:, 1:4])
+
+    @classmethod
+    def _view(cls, times, positions):
+        """Wraps existing arrays without copying them."""
+        view = cls.__new__(cls)
+        view._times = times
+        view._positions = positions
+        view._size = len(times)
+        return view
+
+    @property
+    def times(self):
+        return self._times[:self._size]
+
+    @property
+    def positions(self):
+        return self._positions[:self._size]
+
+    @property
+    def makespan(self):
+        return float(self._times[self._size - 1]) if self._size else 0.0
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.positions.nbytes
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Schedule._view(self.times[index], self.positions[index])
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Schedule index out of range")
+        x, y, z = self._positions[index]
+        return (float(self._times[index]), float(x), float(y), float(z))
+
+    def __iter__(self):
+        for t, (x, y, z) in zip(self.times.tolist(), self.positions.tolist()):
+            yield (t, x, y, z)
+
+    def __repr__(self):
+        return f"Schedule({self._size} waypoints, makespan={self.makespan:.6f}s)"
+
+    def _reserve(self, size):
+        if size <= len(self._times):
+            return
+        capacity = max(size, 2 * len(self._times), 16)
+        times = np.empty(capacity)
+        positions = np.empty((capacity, 3))
+        times[:self._size] = self.times
+        positions[:self._size] = self.positions
+        self._times = times
+        self._positions = positions
+
+    def append(self, t, x, y, z):
+        """Appends a single waypoint."""
+        self._reserve(self._size + 1)
+        self._times[self._size] = t
+        self._positions[self._size] = (x, y, z)
+        self._size += 1
+
+    def extend(self, times, positions=None):
+        """
+        Appends a block of waypoints: either another Schedule, or a time array and an Nx3
+        position array.
+        """
+        if isinstance(times, Schedule):
+            times, positions = times.times, times.positions
+        times = np.asarray(times, dtype=float).reshape(-1)
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        count = len(times)
+        self._reserve(self._size + count)
+        self._times[self._size:self._size + count] = times
+        self._positions[self._size:self._size + count] = positions
+        self._size += count
+
+    def shift(self, dt):
+        """Shifts every waypoint by `dt` seconds in place."""
+        self._times[:self._size] += dt
+
+    def insert_wait(self, index, duration):
+        """
+        Holds the robot at waypoint `index` for `duration` extra seconds and shifts every
+        later waypoint. An existing dwell (next waypoint at the same position) is lengthened,
+        otherwise a waypoint is inserted where the wait ends.
+        """
+        if duration <= 0:
+            return
+        size = self._size
+        self._times[index + 1:size] += duration
+        if index + 1 < size and np.array_equal(self._positions[index + 1], self._positions[index]):
+            return
+        self._reserve(size + 1)
+        self._times[index + 2:size + 1] = self._times[index + 1:size]
+        self._positions[index + 2:size + 1] = self._positions[index + 1:size]
+        self._times[index + 1] = self._times[index] + duration
+        self._positions[index + 1] = self._positions[index]
+        self._size += 1
+
+    def copy(self):
+        return Schedule(self.times, self.positions, capacity=self._size)
+
+    def to_list(self):
+        return list(self)
@@ -1,55 +1,105 @@
 # scheduler.py
 import math
-from trajectory_planner import plan_trajectory
-from kinematics import is_point_reachable
+import numpy as np
+from trajectory_planner import plan_trajectories, plan_trajectories_parallel
+from kinematics import points_reachable, reachability_matrix
+from move_times import MoveTimeMatrix, operation_points
+from instrumentation import debug, info, warning, count, record, emit, enabled, DEBUG
 
-def calculate_move_time(distance, v_max, a_max):
+def estimate_completion_times(robots, v_max, a_max, move_times=None):
     """
-    Calculates time for a move using a trapezoidal velocity profile.
-    Returns: time in seconds
+    Completion time of every robot if it runs its assigned operations in order,
+    starting from its base (same timing model as the trajectory planner).
+    `move_times` is the scenario's MoveTimeMatrix; it is built if not given.
+    Returns {robot_id: seconds}.
     """
-    # Time to accelerate to max speed (and decelerate back to zero)
-    t_acc = v_max / a_max
-    # Distance covered during acceleration (and deceleration)
-    d_acc = 0.5 * a_max * t_acc * t_acc
-
-    if distance < 2 * d_acc:
-        # Robot never reaches full speed
-        t_total = 2 * math.sqrt(distance / a_max)
-    else:
-        # Robot spends time at full speed
-        t_cruise = (distance - 2 * d_acc) / v_max
-        t_total = 2 * t_acc + t_cruise
-    return t_total
+    if move_times is None:
+        move_times = MoveTimeMatrix(robots, [op for robot in robots for op in robot['operations']], v_max, a_max)
+    estimates = {}
+    for robot in robots:
+        indices = [move_times.op_index[op['id']] for op in robot['operations']]
+        estimates[robot['id']] = move_times.route_time(move_times.robot_index[robot['id']], indices)
+    return estimates
 
-# In your scheduler.py, add debug output
-def assign_operations(robots, operations):
+def assign_operations(robots, operations, v_max=None, a_max=None, strategy='greedy', move_times=None,
+                      reachable=None):
     """
-    Assigns operations to robots based on some criteria.
-    Add debug output to see what's happening.
+    Assigns operations to robots. An operation only goes to a robot that can reach both its
+    pick and place point; operations no robot can reach are reported and left unassigned.
+    strategy='greedy': each operation goes to the reachable robot whose base is closest to its pick point.
+    strategy='balanced': longest-processing-time first; each operation goes to the robot that
+        can reach it and would finish it earliest, given the work already assigned to it.
+    When v_max/a_max are given, the estimated completion time of every robot is reported.
+    `move_times` is the scenario's MoveTimeMatrix; it is built from v_max/a_max if not given.
+    `reachable` is the K x N reachability_matrix() of robots x operations; computed if not given.
+    Returns {'strategy', 'makespan_estimate', 'robot_estimates', 'unreachable'} where
+    'unreachable' lists the ids of the operations that were not assigned.
+    Per-robot and per-operation dumps are only produced at DEBUG level.
     """
-    print(f"DEBUG: assign_operations called with {len(robots)} robots and {len(operations)} operations")
-    
-    for i, robot in enumerate(robots):
-        print(f"DEBUG: Robot {i}: {robot}")
-    
-    for i, op in enumerate(operations):
-        print(f"DEBUG: Operation {i}: {op}")
-    
-    # Your existing assignment logic here
-    # ...
-    from collections import deque
-    # Convert to a list we can process
-    op_queue = deque(operations)
-    
-    while op_queue:
-        op = op_queue.popleft()
+    log_debug = enabled(DEBUG)
+    debug(f"DEBUG: assign_operations called with {len(robots)} robots and {len(operations)} operations")
+
+    if log_debug:
+        for i, robot in enumerate(robots):
+            debug(f"DEBUG: Robot {i}: {robot}")
+        for i, op in enumerate(operations):
+            debug(f"DEBUG: Operation {i}: {op}")
+
+    if move_times is None and v_max is not None and a_max is not None:
+        move_times = MoveTimeMatrix(robots, operations, v_max, a_max)
+    if reachable is None:
+        picks, places, _ = operation_points(operations)
+        reachable = reachability_matrix(robots, picks, places)
+    unreachable = report_unreachable(operations, reachable)
+    assignable = np.flatnonzero(reachable.any(axis=0))
+
+    if strategy == 'greedy':
+        _assign_greedy(robots, operations, assignable, reachable, log_debug)
+    elif strategy == 'balanced':
+        if move_times is None:
+            raise ValueError("Balanced assignment needs v_max and a_max")
+        _assign_balanced(robots, operations, assignable, reachable, move_times, log_debug)
+    else:
+        raise ValueError(f"Unknown assignment strategy: {strategy}")
+
+    count('operations_assigned', len(assignable))
+
+    robot_estimates = {}
+    makespan_estimate = None
+    if move_times is not None:
+        robot_estimates = estimate_completion_times(robots, v_max, a_max, move_times)
+        makespan_estimate = max(robot_estimates.values(), default=0.0)
+        info(f"Estimated makespan ({strategy} assignment): {makespan_estimate:.3f}s")
+        record('assignment_makespan_estimate', makespan_estimate)
+
+    return {
+        'strategy': strategy,
+        'makespan_estimate': makespan_estimate,
+        'robot_estimates': robot_estimates,
+        'unreachable': unreachable,
+    }
+
+def report_unreachable(operations, reachable):
+    """Warns about the operations no robot can reach (columns of `reachable` without a True) and returns their ids."""
+    unreachable = [operations[j]['id'] for j in np.flatnonzero(~reachable.any(axis=0))]
+    if unreachable:
+        shown = ', '.join(str(op_id) for op_id in unreachable[:10])
+        more = f" and {len(unreachable) - 10} more" if len(unreachable) > 10 else ''
+        warning(f"WARNING: No robot can reach operations {shown}{more}; they are left unassigned.")
+    count('operations_unreachable', len(unreachable))
+    return unreachable
+
+def _assign_greedy(robots, operations, assignable, reachable, log_debug):
+    """Nearest-base assignment: fast, ignores load."""
+    for j in assignable:
+        op = operations[j]
         best_robot = None
         best_distance = float('inf')
         
-        # Find the robot whose base is closest to the PICK point of this operation
+        # Find the reachable robot whose base is closest to the PICK point of this operation
         pick_point = (op['pick_x'], op['pick_y'], op['pick_z'])
-        for robot in robots:
+        for k in np.flatnonzero(reachable[:, j]):
+            robot = robots[k]
             base_point = (robot['base_x'], robot['base_y'], robot['base_z'])
             distance = math.sqrt(sum((a - b) ** 2 for a, b in zip(base_point, pick_point)))
             if distance < best_distance:
@@ -58,24 +108,67 @@ def assign_operations(robots, operations):
                 
         # Assign the operation to the closest robot
         best_robot['operations'].append(op)
-        print(f"Assigned operation (Pick: {pick_point}) to {best_robot['id']} (distance: {best_distance:.2f}m)")
+        if log_debug:
+            debug(f"DEBUG: Assigned operation (Pick: {pick_point}) to {best_robot['id']} (distance: {best_distance:.2f}m)")
 
-def plan_paths(robots, v_max, a_max):
+
+def _assign_balanced(robots, operations, assignable, reachable, move_times, log_debug):
+    """
+    Makespan-balanced assignment (LPT with travel).
+    Operations are taken longest first; each is appended to the reachable robot with the
+    earliest resulting completion time (travel from its current end position + the operation).
+    """
+    finish_times = [0.0] * len(robots)
+    last_ops = [None] * len(robots)  # index of each robot's last operation, None while at its base
+
+    op_times = move_times.operation_time
+    ordered = sorted(assignable, key=lambda p: -op_times[move_times.op_index[operations[p]['id']]])
+    for position in ordered:
+        op = operations[position]
+        j = move_times.op_index[op['id']]
+        candidates = np.flatnonzero(reachable[:, position])
+
+        op_time = float(op_times[j])
+        best_k = None
+        best_finish = float('inf')
+        for k in candidates:
+            if last_ops[k] is None:
+                travel = float(move_times.base_to_pick[k, j])
+            else:
+                travel = move_times.place_to_pick(last_ops[k], j)
+            finish = finish_times[k] + travel + op_time
+            if finish < best_finish:
+                best_finish = finish
+                best_k = k
+
+        best_robot = robots[best_k]
+        best_robot['operations'].append(op)
+        finish_times[best_k] = best_finish
+        last_ops[best_k] = j
+        if log_debug:
+            debug(f"DEBUG: Assigned operation {op['id']} to {best_robot['id']} (estimated finish: {best_finish:.2f}s)")
+
+def plan_paths(robots, v_max, a_max, workers=1, timing='cartesian'):
     """
-    Plans trajectories for all robots using the trajectory_planner.
+    Plans trajectories for all robots using the trajectory_planner (one batched pass, or
+    robot groups across a process pool of `workers` processes; 0 or None means one per CPU).
+    timing='joint' times every move from the joints' own limits (see TIMING_MODES).
     Now includes a basic reachability check.
     """
     for robot in robots:
-        print(f"Planning path for {robot['id']}...")
-        # Check if all points are reachable for this robot
-        all_points = []
-        for op in robot['operations']:
-            all_points.append((op['pick_x'], op['pick_y'], op['pick_z']))
-            all_points.append((op['place_x'], op['place_y'], op['place_z']))
-
-        for point in all_points:
-            if not is_point_reachable(robot, *point):
-                print(f"WARNING: Point {point} may be unreachable for {robot['id']}. Proceeding anyway.")
-
-        # Plan the trajectory
-        robot['schedule'] = plan_trajectory(robot, robot['operations'], v_max, a_max)
\ No newline at end of file
+        debug(f"DEBUG: Planning path for {robot['id']}...")
+        # Check if all points are reachable for this robot (assign_operations guarantees it,
+        # but operations can also be assigned by hand)
+        picks, places, _ = operation_points(robot['operations'])
+        all_points = np.stack((picks, places), axis=1).reshape(-1, 3)
+        for point in all_points[~points_reachable(robot, all_points)].tolist():
+            warning(f"WARNING: Point {tuple(point)} may be unreachable for {robot['id']}. Proceeding anyway.")
+
+    # Plan the trajectories of all robots at once
+    if workers == 1:
+        trajectories = plan_trajectories(robots, v_max, a_max, timing)
+    else:
+        trajectories = plan_trajectories_parallel(robots, v_max, a_max, workers or None, timing=timing)
+    for robot, trajectory in zip(robots, trajectories):
+        robot['trajectory'] = trajectory
+        emit('robot_planned', {'robot': robot})
\ No newline at end of file
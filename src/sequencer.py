@@ -0,0 +1,188 @@
+# sequencer.py
+import time
+import numpy as np
+from scheduler import estimate_completion_times
+from move_times import MoveTimeMatrix
+from instrumentation import debug, info, count, record
+
+# Operation sequencing: reorders each robot's assigned operations to minimize travel time.
+# The pick->place move and both dwells of an operation are fixed, so only the travel
+# base->first pick and place_i->pick_j between consecutive operations depends on the order.
+# The route is an open path with a fixed start (the base) and a free end; travel costs are
+# asymmetric (place_i->pick_j != place_j->pick_i).
+
+# Routes longer than this read place->pick times from the MoveTimeMatrix tiles instead of
+# building a dense n x n table, and skip the O(n^2) nearest-neighbor construction.
+MAX_DENSE_ROUTE = 2048
+
+# Inner-loop steps of the local search between two deadline checks (a step on a tiled route
+# is a cache lookup, so one outer step alone can be O(n) lookups)
+DEADLINE_CHECK_STEPS = 256
+
+def _route(robot, operations, move_times):
+    indices = [move_times.op_index[op['id']] for op in operations]
+    start_cost = move_times.base_to_pick[move_times.robot_index[robot['id']], indices]
+    if len(indices) > MAX_DENSE_ROUTE:
+        return _TiledRoute(start_cost, move_times, indices)
+    return _Route(start_cost, move_times.place_to_pick_submatrix(indices))
+
+class _Route:
+    """
+    Travel cost model of one robot's route; node None is the base (start) or the free end.
+    `start_cost` (n) and `cost` (n x n, place of u -> pick of v) are NumPy arrays.
+    """
+
+    def __init__(self, start_cost, cost):
+        self.start_cost = start_cost
+        self.cost = cost
+
+    def edge(self, u, v):
+        if v is None:
+            return 0.0
+        if u is None:
+            return self.start_cost.item(v)
+        return self.cost.item(u, v)
+
+    def total(self, order):
+        total = 0.0
+        prev = None
+        for node in order:
+            total += self.edge(prev, node)
+            prev = node
+        return total
+
+class _TiledRoute(_Route):
+    """_Route whose place->pick times come from the MoveTimeMatrix cache (bounded memory)."""
+
+    def __init__(self, start_cost, move_times, indices):
+        super().__init__(start_cost, None)
+        self.move_times = move_times
+        self.indices = indices
+
+    def edge(self, u, v):
+        if v is None:
+            return 0.0
+        if u is None:
+            return self.start_cost.item(v)
+        return self.move_times.place_to_pick(self.indices[u], self.indices[v])
+
+def _nearest_neighbor(route, n, deadline):
+    """
+    Nearest-neighbor order from the base over the dense cost rows (ties go to the lower index).
+    When the deadline passes, the unvisited operations are appended in their current order.
+    """
+    order = []
+    visited = np.zeros(n, dtype=bool)
+    row = route.start_cost
+    for _ in range(n):
+        if time.perf_counter() > deadline:
+            order.extend(np.flatnonzero(~visited).tolist())
+            break
+        nxt = int(np.argmin(np.where(visited, np.inf, row)))
+        order.append(nxt)
+        visited[nxt] = True
+        row = route.cost[nxt]
+    return order
+
+def _two_opt_pass(route, order, deadline):
+    """One first-improvement pass of segment reversals. Returns True if the order changed."""
+    n = len(order)
+    for i in range(n - 1):
+        if time.perf_counter() > deadline:
+            return False
+        prev = order[i - 1] if i > 0 else None
+        forward = 0.0   # internal edges of order[i..j] as they are
+        backward = 0.0  # the same edges traversed in reverse
+        for j in range(i + 1, n):
+            if (j - i) % DEADLINE_CHECK_STEPS == 0 and time.perf_counter() > deadline:
+                return False
+            forward += route.edge(order[j - 1], order[j])
+            backward += route.edge(order[j], order[j - 1])
+            nxt = order[j + 1] if j + 1 < n else None
+            old = route.edge(prev, order[i]) + forward + route.edge(order[j], nxt)
+            new = route.edge(prev, order[j]) + backward + route.edge(order[i], nxt)
+            if new < old - 1e-9:
+                order[i:j + 1] = order[i:j + 1][::-1]
+                return True
+    return False
+
+def _or_opt_pass(route, order, deadline, max_segment=3):
+    """One first-improvement pass moving segments of 1..max_segment operations. Returns True if changed."""
+    n = len(order)
+    for length in range(1, min(max_segment, n - 1) + 1):
+        for i in range(n - length + 1):
+            if time.perf_counter() > deadline:
+                return False
+            segment = order[i:i + length]
+            prev = order[i - 1] if i > 0 else None
+            nxt = order[i + length] if i + length < n else None
+            removal_gain = route.edge(prev, segment[0]) + route.edge(segment[-1], nxt) - route.edge(prev, nxt)
+            rest = order[:i] + order[i + length:]
+            for p in range(len(rest) + 1):
+                if p % DEADLINE_CHECK_STEPS == 0 and time.perf_counter() > deadline:
+                    return False
+                if p == i:
+                    continue  # original position
+                a = rest[p - 1] if p > 0 else None
+                b = rest[p] if p < len(rest) else None
+                insertion_cost = route.edge(a, segment[0]) + route.edge(segment[-1], b) - route.edge(a, b)
+                if insertion_cost < removal_gain - 1e-9:
+                    order[:] = rest[:p] + segment + rest[p:]
+                    return True
+    return False
+
+def sequence_operations(robot, move_times, time_budget=0.05):
+    """
+    Reorders robot['operations'] in place to minimize total travel time.
+    Nearest-neighbor construction from the base (kept only if it beats the current order;
+    cut short at the deadline), then 2-opt and Or-opt local search until no move improves or `time_budget` seconds pass.
+    Returns (travel_before, travel_after) in seconds.
+    """
+    operations = robot['operations']
+    n = len(operations)
+    if n < 2:
+        return 0.0, 0.0
+    deadline = time.perf_counter() + time_budget
+    route = _route(robot, operations, move_times)
+
+    order = list(range(n))
+    travel_before = route.total(order)
+    if n <= MAX_DENSE_ROUTE:
+        candidate = _nearest_neighbor(route, n, deadline)
+        if route.total(candidate) < travel_before:
+            order = candidate
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = _two_opt_pass(route, order, deadline) or _or_opt_pass(route, order, deadline)
+        count('sequencing_moves', int(improved))
+
+    travel_after = route.total(order)
+    robot['operations'] = [operations[k] for k in order]
+    debug(f"DEBUG: Sequenced {robot['id']}: travel {travel_before:.3f}s -> {travel_after:.3f}s")
+    return travel_before, travel_after
+
+def sequence_all(robots, v_max, a_max, time_budget=0.05, move_times=None):
+    """
+    Sequences every robot's operations (`time_budget` seconds per robot) and reports the
+    estimated makespan before and after.
+    `move_times` is the scenario's MoveTimeMatrix; it is built if not given.
+    Returns {'makespan_before', 'makespan_after', 'robot_estimates'}.
+    """
+    if move_times is None:
+        move_times = MoveTimeMatrix(robots, [op for robot in robots for op in robot['operations']], v_max, a_max)
+    before = estimate_completion_times(robots, v_max, a_max, move_times)
+    for robot in robots:
+        sequence_operations(robot, move_times, time_budget)
+    after = estimate_completion_times(robots, v_max, a_max, move_times)
+
+    makespan_before = max(before.values(), default=0.0)
+    makespan_after = max(after.values(), default=0.0)
+    info(f"Sequencing: estimated makespan {makespan_before:.3f}s -> {makespan_after:.3f}s")
+    record('sequencing_makespan_before', makespan_before)
+    record('sequencing_makespan_after', makespan_after)
+    return {
+        'makespan_before': makespan_before,
+        'makespan_after': makespan_after,
+        'robot_estimates': after,
+    }
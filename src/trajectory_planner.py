@@ -1,130 +1,397 @@
 # trajectory_planner.py
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from motion import Trajectory, move_profiles
+from move_times import operation_points
+from kinematics import solve_ik, ik_configurations, DEFAULT_JOINT_PARAMS
+from instrumentation import debug, count, enabled, DEBUG
 
 def plan_trajectory(robot, operations, v_max, a_max):
     """
     Plans a path for a single robot through its list of assigned operations.
-    Generates a schedule of (time, x, y, z) waypoints.
-    """
-    print(f"DEBUG: Planning trajectory for robot {robot.get('id', 'unknown')}")
-    print(f"DEBUG: Robot base position: {robot.get('base_x', 0)}, {robot.get('base_y', 0)}, {robot.get('base_z', 0)}")
-    print(f"DEBUG: Number of operations: {len(operations)}")
-    
-    for i, op in enumerate(operations):
-        print(f"DEBUG: Operation {i+1}:")
-        print(f"DEBUG:   Pick: {op.get('pick_x', 0)}, {op.get('pick_y', 0)}, {op.get('pick_z', 0)}")
-        print(f"DEBUG:   Place: {op.get('place_x', 0)}, {op.get('place_y', 0)}, {op.get('place_z', 0)}")
-        print(f"DEBUG:   Time: {op.get('t_i', 0)}")
-    
-    schedule = []
+    Returns an analytic Trajectory: one segment per move and per pick/place dwell.
+    """
+    log_debug = enabled(DEBUG)
+    if log_debug:
+        debug(f"DEBUG: Planning trajectory for robot {robot.get('id', 'unknown')}")
+        debug(f"DEBUG: Robot base position: {robot.get('base_x', 0)}, {robot.get('base_y', 0)}, {robot.get('base_z', 0)}")
+        debug(f"DEBUG: Number of operations: {len(operations)}")
+        for i, op in enumerate(operations):
+            debug(f"DEBUG: Operation {i+1}:")
+            debug(f"DEBUG:   Pick: {op.get('pick_x', 0)}, {op.get('pick_y', 0)}, {op.get('pick_z', 0)}")
+            debug(f"DEBUG:   Place: {op.get('place_x', 0)}, {op.get('place_y', 0)}, {op.get('place_z', 0)}")
+            debug(f"DEBUG:   Time: {op.get('t_i', 0)}")
+
+    segments = []
     current_time = 0.0
     current_pos = (robot['base_x'], robot['base_y'], robot['base_z']) # Start at base
 
-    # Add starting position as the first waypoint
-    schedule.append((current_time, current_pos[0], current_pos[1], current_pos[2]))
-    print(f"DEBUG: Added start waypoint: {schedule[0]}")
-
     for op in operations:
         # 1. Move to PICK point
         target_pick = (op['pick_x'], op['pick_y'], op['pick_z'])
-        print(f"DEBUG: Moving to pick point: {target_pick}")
-        leg_time, leg_waypoints = _plan_move(current_pos, target_pick, current_time, v_max, a_max)
-        print(f"DEBUG: Generated {len(leg_waypoints)} waypoints for pick move")
-        schedule.extend(leg_waypoints[1:]) # Skip the first point (it's current_pos)
-        current_time += leg_time
+        debug("DEBUG: Moving to pick point: %s", target_pick)
+        current_time = _append_move(segments, current_pos, target_pick, current_time, v_max, a_max)
         current_pos = target_pick
 
         # 2. EXECUTE PICK operation (robot stops for t_i seconds)
-        current_time += op['t_i'] # Add the operation time
-        # Add a waypoint to show we are still at the pick point during this time
-        schedule.append((current_time, current_pos[0], current_pos[1], current_pos[2]))
-        print(f"DEBUG: Added pick operation waypoint: {schedule[-1]}")
+        current_time = _append_dwell(segments, current_pos, current_time, op['t_i'])
 
         # 3. Move to PLACE point
         target_place = (op['place_x'], op['place_y'], op['place_z'])
-        print(f"DEBUG: Moving to place point: {target_place}")
-        leg_time, leg_waypoints = _plan_move(current_pos, target_place, current_time, v_max, a_max)
-        print(f"DEBUG: Generated {len(leg_waypoints)} waypoints for place move")
-        schedule.extend(leg_waypoints[1:])
-        current_time += leg_time
+        debug("DEBUG: Moving to place point: %s", target_place)
+        current_time = _append_move(segments, current_pos, target_place, current_time, v_max, a_max)
         current_pos = target_place
 
         # 4. EXECUTE PLACE operation (robot stops for t_i seconds)
-        current_time += op['t_i']
-        schedule.append((current_time, current_pos[0], current_pos[1], current_pos[2]))
-        print(f"DEBUG: Added place operation waypoint: {schedule[-1]}")
+        current_time = _append_dwell(segments, current_pos, current_time, op['t_i'])
 
+    trajectory = Trajectory.from_segments((robot['base_x'], robot['base_y'], robot['base_z']), segments)
     robot['makespan'] = current_time # Store the total time for this robot
-    print(f"DEBUG: Final schedule has {len(schedule)} waypoints")
-    return schedule
+    count('segments_planned', len(trajectory))
+    debug("DEBUG: Final trajectory has %d segments", len(trajectory))
+    return trajectory
+
+def _append_move(segments, start_pos, end_pos, start_time, v_max, a_max):
+    """Appends the move segment (if any) and returns the time it ends."""
+    t_total, profile = _plan_move(start_pos, end_pos, start_time, v_max, a_max)
+    if profile is not None:
+        segments.append(profile)
+    return start_time + t_total
+
+def _append_dwell(segments, position, start_time, dwell_time):
+    """Appends a dwell at `position` (robot at rest) and returns the time it ends."""
+    if dwell_time > 0:
+        segments.append((start_time, position, position, 0.0, dwell_time, 0.0, 0.0))
+        debug("DEBUG: Added dwell at %s until %s", position, start_time + dwell_time)
+    return start_time + dwell_time
 
 def _plan_move(start_pos, end_pos, start_time, v_max, a_max):
     """
     Plans a movement between two points using a trapezoidal velocity profile.
-    Returns the total time for the move and a list of waypoints for the segment.
+    Returns the total time for the move and its segment
+    (t0, start, end, t_acc, t_cruise, v_peak, accel), or None for a zero-distance move.
     """
     # Calculate total distance
     dx = end_pos[0] - start_pos[0]
     dy = end_pos[1] - start_pos[1]
     dz = end_pos[2] - start_pos[2]
     distance = math.sqrt(dx**2 + dy**2 + dz**2)
-    
-    print(f"DEBUG: Planning move from {start_pos} to {end_pos}")
-    print(f"DEBUG: Distance: {distance}, v_max: {v_max}, a_max: {a_max}")
+
+    debug("DEBUG: Planning move from %s to %s", start_pos, end_pos)
+    debug("DEBUG: Distance: %s, v_max: %s, a_max: %s", distance, v_max, a_max)
 
     # If distance is zero, return immediately
     if distance < 1e-10:
-        print("DEBUG: Zero distance move, returning empty waypoints")
-        return 0.0, [(start_time, start_pos[0], start_pos[1], start_pos[2])]
-
-    # --- Time calculations for trapezoidal profile ---
-    # Time to accelerate to v_max: t_acc = v_max / a_max
-    # Distance needed to accelerate and decelerate: d_acc_dec = (v_max * t_acc) = (v_max^2 / a_max)
-    t_acc = v_max / a_max
-    d_acc_dec = v_max * t_acc  # v_max^2 / a_max
-
-    if distance < d_acc_dec:
-        # Case 1: Not enough distance to reach v_max. Triangle profile.
-        t_acc_actual = math.sqrt(distance / a_max)
-        t_total = 2 * t_acc_actual
-        cruise_speed = a_max * t_acc_actual
-        cruise_time = 0.0
-        print(f"DEBUG: Triangle profile, t_total: {t_total}")
-    else:
-        # Case 2: Full trapezoid profile. Time at cruise speed.
-        t_acc = v_max / a_max
-        d_cruise = distance - d_acc_dec
-        cruise_time = d_cruise / v_max
-        t_total = 2 * t_acc + cruise_time
-        cruise_speed = v_max
-        print(f"DEBUG: Trapezoid profile, t_total: {t_total}")
-
-    # --- Generate waypoints for this segment ---
-    waypoints = []
-    num_segments = 10  # Number of points to sample along the move
-    for i in range(num_segments + 1):
-        t_segment = (i / num_segments) * t_total
-        # Calculate distance traveled at time t_segment
-        if t_segment <= t_acc:
-            # Acceleration phase
-            d_phase = 0.5 * a_max * t_segment**2
-        elif t_segment <= (t_acc + cruise_time):
-            # Cruise phase
-            d_cruise_phase = cruise_speed * (t_segment - t_acc)
-            d_phase = 0.5 * a_max * t_acc**2 + d_cruise_phase
-        else:
-            # Deceleration phase
-            t_dec = t_segment - (t_acc + cruise_time)
-            d_dec_phase = cruise_speed * t_dec - 0.5 * a_max * t_dec**2
-            d_phase = (0.5 * a_max * t_acc**2) + (cruise_speed * cruise_time) + d_dec_phase
-
-        # Interpolate position based on fractional distance
-        frac = d_phase / distance
-        x = start_pos[0] + frac * dx
-        y = start_pos[1] + frac * dy
-        z = start_pos[2] + frac * dz
-        t_absolute = start_time + t_segment
-        waypoints.append((t_absolute, x, y, z))
-
-    print(f"DEBUG: Generated {len(waypoints)} waypoints for move")
-    return t_total, waypoints
\ No newline at end of file
+        debug("DEBUG: Zero distance move, no segment")
+        return 0.0, None
+
+    # Triangle profile if there is not enough distance to reach v_max, trapezoid otherwise
+    t_acc, t_cruise, v_peak, t_total = (float(x) for x in move_profiles(distance, v_max, a_max))
+    debug("DEBUG: %s profile, t_total: %s", 'Triangle' if t_cruise == 0.0 else 'Trapezoid', t_total)
+    return t_total, (start_time, start_pos, end_pos, t_acc, t_cruise, v_peak, a_max)
+
+# Below this many operations in the cell, plan_trajectories_parallel() plans in-process:
+# starting the pool costs more than the planning itself
+PARALLEL_MIN_OPERATIONS = 20000
+
+# Move timing models:
+#   'cartesian': trapezoidal profile of the tool with the scenario's Cartesian v_max / a_max
+#   'joint': every joint's own trapezoidal time over its IK angle travel along the straight
+#            line, all joints synchronized to the slowest one (moves without an IK solution at
+#            their ends or at any of JOINT_PATH_SAMPLES points in between fall back to 'cartesian')
+TIMING_MODES = ('cartesian', 'joint')
+
+# Interior points of every straight-line move whose IK is solved for timing='joint'
+JOINT_PATH_SAMPLES = 4
+
+def plan_trajectories(robots, v_max, a_max, timing='cartesian'):
+    """
+    Batched planner: plans every robot's trajectory through its assigned operations at once.
+    The moves of all robots are laid out on a (robots x steps) grid of move/dwell steps
+    (padded robots repeat their last point), profiled with one vectorized move_profiles()
+    call, and timed with a cumulative sum per robot. Same trajectories as plan_trajectory()
+    with timing='cartesian'; see TIMING_MODES for timing='joint'.
+    Returns the list of Trajectories and sets each robot['makespan'].
+    """
+    bases, operations = _robot_arrays(robots)
+    joints = _joint_arrays(robots) if _check_timing(timing) == 'joint' else None
+    trajectories, makespans, num_moves, joint_timed, _ = _plan_arrays(bases, operations, v_max, a_max, joints)
+    for robot, makespan in zip(robots, makespans):
+        robot['makespan'] = makespan
+    if joints is not None:
+        count('joint_timed_moves', joint_timed)
+    count('segments_planned', sum(len(trajectory) for trajectory in trajectories))
+    debug("DEBUG: Batch-planned %d moves for %d robots", num_moves, len(robots))
+    return trajectories
+
+def plan_trajectories_parallel(robots, v_max, a_max, workers=None, min_operations=PARALLEL_MIN_OPERATIONS,
+                               timing='cartesian'):
+    """
+    Plans the robots in groups across a process pool of `workers` processes (None: one per
+    CPU). Robots are split into contiguous groups of about equal operation counts; each
+    worker runs the batched planner on its group and sends every trajectory back as one
+    (segments x 11) array (see Trajectory.to_array). Groups come back in robot order, so the
+    result is the same as plan_trajectories(), which is used directly for a single worker,
+    a single robot or fewer than `min_operations` operations.
+    """
+    workers = workers or os.cpu_count() or 1
+    bases, operations = _robot_arrays(robots)
+    total = sum(len(ops) for ops in operations)
+    workers = min(workers, len(robots))
+    if workers <= 1 or total < min_operations:
+        debug("DEBUG: Planning %d operations in-process", total)
+        return plan_trajectories(robots, v_max, a_max, timing)
+    # IK runs here, where its warm-start cache lives; the workers only get the joint travel
+    joints = _joint_arrays(robots) if _check_timing(timing) == 'joint' else None
+
+    # Contiguous groups with about total / workers operations each
+    ends = np.cumsum([len(ops) for ops in operations])
+    cuts = np.searchsorted(ends, total * np.arange(1, workers) / workers, side='left') + 1
+    bounds = [0] + sorted(set(int(c) for c in cuts if 0 < c < len(robots))) + [len(robots)]
+    groups = [(bases[lo:hi], operations[lo:hi], v_max, a_max, _slice_joints(joints, lo, hi))
+              for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+        results = list(pool.map(_plan_group, groups))
+
+    trajectories = []
+    makespans = []
+    joint_timed = 0
+    for (group_bases, *_), (arrays, group_makespans, group_joint_timed) in zip(groups, results):
+        trajectories.extend(Trajectory.from_array(base, array) for base, array in zip(group_bases, arrays))
+        makespans.extend(group_makespans)
+        joint_timed += group_joint_timed
+    for robot, makespan in zip(robots, makespans):
+        robot['makespan'] = makespan
+    if joints is not None:
+        count('joint_timed_moves', joint_timed)
+    count('segments_planned', sum(len(trajectory) for trajectory in trajectories))
+    count('planning_workers', len(groups))
+    debug("DEBUG: Planned %d operations in %d worker processes", total, len(groups))
+    return trajectories
+
+def plan_trajectory_tails(robots, starts, start_times, v_max, a_max, timing='cartesian'):
+    """
+    Incremental planning: plans the tail of every robot's trajectory, i.e. its operations from
+    index starts[k] on, beginning at rest at time start_times[k] at the place point of
+    operation starts[k] - 1 (its base when starts[k] is 0). The moves are timed exactly as
+    when the whole trajectory is planned.
+    Returns (tails, finish_times): a Trajectory per robot and an array with the finish time
+    of each of its operations from starts[k] on.
+    """
+    bases, operations = _robot_arrays(robots)
+    origins = np.array([ops[start - 1, 3:6] if start else base
+                        for base, ops, start in zip(bases, operations, starts)], dtype=float).reshape(-1, 3)
+    tails = [ops[start:] for ops, start in zip(operations, starts)]
+    joints = None
+    if _check_timing(timing) == 'joint':
+        # The IK path runs over the whole operation list (each point continues the configuration of
+        # the points before it); the tail's first move is move 2 * start
+        travel, joint_v, joint_a = _joint_arrays(robots)
+        joints = ([t[2 * start:] for t, start in zip(travel, starts)], joint_v, joint_a)
+    trajectories, _, num_moves, joint_timed, finish_times = _plan_arrays(origins, tails, v_max, a_max, joints,
+                                                                          start_times)
+    if joints is not None:
+        count('joint_timed_moves', joint_timed)
+    count('segments_planned', sum(len(trajectory) for trajectory in trajectories))
+    debug("DEBUG: Planned %d moves of %d trajectory tails", num_moves, len(robots))
+    return trajectories, finish_times
+
+def _plan_group(args):
+    """Process pool task: plans one group of robots and returns (segment arrays, makespans, joint-timed moves)."""
+    bases, operations, v_max, a_max, joints = args
+    trajectories, makespans, _, joint_timed, _ = _plan_arrays(bases, operations, v_max, a_max, joints)
+    return [trajectory.to_array() for trajectory in trajectories], makespans, joint_timed
+
+def _check_timing(timing):
+    if timing not in TIMING_MODES:
+        raise ValueError(f"Unknown timing mode: {timing}")
+    return timing
+
+def _joint_arrays(robots):
+    """
+    Joint data for timing='joint': per-robot (2n x 6) joint travel in degrees of the moves
+    (base -> pick 1, pick 1 -> place 1, ...; NaN for moves without an IK path, which includes
+    the move from the base) and (K x 6) arrays of the joints' v_max (deg/s) and a_max (deg/s²).
+    """
+    params = np.array([robot.get('joint_params') or DEFAULT_JOINT_PARAMS for robot in robots],
+                      dtype=float).reshape(-1, 6, 4)
+    travel = []
+    for robot, joint_params in zip(robots, params):
+        picks, places, _ = operation_points(robot['operations'])
+        points = np.stack((picks, places), axis=1).reshape(-1, 3)
+        robot_travel = np.full((len(points), 6), np.nan)
+        if len(points):
+            robot_travel[1:] = _path_travel(robot, points, _ik_path(robot, points), joint_params)
+        travel.append(robot_travel)
+    return travel, params[:, :, 2], params[:, :, 3]
+
+def _ik_path(robot, points):
+    """
+    IK angles (M x 6 degrees, NaN where unreachable) of consecutive path points that change
+    the arm configuration as little as they can: the first reachable point takes its own
+    solution and every later one the solution nearest to the joints at the point before it.
+    A point only depends on the points before it.
+    """
+    angles, reached = solve_ik(robot, points)
+    angles[~reached] = np.nan
+    configurations, solved = ik_configurations(robot, points)
+    todo = np.arange(1, len(points))
+    while len(todo):
+        nearest = _nearest(configurations[:, todo], solved[:, todo], angles[todo - 1])
+        nearest = np.where(np.isnan(nearest), angles[todo], nearest)
+        changed = ~((nearest == angles[todo]) | (np.isnan(nearest) & np.isnan(angles[todo]))).all(axis=1)
+        angles[todo[changed]] = nearest[changed]
+        count('ik_configuration_switches', int(changed.sum()))
+        todo = todo[changed] + 1
+        todo = todo[todo < len(points)]
+    return angles
+
+def _nearest(configurations, solved, reference):
+    """Per target the solution (of C x m x 6 candidates) with the smallest largest joint change from `reference` (m x 6)."""
+    change = np.abs(configurations - reference).max(axis=2)
+    change[~solved] = np.nan
+    best = np.argmin(np.where(np.isnan(change), np.inf, change), axis=0)
+    nearest = configurations[best, np.arange(configurations.shape[1])]
+    nearest[np.isnan(change).all(axis=0)] = np.nan
+    return nearest
+
+def _path_travel(robot, points, angles, joint_params):
+    """
+    (M-1 x 6) joint travel in degrees of the straight-line moves between consecutive `points`
+    with IK `angles`: summed over JOINT_PATH_SAMPLES interior points, each at the solution
+    nearest to the joints at the one before it. NaN for moves with an end or a sample the arm
+    cannot reach.
+    """
+    fractions = np.arange(1, JOINT_PATH_SAMPLES + 1) / (JOINT_PATH_SAMPLES + 1)
+    targets = points[:-1, None] + fractions[:, None] * (points[1:] - points[:-1])[:, None]
+    configurations, solved = ik_configurations(robot, targets.reshape(-1, 3))
+    configurations = configurations.reshape(len(configurations), -1, JOINT_PATH_SAMPLES, 6)
+    solved = solved.reshape(len(solved), -1, JOINT_PATH_SAMPLES)
+
+    path = [angles[:-1]]
+    for k in range(JOINT_PATH_SAMPLES):
+        path.append(_nearest(configurations[:, :, k], solved[:, :, k], path[-1]))
+    path.append(angles[1:])
+    path = np.stack(path, axis=1)
+    travel = np.abs(_joint_delta(np.diff(path, axis=1), joint_params)).sum(axis=1)
+    ends = np.isfinite(angles[:-1] + angles[1:]).all(axis=1)
+    count('joint_path_unreachable', int((ends & np.isnan(travel).any(axis=1)).sum()))
+    return travel
+
+def _joint_delta(delta, joint_params):
+    """
+    Angle changes (degrees) wrapped to (-180, 180] for the joints whose limits allow a full
+    turn; a joint with a narrower range cannot pass through ±180 and travels the raw change.
+    """
+    full_turn = joint_params[:, 1] - joint_params[:, 0] >= 360.0
+    return np.where(full_turn, 180.0 - np.mod(180.0 - delta, 360.0), delta)
+
+def _slice_joints(joints, lo, hi):
+    if joints is None:
+        return None
+    travel, joint_v, joint_a = joints
+    return travel[lo:hi], joint_v[lo:hi], joint_a[lo:hi]
+
+def _synchronized_profiles(joints, distance, cartesian):
+    """
+    Joint-synchronized profiles of the (K x steps) move grid. Every joint gets the trapezoidal
+    time of its own angle travel; the move takes as long as the slowest joint and the tool
+    follows that joint's profile shape (same accel/cruise times) along the straight line.
+    Moves without an IK path keep their `cartesian` (t_acc, t_cruise, v_peak,
+    accel, duration). Returns the same tuple and the mask of joint-timed moves.
+    """
+    travel, joint_v, joint_a = joints
+    num_robots, num_moves = distance.shape
+    delta = np.zeros((num_robots, num_moves, 6))  # padding: no move
+    for k, robot_travel in enumerate(travel):
+        delta[k, :len(robot_travel)] = robot_travel
+
+    j_acc, j_cruise, _, j_time = move_profiles(delta, joint_v[:, None, :], joint_a[:, None, :])
+    timed = np.isfinite(j_time).all(axis=2)
+    slowest = np.argmax(np.where(timed[..., None], j_time, 0.0), axis=2)[..., None]
+    t_acc = np.take_along_axis(j_acc, slowest, axis=2)[..., 0]
+    t_cruise = np.take_along_axis(j_cruise, slowest, axis=2)[..., 0]
+    timed &= (t_acc > 0) & (distance >= 1e-10)
+
+    # Tool speed profile with the slowest joint's timing that covers the move's distance
+    t_acc = np.where(timed, t_acc, 1.0)
+    t_cruise = np.where(timed, t_cruise, 0.0)
+    v_peak = distance / (t_acc + t_cruise)
+    synchronized = (t_acc, t_cruise, v_peak, v_peak / t_acc, 2 * t_acc + t_cruise)
+    return tuple(np.where(timed, sync, cart) for sync, cart in zip(synchronized, cartesian)), timed
+
+def _robot_arrays(robots):
+    """Base points (K x 3) and per-robot (n x 7) operation arrays of robots in assignment order."""
+    bases = np.array([(robot['base_x'], robot['base_y'], robot['base_z']) for robot in robots],
+                     dtype=float).reshape(-1, 3)
+    operations = [np.column_stack(operation_points(robot['operations'])) for robot in robots]
+    return bases, operations
+
+def _plan_arrays(bases, operations, v_max, a_max, joints=None, start_times=None):
+    """
+    Batched planning on arrays: robot bases (K x 3) and per-robot (n x 7) operation arrays
+    (pick xyz, place xyz, t_i). `joints` (from _joint_arrays) switches to joint-synchronized
+    timing. `start_times` (K, default 0) are the times the robots leave their bases.
+    Returns (trajectories, makespans, number of moves, number of joint-timed moves,
+    per-robot arrays of operation finish times).
+    """
+    num_robots = len(bases)
+    counts = np.array([len(ops) for ops in operations], dtype=int)
+    width = int(counts.max()) if num_robots else 0
+
+    # Visited points per robot: base, pick 1, place 1, pick 2, place 2, ...
+    points = np.empty((num_robots, 2 * width + 1, 3))
+    dwell = np.zeros((num_robots, 2 * width))
+    for k, ops in enumerate(operations):
+        points[k, :] = bases[k]
+        if counts[k]:
+            points[k, 1:2 * counts[k] + 1:2] = ops[:, 0:3]
+            points[k, 2:2 * counts[k] + 1:2] = ops[:, 3:6]
+            points[k, 2 * counts[k] + 1:] = ops[-1, 3:6]
+            dwell[k, :2 * counts[k]] = np.repeat(ops[:, 6], 2)
+    start = points[:, :-1]
+    end = points[:, 1:]
+    delta = end - start
+    distance = np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2 + delta[..., 2] ** 2)
+    moving = distance >= 1e-10
+    t_acc, t_cruise, v_peak, duration = move_profiles(distance, v_max, a_max)
+    accel = np.full(distance.shape, float(a_max))
+    joint_timed = 0
+    if joints is not None:
+        (t_acc, t_cruise, v_peak, accel, duration), timed = _synchronized_profiles(
+            joints, distance, (t_acc, t_cruise, v_peak, accel, duration))
+        joint_timed = int(timed.sum())
+    duration = np.where(moving, duration, 0.0)
+
+    # Steps alternate move, dwell, move, dwell, ...; the start time of a step is the sum before it
+    steps = np.stack((duration, dwell), axis=2).reshape(num_robots, -1)
+    offset = np.zeros((num_robots, 1)) if start_times is None else np.asarray(start_times, dtype=float).reshape(-1, 1)
+    finish = offset + np.cumsum(steps, axis=1)
+    begin = np.concatenate((offset, finish[:, :-1]), axis=1)
+    keep = np.stack((moving, dwell > 0), axis=2).reshape(num_robots, -1)
+    keep &= np.arange(keep.shape[1]) < 4 * counts[:, None]
+
+    # Per-step segment columns (a dwell rests at the end point of the move before it)
+    seg_start = np.stack((start, end), axis=2).reshape(num_robots, -1, 3)
+    seg_end = np.repeat(end, 2, axis=1)
+    is_move = np.zeros(keep.shape[1], dtype=bool)
+    is_move[0::2] = True
+    seg_t_acc = np.where(is_move, np.repeat(t_acc, 2, axis=1), 0.0)
+    seg_t_cruise = np.where(is_move, np.repeat(t_cruise, 2, axis=1), np.repeat(dwell, 2, axis=1))
+    seg_v_peak = np.where(is_move, np.repeat(v_peak, 2, axis=1), 0.0)
+    seg_accel = np.where(is_move, np.repeat(accel, 2, axis=1), 0.0)
+
+    trajectories = []
+    makespans = []
+    finish_times = []
+    for k in range(num_robots):
+        sel = keep[k]
+        trajectories.append(Trajectory(points[k, 0], begin[k, sel], seg_start[k, sel], seg_end[k, sel],
+                                       seg_t_acc[k, sel], seg_t_cruise[k, sel], seg_v_peak[k, sel],
+                                       seg_accel[k, sel]))
+        makespans.append(float(finish[k, 4 * counts[k] - 1]) if counts[k] else float(offset[k, 0]))
+        finish_times.append(finish[k, 3:4 * counts[k]:4])
+    return trajectories, makespans, int(moving.sum()), joint_timed, finish_times
@@ -3,55 +3,24 @@ import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 from matplotlib.patches import Circle
 import numpy as np
+from interpolation import interpolate
+from output_parser import parse_output_file
 
 def parse_output(filename):
     """
-    Parses the output file generated by the main algorithm.
+    Parses the output file generated by the main algorithm (text or binary).
     Returns: robots_data dictionary, makespan
     """
+    parsed = parse_output_file(filename)
     robots_data = {}
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-    
-    makespan_ms = float(lines[0].strip())
-    makespan = makespan_ms / 1000.0  # Convert to seconds
-
-    index = 1
-    while index < len(lines):
-        line = lines[index].strip()
-        if line.startswith('R'):
-            # This is a robot header line: "R1 15"
-            parts = line.split()
-            robot_id = parts[0]
-            num_waypoints = int(parts[1])
-            
-            times = []
-            x_pos = []
-            y_pos = []
-            z_pos = []
-            
-            # Read the next 'num_waypoints' lines
-            for i in range(1, num_waypoints + 1):
-                data_line = lines[index + i].split()
-                t = float(data_line[0]) / 1000.0  # ms -> seconds
-                x = float(data_line[1])
-                y = float(data_line[2])
-                z = float(data_line[3])
-                times.append(t)
-                x_pos.append(x)
-                y_pos.append(y)
-                z_pos.append(z)
-            
-            robots_data[robot_id] = {
-                'times': np.array(times),
-                'x': np.array(x_pos),
-                'y': np.array(y_pos),
-                'z': np.array(z_pos)
-            }
-            index += num_waypoints + 1  # Move index to the next robot header
-        else:
-            index += 1
-
+    for robot_id, waypoints in parsed['robots'].items():
+        robots_data[robot_id] = {
+            'times': waypoints[:, 0] / 1000.0,  # ms -> seconds
+            'x': waypoints[:, 1],
+            'y': waypoints[:, 2],
+            'z': waypoints[:, 3]
+        }
+    makespan = parsed['makespan'] / 1000.0  # Convert to seconds
     return robots_data, makespan
 
 def get_position_at_time(robot_data, t):
@@ -59,28 +28,8 @@ def get_position_at_time(robot_data, t):
     Gets the (x, y) position of a robot at time t by interpolating between waypoints.
     Returns a tuple (x, y) which is a valid sequence.
     """
-    times = robot_data['times']
-    x_vals = robot_data['x']
-    y_vals = robot_data['y']
-    
-    # If time is before first waypoint, return first position
-    if t <= times[0]:
-        return (x_vals[0], y_vals[0]) # FIX: Return a tuple
-    # If time is after last waypoint, return last position
-    if t >= times[-1]:
-        return (x_vals[-1], y_vals[-1]) # FIX: Return a tuple
-    
-    # Find the index where the time would be inserted (finds the segment)
-    idx = np.searchsorted(times, t) - 1
-    # Linear interpolation
-    t_start, t_end = times[idx], times[idx+1]
-    x_start, x_end = x_vals[idx], x_vals[idx+1]
-    y_start, y_end = y_vals[idx], y_vals[idx+1]
-    
-    frac = (t - t_start) / (t_end - t_start)
-    x = x_start + frac * (x_end - x_start)
-    y = y_start + frac * (y_end - y_start)
-    return (x, y) # This was already correct
+    # Shared bisection-based lookup; holds the first/last position outside the schedule
+    return interpolate(robot_data['times'], (robot_data['x'], robot_data['y']), t)
 
 # --- Main Visualization Function ---
 def animate_simulation(output_file='output.txt', tool_clearance=0.2, safe_dist=0.1):
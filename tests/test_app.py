@@ -0,0 +1,44 @@
+# test_app.py
+import time
+import pytest
+import app
+from app import parse_solver_options
+from result_cache import cache_key
+from scenario_generator import generate_scenario
+
+SESSION_REQUEST = {'scenario': generate_scenario(4, 40, density=1.5, seed=0), 'options': {'sequencing': False}}
+
+def test_default_options_share_a_cache_key():
+    spelled_out = {'collision_mode': 'exact', 'assignment': 'balanced', 'sequencing': True, 'timing': 'cartesian'}
+    assert parse_solver_options({}) == parse_solver_options({'options': spelled_out}) == spelled_out
+    assert cache_key('1 0', parse_solver_options({})) == cache_key('1 0', parse_solver_options({'options': spelled_out}))
+
+@pytest.mark.parametrize('options', [{'sequencing': 1}, {'sequencing': 0}, {'timing': 'fast'}, {'speed': 2}, ['exact']])
+def test_invalid_options_are_rejected(options):
+    with pytest.raises(ValueError):
+        parse_solver_options({'options': options})
+
+def _wait_for_jobs():
+    deadline = time.time() + 30
+    while app.job_manager.stats()['running'] + app.job_manager.stats()['queued'] and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_session_runs_as_a_job():
+    client = app.app.test_client()
+    created = client.post('/api/sessions', json=dict(SESSION_REQUEST, resolve=True))
+    assert created.status_code == 201
+    session_id = created.get_json()['session_id']
+    assert session_id in app.sessions
+    invalid = client.post(f'/api/sessions/{session_id}/deltas', json={'deltas': [{'action': 'remove', 'id': [1]}]})
+    assert invalid.status_code == 400
+    resolved = client.get(f'/api/sessions/{session_id}?resolve=1')
+    assert resolved.status_code == 200
+    assert resolved.get_json()['metadata']['waits'] == created.get_json()['metadata']['waits']
+
+def test_session_timeout_cancels_and_drops_it(monkeypatch):
+    monkeypatch.setattr(app, 'SCHEDULER_TIMEOUT', 0)
+    sessions = set(app.sessions)
+    response = app.app.test_client().post('/api/sessions', json=SESSION_REQUEST)
+    assert response.status_code == 500 and 'timed out' in response.get_json()['error']
+    _wait_for_jobs()
+    assert set(app.sessions) == sessions
@@ -0,0 +1,114 @@
+# test_collision_checker.py
+import numpy as np
+import pytest
+from scenario_generator import generate_scenario
+from input_parser import parse_input
+from pipeline import run_pipeline
+from scheduler import assign_operations, plan_paths
+from collision_checker import (check_collisions, resolve_conflicts, broadphase_pairs, find_collision_intervals,
+                               _robot_schedules, _first_conflict, _forget)
+from instrumentation import Recorder, use
+
+def _planned(density, seed, num_operations=40):
+    """A generated 4-robot cell after planning (sequencing is off: its time budget is not reproducible)."""
+    robots, operations, tool_clearance, safe_dist, v_max, a_max = parse_input(
+        generate_scenario(4, num_operations, density=density, seed=seed), is_filename=False)
+    with use(Recorder('quiet')):
+        collisions, summary = run_pipeline(robots, operations, tool_clearance, safe_dist, v_max, a_max,
+                                           sequencing=False)
+    return robots, tool_clearance, safe_dist, collisions, summary['conflict_resolution']
+
+def _assigned(num_robots, density, seed=0, num_operations=40):
+    """A generated cell after assignment and path planning, before any collision handling."""
+    robots, operations, tool_clearance, safe_dist, v_max, a_max = parse_input(
+        generate_scenario(num_robots, num_operations, density=density, seed=seed), is_filename=False)
+    with use(Recorder('quiet')):
+        assign_operations(robots, operations, v_max, a_max, strategy='balanced')
+        plan_paths(robots, v_max, a_max)
+    return robots, tool_clearance, safe_dist
+
+@pytest.mark.parametrize('num_robots, density', [(4, 1.5), (8, 1.0)])
+def test_vectorized_check_matches_sampled(num_robots, density):
+    robots, tool_clearance, safe_dist = _assigned(num_robots, density)
+    with use(Recorder('quiet')):
+        sampled = check_collisions(robots, tool_clearance, safe_dist, mode='sampled')
+        vectorized = check_collisions(robots, tool_clearance, safe_dist, mode='vectorized')
+    assert sampled
+    # Same events; the sampled loop accumulates its ticks, so their times differ by rounding only
+    assert [event[1:] for event in vectorized] == [event[1:] for event in sampled]
+    assert [event[0] for event in vectorized] == pytest.approx([event[0] for event in sampled], rel=0, abs=1e-9)
+
+def test_broadphase_keeps_every_colliding_pair():
+    robots, tool_clearance, safe_dist = _assigned(8, 1.0)
+    with use(Recorder('quiet')):
+        collisions = check_collisions(robots, tool_clearance, safe_dist, mode='exact')
+        pairs, rejected = broadphase_pairs(robots, 2 * tool_clearance + safe_dist)
+    index = {robot['id']: k for k, robot in enumerate(robots)}
+    colliding = {(index[robot_i], index[robot_j]) for _, _, robot_i, robot_j, _ in collisions}
+    assert colliding and rejected > 0
+    assert colliding <= set(pairs)
+
+@pytest.mark.parametrize('seed', [0, 1, 2, 3])
+def test_resolver_clears_dense_cell(seed):
+    robots, tool_clearance, safe_dist, collisions, report = _planned(2.0, seed)
+    assert collisions
+    assert check_collisions(robots, tool_clearance, safe_dist, mode='exact') == []
+    assert report['unresolved'] == 0 and report['remaining'] == []
+
+def test_resolver_reports_what_waiting_cannot_clear():
+    # Bases 0.67 m apart: some robots stand in each other's paths and waiting alone cannot help
+    robots, tool_clearance, safe_dist, _, report = _planned(3.0, 0)
+    remaining = check_collisions(robots, tool_clearance, safe_dist, mode='exact')
+    assert remaining
+    assert report['remaining'] == remaining and report['unresolved'] == len(remaining)
+
+def test_incremental_conflict_search_matches_a_full_check():
+    robots, tool_clearance, safe_dist = _assigned(4, 2.0, seed=1)
+    schedules, margin = _robot_schedules(robots)
+    min_safe_distance = 2 * tool_clearance + safe_dist + margin
+    schedule = schedules[0].copy()
+    committed = [(robot['id'], other) for robot, other in zip(robots[1:], schedules[1:])]
+
+    def full_search(t_start):
+        first = None
+        for other_id, other in committed:
+            t_end = max(schedule.makespan, other.makespan, t_start)
+            intervals = [(start, end) for start, end, _ in find_collision_intervals(schedule, other, min_safe_distance,
+                                                                                    t_end, t_start)
+                         if end > t_start + 1e-6]
+            if intervals and (first is None or intervals[0][0] < first[0]):
+                first = (*intervals[0], other_id)
+        return first
+
+    known = {}
+    t_search = 0.0
+    for _ in range(20):
+        conflict = _first_conflict(schedule, committed, min_safe_distance, t_search, known=known)
+        expected = full_search(t_search)
+        assert (conflict is None) == (expected is None)
+        if conflict is None:
+            break
+        assert conflict[2] == expected[2] and conflict[:2] == pytest.approx(expected[:2], rel=0, abs=1e-9)
+        # Wait before the conflict and search on from there, as the resolver does
+        stop = max(int(np.searchsorted(schedule.times, conflict[0], side='right')) - 2, 0)
+        schedule.insert_wait(stop, 0.5)
+        t_search = float(schedule.times[stop])
+        _forget(known, t_search)
+
+def test_resolver_checkpoint_aborts_between_conflicts():
+    robots, tool_clearance, safe_dist = _assigned(4, 2.0, seed=1)
+    with use(Recorder('quiet')):
+        collisions = check_collisions(robots, tool_clearance, safe_dist, mode='exact')
+        calls = []
+
+        class Cancelled(Exception):
+            pass
+
+        def checkpoint():
+            calls.append(None)
+            if len(calls) == 3:
+                raise Cancelled()
+
+        with pytest.raises(Cancelled):
+            resolve_conflicts(robots, tool_clearance, safe_dist, collisions, checkpoint=checkpoint)
+    assert len(calls) == 3
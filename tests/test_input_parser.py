@@ -0,0 +1,38 @@
+# test_input_parser.py
+import numpy as np
+import pytest
+from input_parser import load_scenario, iter_operation_chunks
+from scenario_generator import generate_scenario
+
+SCENARIO = generate_scenario(2, 4, seed=0)
+HEADER_LINES = 1 + 2 + 6 + 1  # counts, 2 bases, 6 joints, safety line
+
+def _with_operation_lines(operation_lines):
+    return "\n".join(SCENARIO.splitlines()[:HEADER_LINES] + operation_lines) + "\n"
+
+def _chunks(scenario, chunk_size=3):
+    return np.vstack([chunk for _, chunk in iter_operation_chunks(scenario, chunk_size, is_filename=False)])
+
+@pytest.mark.filterwarnings('error')
+def test_blank_lines_between_operations_are_skipped():
+    operations = SCENARIO.splitlines()[HEADER_LINES:]
+    scenario = _with_operation_lines(operations[:1] + ["", "   "] + operations[1:3] + ["\t"] + operations[3:])
+    expected = load_scenario(SCENARIO, is_filename=False)[1]
+    assert np.array_equal(load_scenario(scenario, is_filename=False)[1], expected)
+    assert np.array_equal(_chunks(scenario), expected)
+
+def test_short_operation_line_names_its_line():
+    operations = SCENARIO.splitlines()[HEADER_LINES:]
+    scenario = _with_operation_lines(operations[:1] + [""] + ["1.0 2.0 3.0"] + operations[2:])
+    with pytest.raises(ValueError, match="line 13: expected 7 values, found 3"):
+        load_scenario(scenario, is_filename=False)
+    with pytest.raises(ValueError, match="line 13"):
+        _chunks(scenario)
+
+def test_truncated_file_reports_missing_operations(tmp_path):
+    path = tmp_path / 'truncated.txt'
+    path.write_text(_with_operation_lines(SCENARIO.splitlines()[HEADER_LINES:HEADER_LINES + 2]))
+    with pytest.raises(ValueError, match="expected 4 operations, found 2"):
+        load_scenario(str(path))
+    with pytest.raises(ValueError, match="expected 4 operations, found 2"):
+        list(iter_operation_chunks(str(path), chunk_size=3))
@@ -0,0 +1,43 @@
+# test_interpolation.py
+import numpy as np
+import pytest
+from interpolation import interpolate, interpolate_many, schedule_position_at, ScheduleCursor, find_segment
+from schedule import Schedule
+
+# Moves to x=1, dwells (zero-distance segment), then jumps in zero time (zero-duration segment)
+WAYPOINTS = [
+    (0.0, 0.0, 0.0, 0.0),
+    (1.0, 1.0, 0.0, 0.0),
+    (2.0, 1.0, 0.0, 0.0),
+    (2.0, 1.0, 2.0, 0.0),
+    (3.0, 1.0, 2.0, 3.0),
+]
+TIMES = [wp[0] for wp in WAYPOINTS]
+COLUMNS = [[wp[k] for wp in WAYPOINTS] for k in (1, 2, 3)]
+
+def test_zero_duration_segment_takes_the_last_waypoint():
+    assert find_segment(TIMES, 2.0) == 3
+    assert interpolate(TIMES, COLUMNS, 2.0) == (1.0, 2.0, 0.0)
+    assert interpolate(TIMES, COLUMNS, 1.5) == (1.0, 0.0, 0.0)
+    assert interpolate(TIMES, COLUMNS, 2.5) == (1.0, 2.0, 1.5)
+
+def test_outside_the_schedule_holds_first_and_last_waypoint():
+    assert interpolate(TIMES, COLUMNS, -1.0) == (0.0, 0.0, 0.0)
+    assert interpolate(TIMES, COLUMNS, 10.0) == (1.0, 2.0, 3.0)
+    for schedule in (WAYPOINTS, Schedule.from_waypoints(WAYPOINTS)):
+        assert schedule_position_at(schedule, -1.0) == pytest.approx((0.0, 0.0, 0.0))
+        assert schedule_position_at(schedule, 10.0) == pytest.approx((1.0, 2.0, 3.0))
+
+@pytest.mark.parametrize('schedule', [WAYPOINTS, Schedule.from_waypoints(WAYPOINTS)])
+def test_all_lookups_agree(schedule):
+    query_times = np.linspace(-0.5, 3.5, 81)
+    expected = np.array([interpolate(TIMES, COLUMNS, t) for t in query_times])
+    assert np.allclose(interpolate_many(TIMES, COLUMNS, query_times), expected)
+    assert np.allclose([schedule_position_at(schedule, t) for t in query_times], expected)
+
+def test_cursor_going_backwards_matches_bisection():
+    cursor = ScheduleCursor.from_schedule(WAYPOINTS)
+    rng = np.random.default_rng(0)
+    query_times = np.concatenate((np.linspace(-0.5, 3.5, 41), rng.uniform(-0.5, 3.5, 40), [2.0, 0.5, 2.0]))
+    for t in query_times:
+        assert cursor.position_at(t) == interpolate(TIMES, COLUMNS, t)
@@ -0,0 +1,31 @@
+# test_kinematics.py
+import numpy as np
+from kinematics import IKCache, solve_ik, forward_kinematics
+
+ROBOT = {'base_x': 0.0, 'base_y': 0.0, 'base_z': 0.0}
+
+# Two targets 0.6 mm apart near the joint limits: a cold solve reaches only the second one,
+# a warm start from its solution would also reach the first
+UNREACHABLE = [-1.5132538095575847, 0.12198478294543993, -1.4941561099795115]
+REACHABLE = [-1.513036844296582, 0.12205627640981881, -1.4936283596443811]
+
+def test_reachability_does_not_depend_on_query_order():
+    assert solve_ik(ROBOT, [UNREACHABLE, REACHABLE], cache=None)[1].tolist() == [False, True]
+    for order in ([UNREACHABLE, REACHABLE], [REACHABLE, UNREACHABLE]):
+        cache = IKCache()
+        reached = {tuple(target): bool(solve_ik(ROBOT, [target], cache=cache)[1][0]) for target in order}
+        assert reached == {tuple(UNREACHABLE): False, tuple(REACHABLE): True}
+        assert solve_ik(ROBOT, [UNREACHABLE, REACHABLE], cache=cache)[1].tolist() == [False, True]
+
+def test_cached_solutions_reach_their_targets():
+    rng = np.random.default_rng(2)
+    directions = rng.normal(size=(500, 3))
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    targets = directions * rng.uniform(0.0, 2.3, (500, 1))
+    cache = IKCache()
+    expected = solve_ik(ROBOT, targets, cache=cache)[1]
+    angles, reached = solve_ik(ROBOT, targets, cache=cache)
+    assert np.array_equal(reached, expected)
+    assert cache.stats()['entries'] == reached.sum() and cache.stats()['hits'] == reached.sum()
+    error = np.linalg.norm(forward_kinematics(ROBOT, angles[reached]) - targets[reached], axis=1)
+    assert error.max() <= 1e-3
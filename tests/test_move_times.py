@@ -0,0 +1,18 @@
+# test_move_times.py
+import numpy as np
+from move_times import MoveTimeMatrix
+from scheduler import estimate_completion_times
+from trajectory_planner import plan_trajectories
+from scenario_generator import generate_scenario
+from input_parser import parse_input
+
+def test_estimates_match_planned_makespans():
+    # Moves on both sides of the triangle/trapezoid threshold (v_max^2 / a_max ~ 0.31 m here)
+    robots, operations, _, _, v_max, a_max = parse_input(generate_scenario(2, 40, seed=5), is_filename=False)
+    for k, robot in enumerate(robots):
+        robot['operations'] = operations[k::len(robots)]
+    move_times = MoveTimeMatrix(robots, operations, v_max, a_max)
+    estimates = estimate_completion_times(robots, v_max, a_max, move_times)
+    plan_trajectories(robots, v_max, a_max)
+    for robot in robots:
+        assert np.isclose(estimates[robot['id']], robot['makespan'], rtol=0, atol=1e-9)
@@ -0,0 +1,50 @@
+# test_output_generator.py
+import numpy as np
+from output_generator import write_output, read_output_binary, is_binary_output, format_output
+from output_parser import parse_output_content
+from scenario_generator import generate_scenario
+from input_parser import parse_input
+from scheduler import assign_operations, plan_paths
+from motion import robot_schedule
+from instrumentation import Recorder, use
+
+def _planned_robots():
+    robots, operations, _, _, v_max, a_max = parse_input(generate_scenario(3, 12, seed=2), is_filename=False)
+    with use(Recorder('quiet')):
+        assign_operations(robots, operations, v_max, a_max, strategy='balanced')
+        plan_paths(robots, v_max, a_max)
+    return robots
+
+def test_binary_output_round_trip(tmp_path):
+    robots = _planned_robots()
+    path = tmp_path / 'output.bin'
+    write_output(robots, str(path), binary=True)
+    assert is_binary_output(str(path))
+
+    makespan, schedules = read_output_binary(str(path))
+    assert list(schedules) == [f"R{k + 1}" for k in range(len(robots))]
+    assert makespan == max(robot['makespan'] for robot in robots) * 1000
+    for robot, waypoints in zip(robots, schedules.values()):
+        schedule = robot_schedule(robot)
+        assert np.array_equal(waypoints[:, 0], schedule.times * 1000)
+        assert np.array_equal(waypoints[:, 1:], schedule.positions)
+
+def test_binary_output_matches_text_output(tmp_path):
+    robots = _planned_robots()
+    path = tmp_path / 'output.bin'
+    write_output(robots, str(path), binary=True)
+    makespan, schedules = read_output_binary(str(path))
+    text = parse_output_content(format_output(robots))
+    assert abs(text['makespan'] - makespan) <= 5e-7
+    assert text['robots'].keys() == schedules.keys()
+    for robot_id, waypoints in schedules.items():
+        assert np.allclose(text['robots'][robot_id], waypoints, rtol=0, atol=5e-7)
+
+def test_empty_schedules_round_trip(tmp_path):
+    robots = [{'id': 'R1', 'schedule': []}, {'id': 'R2', 'schedule': [(0.0, 1.0, 2.0, 3.0), (1.5, 1.0, 2.0, 4.0)]}]
+    path = tmp_path / 'output.bin'
+    write_output(robots, str(path), binary=True)
+    makespan, schedules = read_output_binary(str(path))
+    assert makespan == 1500.0
+    assert schedules['R1'].shape == (0, 4)
+    assert schedules['R2'].tolist() == [[0.0, 1.0, 2.0, 3.0], [1500.0, 1.0, 2.0, 4.0]]
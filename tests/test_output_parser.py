@@ -0,0 +1,61 @@
+# test_output_parser.py
+import numpy as np
+import pytest
+from output_generator import write_output
+from output_parser import OutputFormatError, parse_output_content, parse_output_file
+
+VALID = "1500.000000\nR1 2\n0.000000 1.0 2.0 3.0\n1500.000000 1.0 2.0 4.0\nR2 0\n"
+
+def test_parses_valid_output():
+    result = parse_output_content(VALID)
+    assert result['makespan'] == 1500.0
+    assert result['num_robots'] == 2 and result['num_waypoints'] == 2
+    assert result['robots']['R1'].tolist() == [[0.0, 1.0, 2.0, 3.0], [1500.0, 1.0, 2.0, 4.0]]
+    assert result['robots']['R2'].shape == (0, 4)
+
+@pytest.mark.parametrize('content, message', [
+    ("", "output is empty"),
+    ("\n  \n", "output is empty"),
+    ("abc\nR1 0\n", "line 1: invalid makespan 'abc'"),
+    ("10.0\nX1 1\n0 0 0 0\n", "line 2: expected a robot header"),
+    ("10.0\nR1\n", "line 2: expected a robot header"),
+    ("10.0\nR1 two\n", "line 2: invalid waypoint count 'two'"),
+    ("10.0\nR1 -1\n", "line 2: negative waypoint count -1"),
+    ("10.0\nR1 3\n0 0 0 0\n10 1 1 1\n", "R1 declares 3 waypoints but the output ends after 2"),
+    ("10.0\nR1 1\n0 0 zero 0\n", "invalid waypoint line"),
+    ("10.0\nR1 1\n0 0 0\n", "waypoint lines must have 4 columns"),
+    ("\n10.0\n\nR1 1\n0 0 0 0\n\nR2 x\n", "line 7: invalid waypoint count 'x'"),
+])
+def test_malformed_text_output(content, message):
+    with pytest.raises(OutputFormatError, match=message):
+        parse_output_content(content)
+
+def test_format_error_is_a_value_error():
+    with pytest.raises(ValueError):
+        parse_output_content("abc\n")
+
+def test_parse_file_reads_text_and_binary(tmp_path):
+    robots = [{'id': 'R1', 'schedule': [(0.0, 1.0, 2.0, 3.0), (1.5, 1.0, 2.0, 4.0)]}, {'id': 'R2', 'schedule': []}]
+    text_path, binary_path = tmp_path / 'output.txt', tmp_path / 'output.bin'
+    write_output(robots, str(text_path))
+    write_output(robots, str(binary_path), binary=True)
+    text, binary = parse_output_file(str(text_path)), parse_output_file(str(binary_path))
+    assert text['makespan'] == binary['makespan'] == 1500.0
+    assert text['num_waypoints'] == binary['num_waypoints'] == 2
+    for robot_id in ('R1', 'R2'):
+        assert np.array_equal(text['robots'][robot_id], binary['robots'][robot_id])
+
+def test_truncated_binary_output(tmp_path):
+    robots = [{'id': 'R1', 'schedule': [(0.0, 1.0, 2.0, 3.0), (1.5, 1.0, 2.0, 4.0)]}]
+    path = tmp_path / 'output.bin'
+    write_output(robots, str(path), binary=True)
+    data = path.read_bytes()
+    path.write_bytes(data[:-8])
+    with pytest.raises(OutputFormatError, match="truncated \\(records of R1\\)"):
+        parse_output_file(str(path))
+    path.write_bytes(data[:30])
+    with pytest.raises(OutputFormatError, match="truncated \\(robot table\\)"):
+        parse_output_file(str(path))
+    path.write_bytes(data[:12])
+    with pytest.raises(OutputFormatError, match="too short"):
+        parse_output_file(str(path))
@@ -0,0 +1,70 @@
+# test_planning_session.py
+import random
+import numpy as np
+import pytest
+from planning_session import PlanningSession, OPERATION_FIELDS
+from trajectory_planner import plan_trajectories
+from collision_checker import find_collision_intervals
+from scenario_generator import generate_scenario
+from motion import COLLISION_TOLERANCE
+
+def _random_delta(session, rng):
+    ids = list(session.operations)
+    kind = rng.choice(['add', 'remove', 'move', 'dwell'])
+    if kind == 'add':
+        source = session.operations[rng.choice(ids)]
+        return {'action': 'add', 'operation': {field: source[field] + (rng.uniform(-0.2, 0.2) if field != 't_i' else 0.0)
+                                               for field in OPERATION_FIELDS}}
+    if kind == 'remove':
+        return {'action': 'remove', 'id': rng.choice(ids)}
+    if kind == 'move':
+        return {'action': 'update', 'id': rng.choice(ids), 'pick_x': session.operations[rng.choice(ids)]['pick_x']}
+    return {'action': 'update', 'id': rng.choice(ids), 't_i': rng.uniform(0.1, 2.0)}
+
+def _assert_matches_full_plan(session, timing):
+    """The session's plan and collisions equal a re-plan of its current assignment from scratch."""
+    robots = [dict(robot, operations=list(robot['operations'])) for robot in session.robots]
+    trajectories = plan_trajectories(robots, session.v_max, session.a_max, timing)
+    times = np.linspace(0.0, session.makespan, 2000)
+    for robot, replanned, trajectory in zip(session.robots, robots, trajectories):
+        assert robot['makespan'] == pytest.approx(replanned['makespan'], rel=0, abs=1e-9)
+        assert np.allclose(robot['trajectory'].positions_at(times), trajectory.positions_at(times), rtol=0, atol=1e-9)
+
+    schedules = [trajectory.sample(COLLISION_TOLERANCE) for trajectory in trajectories]
+    horizon = max(robot['makespan'] for robot in robots)
+    ids = [robot['id'] for robot in robots]
+    expected = sorted((start, end, ids[i], ids[j], min_distance)
+                      for i in range(len(robots)) for j in range(i + 1, len(robots))
+                      for start, end, min_distance in find_collision_intervals(
+                          schedules[i], schedules[j], session._min_safe_distance, horizon))
+    found = session.collisions
+    assert [interval[2:4] for interval in found] == [interval[2:4] for interval in expected]
+    assert np.allclose([interval[:2] for interval in found], [interval[:2] for interval in expected],
+                       rtol=0, atol=1e-6)
+
+@pytest.mark.parametrize('timing', ['cartesian', 'joint'])
+def test_deltas_match_a_full_replan(timing):
+    session = PlanningSession.from_scenario(generate_scenario(4, 120, density=1.5, seed=3), sequencing=False,
+                                            timing=timing)
+    _assert_matches_full_plan(session, timing)
+    rng = random.Random(1)
+    for _ in range(30):
+        session.apply([_random_delta(session, rng)])
+        _assert_matches_full_plan(session, timing)
+
+@pytest.mark.parametrize('delta', [
+    {'action': 'update', 'id': 1, 't_i': 'nan'},
+    {'action': 'update', 'id': 1, 'pick_x': float('inf')},
+    {'action': 'update', 'id': 1, 't_i': '-inf'},
+    {'action': 'update', 'id': [1], 't_i': 1.0},
+    {'action': 'remove', 'id': True},
+    {'action': 'add', 'operation': dict.fromkeys(OPERATION_FIELDS, 0.5) | {'id': [1]}},
+    {'action': 'add', 'operation': dict.fromkeys(OPERATION_FIELDS, 0.5) | {'place_z': 'nan'}},
+    {'action': 'add', 'operation': [0.5] * len(OPERATION_FIELDS)},
+])
+def test_invalid_deltas_are_rejected(delta):
+    session = PlanningSession.from_scenario(generate_scenario(2, 6, seed=0), sequencing=False)
+    operations = dict(session.operations)
+    with pytest.raises(ValueError):
+        session.apply([delta])
+    assert session.operations == operations
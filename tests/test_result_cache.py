@@ -0,0 +1,53 @@
+# test_result_cache.py
+import result_cache
+from result_cache import ResultCache, cache_key
+
+SCENARIO = "2 1\n0 0 0\n2.5 0 0\n0.25 0.5\n1.0 1.0 0.5  1.5 1.5 0.5  2.0\n"
+
+def test_key_ignores_whitespace_and_blank_lines():
+    messy = "2   1\n\n0 0 0\n  2.5 0 0\n0.25\t0.5\n\n1.0 1.0 0.5 1.5 1.5 0.5 2.0\n\n"
+    assert cache_key(messy) == cache_key(SCENARIO)
+
+def test_key_depends_on_options_and_content():
+    assert cache_key(SCENARIO, {'collision_mode': 'exact'}) != cache_key(SCENARIO, {'collision_mode': 'sampled'})
+    assert cache_key(SCENARIO) != cache_key(SCENARIO.replace('2.0\n', '2.5\n'))
+
+def test_key_changes_with_cache_version(monkeypatch):
+    before = cache_key(SCENARIO)
+    monkeypatch.setattr(result_cache, 'CACHE_VERSION', result_cache.CACHE_VERSION + 1)
+    assert cache_key(SCENARIO) != before
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['hits'] == 3 and stats['misses'] == 1
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    cache = ResultCache(ttl=10.0)
+    cache.put('a', 1)
+    now[0] += 9.0
+    assert cache.get('a') == 1
+    now[0] += 2.0
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+def test_disk_tier_survives_restart_and_expires(tmp_path, monkeypatch):
+    cache = ResultCache(ttl=60.0, disk_dir=str(tmp_path))
+    cache.put('key', {'makespan': 1.5})
+    restarted = ResultCache(ttl=60.0, disk_dir=str(tmp_path))
+    assert restarted.get('key') == {'makespan': 1.5}
+    assert restarted.stats()['disk_hits'] == 1
+
+    later = result_cache.time.time() + 120.0
+    monkeypatch.setattr(result_cache.time, 'time', lambda: later)
+    expired = ResultCache(ttl=60.0, disk_dir=str(tmp_path))
+    assert expired.get('key') is None
+    assert not (tmp_path / 'key.json').exists()
@@ -0,0 +1,44 @@
+# test_schedule.py
+import numpy as np
+from schedule import Schedule
+
+def _schedule():
+    # Move, dwell at (1, 0, 0), move on
+    return Schedule.from_waypoints([(0.0, 0.0, 0.0, 0.0), (1.0, 1.0, 0.0, 0.0), (2.0, 1.0, 0.0, 0.0),
+                                    (3.0, 1.0, 1.0, 0.0)])
+
+def test_slices_are_views():
+    schedule = _schedule()
+    window = schedule[1:3]
+    assert isinstance(window, Schedule) and window.to_list() == schedule.to_list()[1:3]
+    window.shift(0.5)
+    assert schedule.times.tolist() == [0.0, 1.5, 2.5, 3.0]
+    assert schedule[-1] == (3.0, 1.0, 1.0, 0.0)
+
+def test_shift_moves_every_waypoint():
+    schedule = _schedule()
+    schedule.shift(2.0)
+    assert schedule.times.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert schedule.makespan == 5.0
+
+def test_insert_wait_lengthens_an_existing_dwell():
+    schedule = _schedule()
+    schedule.insert_wait(1, 0.5)
+    assert schedule.to_list() == [(0.0, 0.0, 0.0, 0.0), (1.0, 1.0, 0.0, 0.0), (2.5, 1.0, 0.0, 0.0),
+                                  (3.5, 1.0, 1.0, 0.0)]
+
+def test_insert_wait_adds_a_waypoint_where_the_wait_ends():
+    schedule = Schedule(capacity=1)
+    for waypoint in _schedule():
+        schedule.append(*waypoint)
+    schedule.insert_wait(2, 0.25)
+    schedule.insert_wait(0, 1.0)
+    assert schedule.to_list() == [(0.0, 0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0), (2.0, 1.0, 0.0, 0.0),
+                                  (3.0, 1.0, 0.0, 0.0), (3.25, 1.0, 0.0, 0.0), (4.25, 1.0, 1.0, 0.0)]
+
+def test_insert_wait_ignores_non_positive_durations():
+    schedule = _schedule()
+    schedule.insert_wait(1, 0.0)
+    schedule.insert_wait(1, -1.0)
+    assert schedule.to_list() == _schedule().to_list()
+    assert np.array_equal(schedule.times, [0.0, 1.0, 2.0, 3.0])
@@ -0,0 +1,40 @@
+# test_sequencer.py
+import time
+import numpy as np
+from sequencer import _Route, _nearest_neighbor, sequence_operations
+from move_times import MoveTimeMatrix
+from input_parser import operations_from_array
+
+def _random_route(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return _Route(rng.uniform(0, 5, n), rng.uniform(0, 5, (n, n)))
+
+def test_nearest_neighbor_matches_reference():
+    route = _random_route(60)
+    expected = []
+    remaining = set(range(60))
+    prev = None
+    while remaining:
+        nxt = min(remaining, key=lambda j: (route.edge(prev, j), j))
+        expected.append(nxt)
+        remaining.remove(nxt)
+        prev = nxt
+    assert _nearest_neighbor(route, 60, time.perf_counter() + 10) == expected
+
+def test_nearest_neighbor_stops_at_deadline():
+    route = _random_route(2000)
+    order = _nearest_neighbor(route, 2000, time.perf_counter() - 1)
+    assert order == list(range(2000))
+
+def test_sequencing_respects_budget_on_dense_route():
+    rng = np.random.default_rng(1)
+    n = 2000
+    ops = operations_from_array(np.column_stack((rng.uniform(-1, 1, (n, 6)), rng.uniform(0.1, 1, n))))
+    robot = {'id': 'R1', 'base_x': 0.0, 'base_y': 0.0, 'base_z': 0.0, 'operations': ops}
+    move_times = MoveTimeMatrix([robot], ops, 0.5, 2.0)
+    start = time.perf_counter()
+    before, after = sequence_operations(robot, move_times, time_budget=0.05)
+    # Budget plus building the dense cost table and the final route evaluation
+    assert time.perf_counter() - start < 0.5
+    assert after <= before
+    assert sorted(op['id'] for op in robot['operations']) == list(range(1, n + 1))
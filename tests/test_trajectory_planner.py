@@ -0,0 +1,35 @@
+# test_trajectory_planner.py
+import numpy as np
+from kinematics import solve_ik, forward_kinematics
+from trajectory_planner import _ik_path, plan_trajectories, plan_trajectory_tails
+from scenario_generator import generate_scenario
+from input_parser import parse_input
+
+ROBOT = {'base_x': 0.0, 'base_y': 0.0, 'base_z': 0.0}
+
+# A line below the base on which points solved one at a time switch arm configuration
+LINE = (np.array([-0.64, -0.06, -1.41]), np.array([0.24, -1.45, -1.29]))
+
+def test_ik_path_keeps_the_arm_configuration():
+    start, end = LINE
+    points = start + np.linspace(0.0, 1.0, 60)[:, None] * (end - start)
+    single, reached = solve_ik(ROBOT, points, cache=None)
+    assert reached.all() and np.abs(np.diff(single, axis=0)).max() > 90.0
+    angles = _ik_path(ROBOT, points)
+    assert np.abs(np.diff(angles, axis=0)).max() < 10.0
+    assert np.linalg.norm(forward_kinematics(ROBOT, angles) - points, axis=1).max() <= 1e-3
+
+def test_joint_timed_tails_match_the_whole_plan():
+    robots, operations, _, _, v_max, a_max = parse_input(generate_scenario(2, 40, seed=5), is_filename=False)
+    for k, robot in enumerate(robots):
+        robot['operations'] = operations[k::len(robots)]
+    whole, finish = plan_trajectory_tails(robots, [0, 0], [0.0, 0.0], v_max, a_max, timing='joint')
+    assert [trajectory.makespan for trajectory in whole] == [
+        trajectory.makespan for trajectory in plan_trajectories(robots, v_max, a_max, timing='joint')]
+    starts = [5, 12]
+    start_times = [float(finish[k][start - 1]) for k, start in enumerate(starts)]
+    tails, tail_finish = plan_trajectory_tails(robots, starts, start_times, v_max, a_max, timing='joint')
+    for k, start in enumerate(starts):
+        assert np.allclose(tail_finish[k], finish[k][start:], rtol=0, atol=1e-9)
+        times = np.linspace(start_times[k], whole[k].makespan, 500)
+        assert np.allclose(tails[k].positions_at(times), whole[k].positions_at(times), rtol=0, atol=1e-9)